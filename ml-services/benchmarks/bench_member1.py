@@ -0,0 +1,267 @@
+# benchmarks/bench_member1.py
+"""
+Benchmarks for the FuelWatch forecast / misbehavior service (member1-kumara).
+
+Micro:
+    forecast_days          FuelDemandPredictor.forecast_days, 7 / 30 / 365 days
+    build_daily_features   transactions -> daily feature rows
+    score_rules            rule scoring over the daily rows
+    parse_pdf              text extraction + row scanning per PDF in data/raw
+
+Macro (FastAPI app driven in-process with TestClient):
+    /ml/score-report       synthetic CSV reports of increasing size x concurrency
+    /forecast              weekly forecast from the processed history (no upload;
+                           uploads would run prepare_data and rewrite data/)
+    /forecast upload       weekly / monthly with a report PDF already in a temp
+                           ingest store: first call forecasts and stores the
+                           result, later calls reuse it (fails on non-200)
+    /health                framework overhead baseline
+
+Usually run through run.py; standalone:
+    python benchmarks/bench_member1.py --quick
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SERVICE_DIR = BENCH_DIR.parent / "member1-kumara"
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(SERVICE_DIR))
+
+# keep per-request access logs out of the measurements
+os.environ.setdefault("FUELWATCH_LOG_LEVEL", "WARNING")
+
+import numpy as np
+import pandas as pd
+
+from common import emit, record, run_load, time_call
+
+SERVICE = "member1"
+
+FUELS = ["Lanka Auto Diesel", "Lanka Petrol 92 Octane", "Lanka Petrol 95 Octane", "Lanka Super Diesel"]
+
+
+def synthetic_report(n_rows: int, stations: int = 3, seed: int = 42) -> pd.DataFrame:
+    """
+    A sale-by-site style report (Site, Type, Date, Number, Class, Site, Item,
+    Qty, Amount, Balance) with n_rows transactions. Balances fall with sales,
+    get refilled, and a few days carry anomalies for the rules to find.
+    """
+    rng = np.random.default_rng(seed)
+    groups = stations * len(FUELS)
+    per_group = max(1, n_rows // groups)
+    # ~12 sales per station/fuel/day
+    days = max(1, per_group // 12)
+
+    frames = []
+    for g in range(groups):
+        site = f"ST{g // len(FUELS) + 1:03d}"
+        fuel = FUELS[g % len(FUELS)]
+        day_idx = np.sort(rng.integers(0, days, per_group))
+        ts = (
+            pd.Timestamp("2025-01-01")
+            + pd.to_timedelta(day_idx, unit="D")
+            + pd.to_timedelta(rng.integers(6 * 3600, 22 * 3600, per_group), unit="s")
+        )
+        qty = np.round(rng.gamma(2.0, 12.0, per_group), 2)
+        draw = qty.copy()
+        draw[rng.random(per_group) < 0.01] *= 8  # unrecorded losses
+        refill = np.where(rng.random(per_group) < 0.02, 9000.0, 0.0)
+        balance = 20000.0 + np.cumsum(refill - draw)
+        frames.append(pd.DataFrame({
+            "Site": site,
+            "Type": "Sale",
+            "Date": ts.strftime("%Y-%m-%d %H:%M:%S"),
+            "Number": np.arange(per_group) + g * per_group,
+            "Class": "Retail",
+            "Site.1": site,
+            "Item": fuel,
+            "Qty": qty,
+            "Amount": np.round(qty * 350.0, 2),
+            "Balance": np.round(balance, 2),
+        }))
+    # exported reports repeat the Site header; "Site.1" is how read_csv loads it
+    return pd.concat(frames, ignore_index=True)
+
+
+def load_predictor():
+    """
+    FuelDemandPredictor from models/, or - when the scaler pickles are not
+    checked in - the same Keras model with MinMax scalers fitted on the
+    processed history (timing does not depend on the scaler values).
+    """
+    from utils.predictor import FuelDemandPredictor
+
+    try:
+        return FuelDemandPredictor(), "models/"
+    except FileNotFoundError:
+        pass
+
+    import tensorflow as tf
+    from sklearn.preprocessing import MinMaxScaler
+    from utils.config import MODEL_META_PATH, MODEL_PATH, PROCESSED_DAILY_CSV
+
+    p = FuelDemandPredictor.__new__(FuelDemandPredictor)
+    p._init_meta(json.loads(MODEL_META_PATH.read_text(encoding="utf-8")))
+    p.version, p.model_path = None, MODEL_PATH  # flat models/
+    p.model = tf.keras.models.load_model(MODEL_PATH, compile=False)
+    p._init_runtime()
+    hist = pd.read_csv(PROCESSED_DAILY_CSV)
+    p.scaler_X = MinMaxScaler().fit(hist[p.feature_cols].values.astype(np.float32))
+    p.scaler_y = MinMaxScaler().fit(hist[p.fuel_cols].values.astype(np.float32))
+    return p, "stand-in scalers (scaler_X.pkl / scaler_y.pkl missing)"
+
+
+def micro(args, predictor, source) -> list[dict]:
+    from api.main import build_daily_features, score_rules, to_transactions
+    from scripts.parse_report_pdf import RAW_DIR, extract_pdf_text, extract_rows_from_text, load_known_fuels
+    from utils.config import PROCESSED_DAILY_CSV
+
+    out = []
+    hist = pd.read_csv(PROCESSED_DAILY_CSV)
+    for days in ([7, 30] if args.quick else [7, 30, 365]):
+        repeat = 1 if days == 365 else args.repeat
+        stats, _ = time_call(lambda: predictor.forecast_days(hist, days=days), repeat=repeat)
+        out.append(record(SERVICE, "micro", "forecast_days", {"days": days}, stats, predictor=source))
+
+    for n_rows in args.sizes:
+        tx = to_transactions(synthetic_report(n_rows))
+        stats, daily = time_call(lambda: build_daily_features(tx), repeat=args.repeat)
+        out.append(record(SERVICE, "micro", "build_daily_features", {"rows": n_rows}, stats, daily_rows=len(daily)))
+
+        stats, _ = time_call(lambda: score_rules(daily, 800.0, 6000.0, 1500.0), repeat=args.repeat)
+        out.append(record(SERVICE, "micro", "score_rules", {"rows": n_rows}, stats, daily_rows=len(daily)))
+
+    known_fuels = load_known_fuels()
+    pdfs = args.pdfs or sorted(RAW_DIR.glob("*.pdf"))
+    if args.quick and not args.pdfs:
+        pdfs = sorted(pdfs, key=lambda p: p.stat().st_size)[:3]
+    for pdf in pdfs:
+        stats, rows = time_call(
+            lambda: extract_rows_from_text(extract_pdf_text(pdf), known_fuels),
+            repeat=args.repeat,
+        )
+        out.append(record(SERVICE, "micro", "parse_pdf", {"file": Path(pdf).name}, stats, rows=len(rows)))
+    return out
+
+
+def macro(args, predictor, source) -> list[dict]:
+    from fastapi.testclient import TestClient
+    import api.main as m
+
+    if m.predictor is None:
+        m.predictor = predictor
+    client = TestClient(m.app)
+
+    out = []
+    levels = args.concurrency
+
+    for c in levels:
+        stats = run_load(lambda: client.get("/health").status_code, args.requests, c)
+        out.append(record(SERVICE, "macro", "health", {"concurrency": c}, stats))
+
+    for n_rows in args.sizes:
+        buf = io.StringIO()
+        synthetic_report(n_rows).to_csv(buf, index=False)
+        payload = buf.getvalue().encode("utf-8")
+
+        def send():
+            r = client.post("/ml/score-report", files={"file": ("report.csv", payload, "text/csv")})
+            return r.status_code
+
+        for c in levels:
+            stats = run_load(send, args.requests, c)
+            out.append(record(
+                SERVICE, "macro", "score_report", {"rows": n_rows, "concurrency": c}, stats,
+                upload_bytes=len(payload), rf_backend=m.RF_BACKEND,
+            ))
+
+    for c in levels:
+        stats = run_load(lambda: client.post("/forecast", data={"mode": "weekly"}).status_code, args.requests, c)
+        out.append(record(SERVICE, "macro", "forecast", {"mode": "weekly", "concurrency": c}, stats, predictor=source))
+
+    out += forecast_upload(args, client, source)
+    return out
+
+
+def forecast_upload(args, client, source) -> list[dict]:
+    """
+    /forecast with an uploaded PDF, weekly and monthly. The report is put in a
+    temp ingest store first, so the upload takes the dedup path (no parse /
+    prepare_data subprocess, data/ untouched) but still stores and reuses
+    the forecast, which is where non-JSON values in the result used to fail.
+    """
+    import api.ingest as ingest
+    from scripts.parse_report_pdf import RAW_DIR
+
+    pdf = args.upload_pdf or RAW_DIR / "fuel_sales_report_2.pdf"
+    payload = Path(pdf).read_bytes()
+    digest = hashlib.sha256(payload).hexdigest()
+
+    out = []
+    saved_store = ingest.INGEST_STORE_DIR
+    with tempfile.TemporaryDirectory() as store:
+        ingest.INGEST_STORE_DIR = Path(store)
+        try:
+            ingest.save_entry(digest, ingest.new_entry(digest, Path(pdf).name, Path(pdf), {}))
+            for mode in ("weekly", "monthly"):
+                def send():
+                    r = client.post("/forecast", data={"mode": mode},
+                                    files={"file": (Path(pdf).name, payload, "application/pdf")})
+                    if r.status_code != 200:
+                        raise RuntimeError(f"/forecast upload ({mode}) returned {r.status_code}: {r.text[:500]}")
+                    return r.json()
+
+                first_stats, first = time_call(send, repeat=1, warmup=0)
+                stats, again = time_call(send, repeat=args.repeat, warmup=0)
+                if again["forecast"] != first["forecast"]:
+                    raise RuntimeError(f"/forecast upload ({mode}): reused forecast differs from the stored one")
+                out.append(record(SERVICE, "macro", "forecast_upload", {"mode": mode, "call": "first"},
+                                  first_stats, predictor=source, file=Path(pdf).name))
+                out.append(record(SERVICE, "macro", "forecast_upload", {"mode": mode, "call": "reused"},
+                                  stats, predictor=source, file=Path(pdf).name, message=again["message"]))
+        finally:
+            ingest.INGEST_STORE_DIR = saved_store
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="smaller sizes, skip the 365-day forecast")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=16, help="requests per macro load level")
+    parser.add_argument("--sizes", type=int, nargs="+", default=None, help="synthetic report rows")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=None)
+    parser.add_argument("--pdfs", type=Path, nargs="*", default=None)
+    parser.add_argument("--upload-pdf", type=Path, default=None,
+                        help="report for the /forecast upload check (default: data/raw/fuel_sales_report_2.pdf)")
+    parser.add_argument("--only", choices=["micro", "macro"], default=None)
+    parser.add_argument("--out", default=None, help="write JSON records here instead of printing")
+    args = parser.parse_args()
+
+    if args.sizes is None:
+        args.sizes = [1_000, 10_000] if args.quick else [1_000, 10_000, 50_000]
+    if args.concurrency is None:
+        args.concurrency = [1, 4] if args.quick else [1, 4, 8]
+    if args.quick:
+        args.repeat = min(args.repeat, 3)
+        args.requests = min(args.requests, 8)
+
+    predictor, source = load_predictor()
+    records = []
+    if args.only in (None, "micro"):
+        records += micro(args, predictor, source)
+    if args.only in (None, "macro"):
+        records += macro(args, predictor, source)
+    emit(records, args.out)
+
+
+if __name__ == "__main__":
+    main()
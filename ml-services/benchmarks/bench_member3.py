@@ -0,0 +1,149 @@
+# benchmarks/bench_member3.py
+"""
+Benchmarks for the employee demand service (member3-oshada).
+
+Micro:
+    prepare_features       one feature row (weather given / default weather)
+    model_predict          employee model on 1 row and on a year of rows
+
+Macro (Flask app driven in-process with the test client):
+    /predict               single day
+    /predict/batch         7 / 31 / 92 / 366 days, total demand or per-fuel breakdown
+    /predict/weekly        7-day forecast, weather API stubbed out
+    /health                framework overhead baseline
+
+Batch dates are in the past, so get_weather_for_date takes its default path
+and nothing goes to the network. Usually run through run.py; standalone:
+    python benchmarks/bench_member3.py --quick
+"""
+
+import argparse
+import os
+import sys
+import threading
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SERVICE_DIR = BENCH_DIR.parent / "member3-oshada"
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(SERVICE_DIR))
+sys.path.insert(0, str(SERVICE_DIR / "api"))
+
+os.environ.setdefault("FUELWATCH_LOG_LEVEL", "WARNING")
+
+import pandas as pd
+
+from common import emit, record, run_load, time_call
+
+SERVICE = "member3"
+
+FUELS = ["Lanka Auto Diesel", "Lanka Petrol 92 Octane", "Lanka Petrol 95 Octane", "Lanka Super Diesel"]
+
+
+def batch_payload(days: int, breakdown: bool) -> dict:
+    dates = pd.date_range("2024-01-01", periods=days, freq="D").strftime("%Y-%m-%d")
+    if breakdown:
+        # Member 1 forecast rows: one column per fuel, summed by the API
+        return {"daily": [{"Date": d, **{f: 1200.0 + 10 * i for f in FUELS}} for i, d in enumerate(dates)]}
+    return {"forecasts": [{"date": d, "fuel_demand": 4000.0 + 15 * i} for i, d in enumerate(dates)]}
+
+
+def micro(args, app_module) -> list[dict]:
+    out = []
+    prepare_features = app_module.prepare_features
+    model = app_module.model
+
+    stats, _ = time_call(lambda: prepare_features("2024-03-15", 5000.0, "Sunny", 29.0), repeat=args.repeat * 20)
+    out.append(record(SERVICE, "micro", "prepare_features", {"weather": "given"}, stats))
+
+    stats, _ = time_call(lambda: prepare_features("2024-03-15", 5000.0), repeat=args.repeat * 20)
+    out.append(record(SERVICE, "micro", "prepare_features", {"weather": "default"}, stats))
+
+    row, _, _ = prepare_features("2024-03-15", 5000.0, "Sunny", 29.0)
+    stats, _ = time_call(lambda: model.predict(row), repeat=args.repeat * 4)
+    out.append(record(SERVICE, "micro", "model_predict", {"rows": 1}, stats))
+
+    year = pd.concat(
+        [prepare_features(d, 5000.0, "Cloudy", 28.0)[0] for d in pd.date_range("2024-01-01", periods=366).strftime("%Y-%m-%d")],
+        ignore_index=True,
+    )
+    stats, _ = time_call(lambda: model.predict(year), repeat=args.repeat)
+    out.append(record(SERVICE, "micro", "model_predict", {"rows": len(year)}, stats))
+    return out
+
+
+def macro(args, app_module) -> list[dict]:
+    app = app_module.app
+    # the weekly endpoint would otherwise call Open-Meteo; measure the service, not the network
+    app_module.fetch_weather_forecast = lambda *a, **k: None
+
+    local = threading.local()
+
+    def client():
+        # one test client per load thread
+        if not hasattr(local, "client"):
+            local.client = app.test_client()
+        return local.client
+
+    out = []
+    levels = args.concurrency
+
+    for c in levels:
+        stats = run_load(lambda: client().get("/health").status_code, args.requests, c)
+        out.append(record(SERVICE, "macro", "health", {"concurrency": c}, stats))
+
+    single = {"date": "2024-03-15", "predicted_fuel_demand": 5000}
+    for c in levels:
+        stats = run_load(lambda: client().post("/predict", json=single).status_code, args.requests, c)
+        out.append(record(SERVICE, "macro", "predict", {"concurrency": c}, stats))
+
+    for days in args.days:
+        for breakdown in (False, True):
+            payload = batch_payload(days, breakdown)
+            for c in levels:
+                stats = run_load(lambda: client().post("/predict/batch", json=payload).status_code, args.requests, c)
+                out.append(record(
+                    SERVICE, "macro", "predict_batch",
+                    {"days": days, "breakdown": breakdown, "concurrency": c}, stats,
+                ))
+
+    for c in levels:
+        stats = run_load(lambda: client().get("/predict/weekly").status_code, args.requests, c)
+        out.append(record(SERVICE, "macro", "predict_weekly", {"concurrency": c}, stats))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="fewer batch sizes and load levels")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=16, help="requests per macro load level")
+    parser.add_argument("--days", type=int, nargs="+", default=None, help="/predict/batch sizes")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=None)
+    parser.add_argument("--only", choices=["micro", "macro"], default=None)
+    parser.add_argument("--out", default=None, help="write JSON records here instead of printing")
+    args = parser.parse_args()
+
+    if args.days is None:
+        args.days = [7, 31] if args.quick else [7, 31, 92, 366]
+    if args.concurrency is None:
+        args.concurrency = [1, 4] if args.quick else [1, 4, 8]
+    if args.quick:
+        args.repeat = min(args.repeat, 3)
+        args.requests = min(args.requests, 8)
+
+    import app as app_module
+
+    if app_module.model is None:
+        sys.exit("Employee model not found - run scripts/train_model.py first")
+
+    records = []
+    if args.only in (None, "micro"):
+        records += micro(args, app_module)
+    if args.only in (None, "macro"):
+        records += macro(args, app_module)
+    emit(records, args.out)
+
+
+if __name__ == "__main__":
+    main()
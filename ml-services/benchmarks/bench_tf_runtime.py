@@ -0,0 +1,231 @@
+# benchmarks/bench_tf_runtime.py
+"""
+TensorFlow runtime matrix for FuelDemandPredictor (utils/tf_runtime.py).
+
+Every configuration runs in fresh processes, because thread pools and oneDNN
+are fixed once TensorFlow initializes. With --workers N, N processes with the
+same configuration start together (like N uvicorn workers on one host), and
+the aggregate rollout throughput is reported per worker and per core.
+
+    python benchmarks/bench_tf_runtime.py                  # one axis at a time
+    python benchmarks/bench_tf_runtime.py --full           # full cartesian matrix
+    python benchmarks/bench_tf_runtime.py --workers 1 2 4 --days 30 --out tf.json
+
+Per configuration:
+    step_*_s         latency of one (1, lookback, features) forward pass
+    steps_per_s      rollout steps/s summed over the workers
+    per_core         steps_per_s / cores in use (min(workers x intra, cpus))
+    batch64_per_s    windows/s for a batch of 64 windows (one process)
+    first_call_s     first step, includes tracing / XLA compilation
+    max_rel_diff     forecast difference vs the float32 default run
+
+"legacy" is the pre-runtime path (model.predict for every step).
+"""
+
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR))
+
+from common import emit, record, summarize
+
+ENV_KEYS = {
+    "intra_threads": "FUELWATCH_TF_INTRA_THREADS",
+    "inter_threads": "FUELWATCH_TF_INTER_THREADS",
+    "onednn": "FUELWATCH_TF_ONEDNN",
+    "precision": "FUELWATCH_TF_PRECISION",
+    "xla": "FUELWATCH_TF_XLA",
+}
+
+BASE = {"intra_threads": 0, "inter_threads": 0, "onednn": 1, "precision": "float32", "xla": 0}
+
+
+def _axes(cpus: int) -> dict:
+    threads = sorted({1, 2, cpus})
+    return {
+        "intra_threads": threads,
+        "inter_threads": [1, 2],
+        "onednn": [0, 1],
+        "precision": ["float32", "bfloat16", "mixed_bfloat16", "float16"],
+        "xla": [0, 1],
+    }
+
+
+def configurations(full: bool) -> list[dict]:
+    axes = _axes(os.cpu_count() or 1)
+    if full:
+        keys = list(axes)
+        return [dict(zip(keys, combo)) for combo in itertools.product(*(axes[k] for k in keys))]
+    configs = [dict(BASE)]
+    for key, values in axes.items():
+        for v in values:
+            cfg = dict(BASE, **{key: v})
+            if cfg not in configs:
+                configs.append(cfg)
+    return configs
+
+
+def _label(cfg: dict) -> str:
+    if cfg.get("legacy"):
+        return "legacy"
+    return (f"intra={cfg['intra_threads']},inter={cfg['inter_threads']},onednn={cfg['onednn']},"
+            f"precision={cfg['precision']},xla={cfg['xla']}")
+
+
+# ----------------------------------------------------------------
+# Child: one worker process
+# ----------------------------------------------------------------
+def child(args):
+    os.environ.setdefault("FUELWATCH_LOG_LEVEL", "WARNING")
+    import numpy as np
+    import pandas as pd
+    from bench_member1 import load_predictor
+    from utils.config import PROCESSED_DAILY_CSV
+
+    predictor, _ = load_predictor()
+    if args.legacy:
+        predictor._step = lambda x: predictor.model.predict(x, verbose=0)
+
+    hist = pd.read_csv(PROCESSED_DAILY_CSV)
+    shape = (1, predictor.lookback, len(predictor.feature_cols))
+    x1 = np.random.default_rng(0).random(shape, dtype=np.float32)
+
+    t0 = time.perf_counter()
+    predictor._step(x1)
+    first_call = time.perf_counter() - t0
+
+    out = {"first_call_s": round(first_call, 4), "runtime": getattr(predictor, "runtime", None)}
+    if args.measure_single:
+        samples = []
+        for _ in range(args.step_calls):
+            t0 = time.perf_counter()
+            predictor._step(x1)
+            samples.append(time.perf_counter() - t0)
+        out["step"] = summarize(samples)
+
+        xb = np.random.default_rng(1).random((64, *shape[1:]), dtype=np.float32)
+        predictor._step(xb)
+        t0 = time.perf_counter()
+        for _ in range(10):
+            predictor._step(xb)
+        out["batch64_per_s"] = round(640 / (time.perf_counter() - t0), 1)
+
+        fc = predictor.forecast_days(hist, days=args.days)
+        out["forecast"] = fc.drop(columns=["Date"]).to_numpy().tolist()
+
+    # all workers start the timed rollout together
+    delay = args.start_at - time.time()
+    if delay > 0:
+        time.sleep(delay)
+    t0 = time.perf_counter()
+    for _ in range(args.rollouts):
+        predictor.forecast_days(hist, days=args.days)
+    out["rollout_wall_s"] = time.perf_counter() - t0
+    out["rollout_steps"] = args.rollouts * args.days
+    print(json.dumps(out))
+
+
+def _run_config(cfg: dict, workers: int, args) -> dict:
+    env = dict(os.environ, FUELWATCH_TF_PROFILE="default", FUELWATCH_LOG_LEVEL="WARNING")
+    for key, var in ENV_KEYS.items():
+        env[var] = str(int(cfg[key]) if isinstance(cfg[key], bool) else cfg[key])
+
+    cmd = [sys.executable, __file__, "--child", "--days", str(args.days), "--rollouts", str(args.rollouts),
+           "--step-calls", str(args.step_calls), "--start-at", str(time.time() + args.startup_s)]
+    if cfg.get("legacy"):
+        cmd.append("--legacy")
+    procs = [
+        subprocess.Popen(cmd + (["--measure-single"] if i == 0 else []), env=env,
+                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        for i in range(workers)
+    ]
+    results = []
+    for p in procs:
+        stdout, stderr = p.communicate()
+        if p.returncode != 0:
+            raise RuntimeError(f"{_label(cfg)} x{workers} failed:\n{stderr[-3000:]}")
+        results.append(json.loads(stdout.strip().splitlines()[-1]))
+    return {"primary": results[0], "all": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--full", action="store_true", help="cartesian product of all axes")
+    parser.add_argument("--workers", type=int, nargs="+", default=None, help="concurrent worker processes")
+    parser.add_argument("--days", type=int, default=30, help="rollout length per forecast")
+    parser.add_argument("--rollouts", type=int, default=5, help="timed forecasts per worker")
+    parser.add_argument("--step-calls", type=int, default=200)
+    parser.add_argument("--startup-s", type=float, default=20.0, help="time allowed for workers to load TF")
+    parser.add_argument("--no-legacy", action="store_true", help="skip the model.predict baseline")
+    parser.add_argument("--out", default=None)
+    # child mode
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--legacy", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--measure-single", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--start-at", type=float, default=0.0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, str(BENCH_DIR.parent / "member1-kumara"))
+        child(args)
+        return
+
+    cpus = os.cpu_count() or 1
+    workers_list = args.workers or sorted({1, cpus})
+    configs = configurations(args.full)  # BASE first: it is the parity reference
+    if not args.no_legacy:
+        configs.insert(1, dict(BASE, legacy=True))
+
+    import numpy as np
+
+    reference = None
+    records = []
+    for cfg in configs:
+        for workers in workers_list:
+            try:
+                res = _run_config(cfg, workers, args)
+            except RuntimeError as e:
+                # e.g. a precision without CPU kernels for some op
+                print(f"{_label(cfg):<72} x{workers}  FAILED: {str(e).splitlines()[-1]}", flush=True)
+                continue
+            primary = res["primary"]
+            wall = max(r["rollout_wall_s"] for r in res["all"])
+            steps = sum(r["rollout_steps"] for r in res["all"])
+            steps_per_s = steps / wall if wall > 0 else float("nan")
+            intra = cfg["intra_threads"] or cpus
+            cores = min(workers * intra, cpus)
+
+            forecast = np.asarray(primary["forecast"])
+            if reference is None:
+                reference = forecast
+            base = reference
+            rel = np.abs(forecast - base) / np.maximum(np.abs(base), 1e-6)
+
+            params = {"config": _label(cfg), "workers": workers}
+            records.append(record(
+                "member1", "tf_runtime", "rollout", params, primary["step"],
+                steps_per_s=round(steps_per_s, 1),
+                steps_per_s_per_worker=round(steps_per_s / workers, 1),
+                per_core=round(steps_per_s / cores, 1),
+                cores=cores,
+                batch64_per_s=primary["batch64_per_s"],
+                first_call_s=primary["first_call_s"],
+                max_rel_diff=float(rel.max()),
+            ))
+            print(f"{params['config']:<72} x{workers}  step p50 {primary['step']['median_s'] * 1e3:7.2f} ms  "
+                  f"{steps_per_s:8.1f} steps/s  {steps_per_s / cores:8.1f}/core  "
+                  f"batch64 {primary['batch64_per_s']:8.1f}/s  diff {rel.max():.2e}", flush=True)
+
+    if args.out:
+        emit(records, args.out)
+
+
+if __name__ == "__main__":
+    main()
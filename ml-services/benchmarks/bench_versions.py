@@ -0,0 +1,188 @@
+# benchmarks/bench_versions.py
+"""
+Compare registered model versions of one service side by side.
+
+    python benchmarks/bench_versions.py member1                    # every version in member1-kumara/models
+    python benchmarks/bench_versions.py member1 --models-dir member1-kumara/models/global --last 3
+    python benchmarks/bench_versions.py member3 --versions 20260301-020000 20260315-020000
+    python benchmarks/bench_versions.py member3 --out versions.json
+
+Each version is loaded from its registry directory (utils/registry.py of the
+service) and checked against its manifest checksums, then timed in this one
+process (the first load is repeated untimed so imports do not count):
+
+    member1   load, forecast_days 7 / 30 / 365 on the processed history
+              (one tank's history for a global model); max relative
+              difference of the 30-day forecast from the base version
+    member3   load, predict on 1 row / the dataset's first 366 rows;
+              test-split MAE measured on the dataset (same split as
+              training) and the max prediction difference from the base
+              version
+
+The base is the active version (else the first listed); the table shows
+each timing relative to it. --out writes the records in the common.py format
+with the version in the id.
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SERVICE_DIRS = {
+    "member1": BENCH_DIR.parent / "member1-kumara",
+    "member3": BENCH_DIR.parent / "member3-oshada",
+}
+
+os.environ.setdefault("FUELWATCH_LOG_LEVEL", "WARNING")
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(BENCH_DIR))
+from common import emit, record, time_call
+
+
+def bench_member1(args, root: Path, versions: list[str], base: str) -> list[dict]:
+    from utils.config import PROCESSED_DAILY_CSV, TANK_DAILY_CSV
+    from utils.predictor import FuelDemandPredictor
+    from utils.registry import read_manifest, verify_version
+
+    FuelDemandPredictor(root, version=versions[0])  # TF / Keras imports, not part of the comparison
+    days_list = [7, 30] if args.quick else [7, 30, 365]
+    out, base_30d = [], {}
+    for version in [base] + [v for v in versions if v != base]:
+        manifest = read_manifest(root, version)
+        problems = verify_version(root, version)
+        load_stats, predictor = time_call(lambda: FuelDemandPredictor(root, version=version), repeat=3, warmup=0)
+
+        tank = None
+        if predictor.is_global:
+            hist = pd.read_csv(TANK_DAILY_CSV)
+            tank = str(predictor.tanks[0])
+            hist = hist[hist[predictor.tank_col].astype(str).str.strip() == tank]
+        else:
+            hist = pd.read_csv(PROCESSED_DAILY_CSV)
+
+        common = {"source": manifest.get("source"), "checksums_ok": not problems,
+                  "test_mse_scaled": manifest.get("metrics", {}).get("test_mse_scaled")}
+        out.append(record("member1", "version", "load", {"version": version}, load_stats, **common))
+        for days in days_list:
+            repeat = 1 if days == 365 else args.repeat
+            stats, frame = time_call(lambda: predictor.forecast_days(hist, days=days, tank=tank), repeat=repeat)
+            extra = dict(common, method=frame.attrs.get("method"))
+            if days == 30:
+                values = frame[predictor.fuel_cols].to_numpy(dtype=float)
+                base_30d.setdefault("values", values)
+                ref = base_30d["values"]
+                extra["max_rel_diff_vs_base"] = float(np.max(np.abs(values - ref) / np.maximum(np.abs(ref), 1.0)))
+            out.append(record("member1", "version", "forecast_days", {"version": version, "days": days}, stats, **extra))
+    return out
+
+
+def bench_member3(args, root: Path, versions: list[str], base: str) -> list[dict]:
+    import joblib
+    from sklearn.metrics import mean_absolute_error
+    from sklearn.model_selection import train_test_split
+    from utils.forest import open_employee_model
+    from utils.registry import read_manifest, resolve, verify_version
+
+    df = pd.read_csv(SERVICE_DIRS["member3"] / "data" / "employee_demand_dataset.csv")
+    open_employee_model(resolve(str(root), versions[0])[0])  # sklearn imports, not part of the comparison
+    out, base_pred = [], {}
+    for version in [base] + [v for v in versions if v != base]:
+        manifest = read_manifest(str(root), version)
+        problems = verify_version(str(root), version)
+        model_dir, _ = resolve(str(root), version)
+        load_stats, (model, kind) = time_call(lambda: open_employee_model(model_dir), repeat=3, warmup=0)
+
+        feature_cols = joblib.load(os.path.join(model_dir, "model_columns.joblib"))
+        _, X_test, _, y_test = train_test_split(df[feature_cols], df["employee_count"], test_size=0.2, random_state=42)
+        y_pred = model.predict(X_test)
+        ref = base_pred.setdefault("values", y_pred)
+        common = {"source": manifest.get("source"), "format": kind, "checksums_ok": not problems,
+                  "test_mae": round(float(mean_absolute_error(y_test, y_pred)), 4),
+                  "max_abs_diff_vs_base": float(np.max(np.abs(y_pred - ref)))}
+
+        out.append(record("member3", "version", "load", {"version": version}, load_stats, **common))
+        for rows in (X_test.iloc[:1], df[feature_cols].iloc[:366]):
+            stats, _ = time_call(lambda: model.predict(rows), repeat=args.repeat * 4)
+            out.append(record("member3", "version", "model_predict", {"version": version, "rows": len(rows)},
+                              stats, **common))
+    return out
+
+
+def print_table(records: list[dict], base: str):
+    versions = list(dict.fromkeys(r["params"]["version"] for r in records))
+    ops = list(dict.fromkeys(
+        (r["name"], tuple((k, v) for k, v in r["params"].items() if k != "version")) for r in records
+    ))
+    by_key = {(r["params"]["version"], r["name"], tuple((k, v) for k, v in r["params"].items() if k != "version")): r
+              for r in records}
+
+    labels = [name + "".join(f"[{k}={v}]" for k, v in params) for name, params in ops]
+    print(f"{'operation (median ms)':<32}" + "".join(f"{v + (' *' if v == base else ''):>22}" for v in versions))
+    for (name, params), label in zip(ops, labels):
+        row = f"{label:<32}"
+        base_rec = by_key.get((base, name, params))
+        for v in versions:
+            rec = by_key.get((v, name, params))
+            if rec is None:
+                row += f"{'-':>22}"
+                continue
+            cell = f"{rec['median_s'] * 1e3:.2f}"
+            if base_rec is not None and v != base and base_rec["median_s"]:
+                cell += f" ({rec['median_s'] / base_rec['median_s'] - 1:+.0%})"
+            row += f"{cell:>22}"
+        print(row)
+
+    print()
+    loads = {r["params"]["version"]: r.get("extra", {}) for r in records if r["name"] == "load"}
+    keys = [k for k in ("source", "format", "checksums_ok", "test_mse_scaled", "test_mae") if any(k in e for e in loads.values())]
+    diffs = {}
+    for r in records:
+        for k in ("max_rel_diff_vs_base", "max_abs_diff_vs_base"):
+            if k in r.get("extra", {}):
+                diffs.setdefault(k, {})[r["params"]["version"]] = r["extra"][k]
+    for k in keys:
+        cells = [loads.get(v, {}).get(k, "-") for v in versions]
+        print(f"{k:<32}" + "".join(f"{c:>22.4g}" if isinstance(c, float) else f"{str(c):>22}" for c in cells))
+    for k, vals in diffs.items():
+        print(f"{k:<32}" + "".join(f"{vals.get(v, float('nan')):>22.3g}" for v in versions))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("service", choices=sorted(SERVICE_DIRS))
+    parser.add_argument("--models-dir", type=Path, default=None, help="registry root (default: <service>/models)")
+    parser.add_argument("--versions", nargs="+", default=None, help="default: every registered version")
+    parser.add_argument("--last", type=int, default=None, help="only the newest N versions")
+    parser.add_argument("--quick", action="store_true", help="member1: skip the 365-day forecast")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", default=None, help="write JSON records here as well")
+    args = parser.parse_args()
+
+    service_dir = SERVICE_DIRS[args.service]
+    sys.path.insert(0, str(service_dir))
+    from utils.registry import current_version, list_versions
+
+    root = (args.models_dir or service_dir / "models").resolve()
+    versions = args.versions or [m["version"] for m in list_versions(root)]
+    if args.last:
+        versions = versions[-args.last:]
+    if not versions:
+        raise SystemExit(f"No registered versions in {root} (scripts/model_registry adopt / train first)")
+    active = current_version(root)
+    base = active if active in versions else versions[0]
+
+    bench = bench_member1 if args.service == "member1" else bench_member3
+    records = bench(args, root, versions, base)
+    print_table(records, base)
+    if args.out:
+        emit(records, args.out)
+        print(f"\nWrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# benchmarks/common.py
+"""
+Timing, load generation and result records shared by the service benchmarks.
+
+Every measurement is one record:
+
+    {"id": "member1.micro.forecast_days[days=7]", "service": "member1",
+     "kind": "micro", "name": "forecast_days", "params": {"days": 7},
+     "n": 5, "min_s": ..., "median_s": ..., "p95_s": ..., "mean_s": ...,
+     "extra": {...}}
+
+"id" is stable across commits, so compare.py can match runs record by record.
+"""
+
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    k = (len(sorted_values) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(samples: list[float]) -> dict:
+    s = sorted(samples)
+    return {
+        "n": len(s),
+        "min_s": round(s[0], 6) if s else None,
+        "median_s": round(statistics.median(s), 6) if s else None,
+        "p95_s": round(_percentile(s, 0.95), 6) if s else None,
+        "p99_s": round(_percentile(s, 0.99), 6) if s else None,
+        "mean_s": round(statistics.fmean(s), 6) if s else None,
+    }
+
+
+def time_call(fn, repeat: int = 5, warmup: int = 1) -> tuple[dict, object]:
+    """Run fn warmup + repeat times; stats over the timed runs and the last result."""
+    result = None
+    for _ in range(warmup):
+        result = fn()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - t0)
+    return summarize(samples), result
+
+
+def run_load(send, requests: int, concurrency: int) -> dict:
+    """
+    Fire `requests` calls of send() from `concurrency` threads.
+
+    send() returns an HTTP status code. Latency stats are per request;
+    throughput is completed requests per wall-clock second.
+    """
+    def one(_):
+        t0 = time.perf_counter()
+        try:
+            status = send()
+        except Exception:
+            status = 599
+        return time.perf_counter() - t0, status
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - t0
+
+    stats = summarize([lat for lat, _ in results])
+    errors = sum(1 for _, status in results if status >= 400)
+    stats["extra"] = {
+        "concurrency": concurrency,
+        "throughput_rps": round(len(results) / wall, 2) if wall > 0 else None,
+        "errors": errors,
+        "wall_s": round(wall, 4),
+    }
+    return stats
+
+
+def record(service: str, kind: str, name: str, params: dict, stats: dict, **extra) -> dict:
+    key = ",".join(f"{k}={v}" for k, v in params.items())
+    rec = {
+        "id": f"{service}.{kind}.{name}[{key}]",
+        "service": service,
+        "kind": kind,
+        "name": name,
+        "params": params,
+    }
+    stats = dict(stats)
+    merged_extra = {**stats.pop("extra", {}), **extra}
+    rec.update(stats)
+    if merged_extra:
+        rec["extra"] = merged_extra
+    return rec
+
+
+def emit(records: list[dict], out_path: str | None):
+    """Write records as JSON to out_path (used by run.py) or print a table."""
+    if out_path:
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump(records, f, indent=2)
+        return
+    for rec in records:
+        line = f"{rec['id']:<70} median {rec['median_s']:.4f}s  p95 {rec['p95_s']:.4f}s  n={rec['n']}"
+        rps = (rec.get("extra") or {}).get("throughput_rps")
+        if rps is not None:
+            line += f"  {rps} req/s  errors={rec['extra']['errors']}"
+        print(line)
@@ -0,0 +1,77 @@
+# benchmarks/compare.py
+"""
+Compare two run.py result files and flag regressions.
+
+    python benchmarks/compare.py base.json head.json
+    python benchmarks/compare.py base.json head.json --threshold 0.15 --metric p95_s
+
+A result regresses when head is slower than base by more than --threshold
+(relative) AND by more than --min-delta seconds (absolute, so sub-millisecond
+noise does not fail a run). Exits 1 on any regression, so it can gate CI.
+Results present in only one file are listed but never fail the comparison.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def _load(path: Path) -> tuple[dict, dict]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return data.get("environment", {}), {r["id"]: r for r in data.get("results", [])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base", type=Path)
+    parser.add_argument("head", type=Path)
+    parser.add_argument("--metric", default="median_s", choices=["min_s", "median_s", "p95_s", "p99_s", "mean_s"])
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative slowdown that counts (default 10%%)")
+    parser.add_argument("--min-delta", type=float, default=0.002, help="absolute slowdown in seconds that counts")
+    parser.add_argument("--json", action="store_true", help="print the comparison as JSON")
+    args = parser.parse_args()
+
+    base_env, base = _load(args.base)
+    head_env, head = _load(args.head)
+
+    rows, regressions = [], []
+    for rid in sorted(set(base) & set(head)):
+        b, h = base[rid].get(args.metric), head[rid].get(args.metric)
+        if b is None or h is None:
+            continue
+        ratio = h / b if b > 0 else float("inf")
+        regressed = ratio > 1.0 + args.threshold and (h - b) > args.min_delta
+        improved = ratio < 1.0 - args.threshold and (b - h) > args.min_delta
+        row = {"id": rid, "base": b, "head": h, "ratio": round(ratio, 3),
+               "status": "REGRESSION" if regressed else "improved" if improved else "ok"}
+        rows.append(row)
+        if regressed:
+            regressions.append(row)
+
+    only_base = sorted(set(base) - set(head))
+    only_head = sorted(set(head) - set(base))
+
+    if args.json:
+        print(json.dumps({
+            "metric": args.metric, "base_commit": base_env.get("commit"), "head_commit": head_env.get("commit"),
+            "rows": rows, "regressions": len(regressions), "only_base": only_base, "only_head": only_head,
+        }, indent=2))
+    else:
+        print(f"{args.metric}: {(base_env.get('commit') or '?')[:10]} -> {(head_env.get('commit') or '?')[:10]}")
+        if base_env.get("cpu_count") != head_env.get("cpu_count") or base_env.get("platform") != head_env.get("platform"):
+            print("warning: runs come from different machines; timings are not directly comparable")
+        for row in rows:
+            print(f"{row['status']:<10} {row['ratio']:>7.3f}x  {row['base']:>10.4f}s -> {row['head']:>10.4f}s  {row['id']}")
+        for rid in only_base:
+            print(f"{'removed':<10} {rid}")
+        for rid in only_head:
+            print(f"{'new':<10} {rid}")
+        print(f"\n{len(regressions)} regression(s) over {len(rows)} comparable results")
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
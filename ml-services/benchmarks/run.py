@@ -0,0 +1,130 @@
+# benchmarks/run.py
+"""
+Run the benchmark suite for both ML services and write one JSON result file.
+
+Each service runs in its own interpreter (both ship top-level `api` / `utils`
+packages, and TensorFlow state should not leak between them). The output
+records the commit, so runs can be compared across commits:
+
+    python benchmarks/run.py                       # full suite
+    python benchmarks/run.py --quick               # smaller sizes, ~2 min
+    python benchmarks/run.py --services member3 --only macro
+    python benchmarks/compare.py results/base.json results/head.json
+
+Results go to benchmarks/results/<utc timestamp>_<commit>.json unless --out
+is given.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+RESULTS_DIR = BENCH_DIR / "results"
+
+SCHEMA_VERSION = 1
+
+SERVICES = {
+    "member1": BENCH_DIR / "bench_member1.py",
+    "member3": BENCH_DIR / "bench_member3.py",
+}
+
+
+def _git(*args) -> str | None:
+    try:
+        out = subprocess.run(["git", *args], cwd=BENCH_DIR, capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> dict:
+    import numpy
+    import pandas
+
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "branch": _git("rev-parse", "--abbrev-ref", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--services", nargs="+", choices=sorted(SERVICES), default=sorted(SERVICES))
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument("--only", choices=["micro", "macro"], default=None)
+    parser.add_argument("--repeat", type=int, default=None)
+    parser.add_argument("--requests", type=int, default=None)
+    parser.add_argument("--out", type=Path, default=None)
+    args = parser.parse_args()
+
+    passthrough = []
+    if args.quick:
+        passthrough.append("--quick")
+    if args.only:
+        passthrough += ["--only", args.only]
+    if args.repeat is not None:
+        passthrough += ["--repeat", str(args.repeat)]
+    if args.requests is not None:
+        passthrough += ["--requests", str(args.requests)]
+
+    env = environment()
+    started = datetime.now(timezone.utc)
+    records, failures = [], {}
+
+    for name in args.services:
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as tmp:
+            tmp_path = Path(tmp.name)
+        try:
+            print(f"[{name}] running {SERVICES[name].name} ...", flush=True)
+            proc = subprocess.run(
+                [sys.executable, str(SERVICES[name]), "--out", str(tmp_path), *passthrough],
+                capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                failures[name] = proc.stderr[-4000:]
+                print(f"[{name}] FAILED (exit {proc.returncode})", flush=True)
+                continue
+            service_records = json.loads(tmp_path.read_text(encoding="utf-8"))
+            records += service_records
+            print(f"[{name}] {len(service_records)} results", flush=True)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    result = {
+        "schema": SCHEMA_VERSION,
+        "started_at": started.isoformat(timespec="seconds"),
+        "finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "quick": args.quick,
+        "environment": env,
+        "results": records,
+        "failures": failures,
+    }
+
+    out = args.out
+    if out is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        out = RESULTS_DIR / f"{started.strftime('%Y%m%dT%H%M%SZ')}_{(env['commit'] or 'nogit')[:10]}.json"
+    out.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    print(f"Wrote {out}")
+
+    if failures:
+        for name, err in failures.items():
+            print(f"\n--- {name} stderr (tail) ---\n{err}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
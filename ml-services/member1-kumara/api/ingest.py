@@ -0,0 +1,203 @@
+# api/ingest.py
+"""
+Content-addressed store for uploaded reports.
+
+Every upload is hashed (SHA-256) as it is written to disk. The parse result
+and the forecasts produced from it are kept in INGEST_STORE_DIR/<sha256>.json,
+so uploading the same report again skips the parse / prepare_data
+subprocesses and reuses the earlier result instead of ingesting it twice.
+
+Uploads are received with receive_upload: streamed to a temp file in chunks,
+hashed on the way, and rejected as soon as the magic bytes, the CSV header
+or the size limit say the file is not a report we can use - before any
+parse CPU is spent and without ever holding the whole file in memory.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from datetime import date, datetime
+from pathlib import Path
+
+from fastapi import HTTPException, UploadFile
+from fastapi.encoders import jsonable_encoder
+
+from utils.config import (
+    INGEST_STORE_DIR, PROCESSED_DAILY_CSV,
+    MAX_PDF_UPLOAD_BYTES, MAX_REPORT_UPLOAD_BYTES,
+)
+
+CHUNK_SIZE = 1 << 20  # 1 MiB
+
+KIND_PDF = "pdf"
+KIND_REPORT = "report"  # CSV / Excel transaction report for /ml/score-report
+
+# File signatures
+PDF_MAGIC = b"%PDF-"
+XLSX_MAGIC = b"PK\x03\x04"                         # zip container
+XLS_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"  # OLE2 compound file
+
+# Same words _looks_like_header_row looks for in score-report uploads
+CSV_HEADER_KEYWORDS = ("date", "qty", "quantity", "balance", "amount", "item", "site", "fuel")
+
+UPLOAD_LIMITS = {
+    KIND_PDF: MAX_PDF_UPLOAD_BYTES,
+    KIND_REPORT: MAX_REPORT_UPLOAD_BYTES,
+}
+
+
+def too_large_message(limit: int) -> str:
+    return f"File too large (limit {round(limit / (1024 * 1024), 2):g} MB)"
+
+
+def _too_large(limit: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=too_large_message(limit))
+
+
+def _check_first_chunk(kind: str, name: str, head: bytes):
+    """Reject on the first chunk: wrong signature, or a CSV with no report header."""
+    if kind == KIND_PDF:
+        # PDF spec allows the header anywhere in the first 1024 bytes
+        if PDF_MAGIC not in head[:1024]:
+            raise HTTPException(status_code=400, detail="Uploaded file is not a PDF")
+        return
+
+    if name.endswith(".xlsx"):
+        if not head.startswith(XLSX_MAGIC):
+            raise HTTPException(status_code=400, detail="Uploaded .xlsx is not an Excel workbook")
+    elif name.endswith(".xls"):
+        # older exports are often xlsx saved with an .xls name
+        if not (head.startswith(XLS_MAGIC) or head.startswith(XLSX_MAGIC)):
+            raise HTTPException(status_code=400, detail="Uploaded .xls is not an Excel workbook")
+    elif name.endswith(".csv"):
+        if b"\x00" in head:
+            raise HTTPException(status_code=400, detail="Uploaded .csv is not a text file")
+        text = head.decode("utf-8", errors="ignore").lower()
+        if not any(k in text for k in CSV_HEADER_KEYWORDS):
+            raise HTTPException(
+                status_code=400,
+                detail=f"CSV has no report header (expected columns like {', '.join(CSV_HEADER_KEYWORDS[:5])})",
+            )
+    else:
+        raise HTTPException(status_code=400, detail="Upload CSV or Excel (.csv/.xlsx/.xls)")
+
+
+async def receive_upload(file: UploadFile, kind: str, dest_dir: Path | None = None) -> tuple[Path, str, int]:
+    """
+    Stream an upload to a temp file in dest_dir (system temp if None).
+
+    Validates while streaming and raises HTTPException (400 bad format,
+    413 too large) with the temp file removed. The caller owns the returned
+    file and must move or delete it.
+
+    Returns:
+        (temp path, sha256 hex digest, size in bytes)
+    """
+    limit = UPLOAD_LIMITS[kind]
+    name = (file.filename or "").lower()
+
+    # multipart parsing already knows the size; reject without reading it
+    if file.size is not None and file.size > limit:
+        raise _too_large(limit)
+
+    suffix = Path(name).suffix or ".upload"
+    fd, tmp_name = tempfile.mkstemp(dir=dest_dir, suffix=f"{suffix}.part")
+    tmp_path = Path(tmp_name)
+
+    h = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if size == 0:
+                    _check_first_chunk(kind, name, chunk)
+                size += len(chunk)
+                if size > limit:
+                    raise _too_large(limit)
+                h.update(chunk)
+                out.write(chunk)
+
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Uploaded file is empty")
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    return tmp_path, h.hexdigest(), size
+
+
+def forecast_inputs_stamp(predictor) -> str:
+    """
+    Fingerprint of what a forecast depends on besides the upload (processed
+    dataset + the model the API has loaded, and the day: forecasts start the
+    day after date.today()). Stored forecasts are only reused while it matches.
+
+    The model is the predictor's, not CURRENT on disk: a promotion only takes
+    effect in the API after a restart, and until then it still serves the
+    version it loaded.
+    """
+    parts = [date.today().isoformat(), f"version:{predictor.version or 'flat'}"]
+    for path in (PROCESSED_DAILY_CSV, Path(predictor.model_path)):
+        try:
+            st = path.stat()
+            parts.append(f"{path.name}:{st.st_size}:{st.st_mtime_ns}")
+        except FileNotFoundError:
+            parts.append(f"{path.name}:missing")
+    return "|".join(parts)
+
+
+def _entry_path(digest: str) -> Path:
+    return INGEST_STORE_DIR / f"{digest}.json"
+
+
+def load_entry(digest: str) -> dict | None:
+    """Stored entry for an upload hash, or None if it was never ingested."""
+    path = _entry_path(digest)
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        # Half-written / corrupt entry: treat as a miss, it will be rewritten
+        return None
+
+
+def save_entry(digest: str, entry: dict):
+    """Write an entry atomically (temp file + os.replace)."""
+    INGEST_STORE_DIR.mkdir(parents=True, exist_ok=True)
+    path = _entry_path(digest)
+    tmp_path = path.with_suffix(f".tmp{os.getpid()}")
+    tmp_path.write_text(json.dumps(entry), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def new_entry(digest: str, filename: str, pdf_path: Path, parsed: dict) -> dict:
+    return {
+        "sha256": digest,
+        "filename": filename,
+        "pdf_path": str(pdf_path),
+        "ingested_at": datetime.now().isoformat(timespec="seconds"),
+        "parse": parsed,
+        "forecasts": {},
+    }
+
+
+def cached_forecast(entry: dict, mode: str, predictor):
+    """Forecast for mode from an entry, if still valid for the current inputs and predictor."""
+    cached = (entry.get("forecasts") or {}).get(mode)
+    if cached and cached.get("inputs") == forecast_inputs_stamp(predictor):
+        return cached.get("result")
+    return None
+
+
+def record_forecast(digest: str, entry: dict, mode: str, result, predictor):
+    entry.setdefault("forecasts", {})[mode] = {
+        "inputs": forecast_inputs_stamp(predictor),
+        # daily rows carry pd.Timestamp dates; store what the response would send
+        "result": jsonable_encoder(result),
+    }
+    save_entry(digest, entry)
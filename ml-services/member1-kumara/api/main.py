@@ -1,19 +1,43 @@
 # api/main.py
-from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Query
+from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, Response
 from pathlib import Path
-import shutil
+import os
 import subprocess
 import sys
 import json
-import io
 import joblib
 import pandas as pd
 import numpy as np
+import asyncio
 import hashlib
+import logging
+import time
 
-from utils.config import PROCESSED_DAILY_CSV
+from shared.logs import REQUEST_ID, REQUEST_ID_HEADER, new_request_id, setup_logging, subprocess_env
+from utils.config import (
+    PROCESSED_DAILY_CSV, MAX_PDF_UPLOAD_BYTES, MAX_REPORT_UPLOAD_BYTES, TANK_DAILY_CSV, GLOBAL_MODELS_DIR,
+    MODEL_VERSION, GLOBAL_MODEL_VERSION,
+)
 from utils.predictor import FuelDemandPredictor
+from utils.registry import has_model
+from utils.forest import CompactForest
+from utils.artifacts import process_memory
+from utils.metrics import (
+    CONTENT_TYPE, render, stage,
+    CACHE_EVENTS, MODEL_LOADED, REQUEST_SECONDS, ROWS_SCORED, UPLOAD_BYTES, UPLOADS_REJECTED,
+)
+from api.profiling import (
+    RequestProfiler, is_admin, list_profiles, profile_paths, profile_requested, valid_profile_id,
+)
+from api.ingest import (
+    KIND_PDF, KIND_REPORT, receive_upload, too_large_message,
+    load_entry, new_entry, save_entry, cached_forecast, record_forecast,
+)
+
+setup_logging()
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="FuelWatch ML Service")
 
@@ -32,14 +56,131 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# PER-REQUEST PROFILING
+# Innermost middleware, so the trace covers the endpoint (form parsing
+# included) and nothing else. Unflagged requests only pay the header check.
+_profile_lock = asyncio.Lock()
+
+
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    if not profile_requested(request.headers, request.query_params):
+        return await call_next(request)
+    if not is_admin(request.headers):
+        return JSONResponse(status_code=403, content={"detail": "Profiling requires an admin token"})
+    if _profile_lock.locked():
+        return JSONResponse(status_code=409, content={"detail": "Another profiled request is running on this worker"})
+
+    async with _profile_lock:
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{REQUEST_ID.get()}"
+        profiler = RequestProfiler(profile_id, request.method, request.url.path)
+        with profiler:
+            response = await call_next(request)
+        profiler.status = response.status_code
+        summary = await asyncio.to_thread(profiler.save)
+
+    logger.info("profiled %s %s", request.method, request.url.path, extra={"profile_id": profile_id})
+    response.headers["X-Profile-Id"] = profile_id
+    response.headers["X-Profile-Peak-MB"] = str(summary["peak_alloc_mb"])
+    return response
+
+
+# UPLOAD SIZE GUARD
+# Reject oversized bodies from Content-Length before multipart parsing spools
+# them anywhere. receive_upload still enforces the per-file limit for chunked
+# requests that don't send a length.
+UPLOAD_BODY_LIMITS = {
+    "/forecast": MAX_PDF_UPLOAD_BYTES,
+    "/ml/score-report": MAX_REPORT_UPLOAD_BYTES,
+}
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    limit = UPLOAD_BODY_LIMITS.get(request.url.path)
+    length = request.headers.get("content-length")
+    if limit is not None and length and length.isdigit() and int(length) > limit + MULTIPART_OVERHEAD:
+        UPLOADS_REJECTED.inc(endpoint=request.url.path, status=413)
+        return JSONResponse(
+            status_code=413,
+            content={"detail": too_large_message(limit)},
+        )
+    return await call_next(request)
+
+
+# REQUEST LATENCY
+# Added after limit_upload_size, so it wraps it and early 413s are timed too.
+# Unknown paths share one label to keep the series count bounded.
+_ROUTE_PATHS = None
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    global _ROUTE_PATHS
+    if _ROUTE_PATHS is None:
+        _ROUTE_PATHS = {getattr(r, "path", None) for r in app.router.routes}
+    path = request.url.path
+    endpoint = path if path in _ROUTE_PATHS else "other"
+
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        REQUEST_SECONDS.observe(time.perf_counter() - t0, endpoint=endpoint, status=status)
+
+
+# REQUEST ID
+# Outermost middleware: everything logged while handling the request,
+# including the parse / prepare_data subprocesses, carries the same id.
+@app.middleware("http")
+async def assign_request_id(request: Request, call_next):
+    token = REQUEST_ID.set(new_request_id(request.headers.get(REQUEST_ID_HEADER)))
+    t0 = time.perf_counter()
+    try:
+        response = await call_next(request)
+        response.headers[REQUEST_ID_HEADER] = REQUEST_ID.get()
+        logger.info(
+            "%s %s -> %d", request.method, request.url.path, response.status_code,
+            extra={"duration_ms": round((time.perf_counter() - t0) * 1000, 2)},
+        )
+        return response
+    finally:
+        REQUEST_ID.reset(token)
+
+
+async def receive_upload_measured(file: UploadFile, kind: str, endpoint: str, dest_dir: Path | None = None):
+    """receive_upload with upload timing, accepted sizes and rejections recorded."""
+    try:
+        with stage("upload"):
+            tmp_path, digest, size = await receive_upload(file, kind, dest_dir)
+    except HTTPException as e:
+        UPLOADS_REJECTED.inc(endpoint=endpoint, status=e.status_code)
+        raise
+    UPLOAD_BYTES.observe(size, endpoint=endpoint)
+    return tmp_path, digest, size
+
+
 # LOAD FORECAST MODEL
+# active registry version (or the pinned MODEL_VERSION), read once at startup
 try:
-    predictor = FuelDemandPredictor()
-except Exception as e:
-    import traceback
+    predictor = FuelDemandPredictor(version=MODEL_VERSION)
+except Exception:
     predictor = None
-    print("⚠️ Forecast model not loaded:")
-    traceback.print_exc()
+    logger.exception("Forecast model not loaded")
+MODEL_LOADED.set(int(predictor is not None), model="forecast", backend="keras")
+
+# Global multi-tank model (optional): one artifact for every tank
+tank_predictor = None
+if has_model(GLOBAL_MODELS_DIR) or GLOBAL_MODEL_VERSION:
+    try:
+        tank_predictor = FuelDemandPredictor(GLOBAL_MODELS_DIR, version=GLOBAL_MODEL_VERSION)
+    except Exception:
+        logger.exception("Global tank forecast model not loaded")
+MODEL_LOADED.set(int(tank_predictor is not None), model="forecast_global", backend="keras")
 
 
 # LOAD RF MISBEHAVIOR MODEL
@@ -47,27 +188,46 @@ RF_DIR = BASE_DIR / "rf_outputs"
 RF_MODEL_PATH = RF_DIR / "rf_model.pkl"
 RF_SCALER_PATH = RF_DIR / "scaler.pkl"
 RF_FEATURES_PATH = RF_DIR / "model_features.json"
+RF_COMPACT_DIR = RF_DIR / "rf_compact"  # written by scripts.export_rf
 
 rf = None
 scaler = None
 MODEL_FEATURES = []
 RF_LOAD_ERROR = None
+RF_BACKEND = None
 
 
 def load_rf_artifacts():
-    global rf, scaler, MODEL_FEATURES, RF_LOAD_ERROR
+    global rf, scaler, MODEL_FEATURES, RF_LOAD_ERROR, RF_BACKEND
     try:
         if not RF_DIR.exists():
             raise FileNotFoundError(f"rf_outputs folder not found at: {RF_DIR}")
-        if not RF_MODEL_PATH.exists():
-            raise FileNotFoundError(f"Missing RF model: {RF_MODEL_PATH}")
-        if not RF_SCALER_PATH.exists():
-            raise FileNotFoundError(f"Missing scaler: {RF_SCALER_PATH}")
         if not RF_FEATURES_PATH.exists():
             raise FileNotFoundError(f"Missing features: {RF_FEATURES_PATH}")
 
-        rf = joblib.load(RF_MODEL_PATH)
-        scaler = joblib.load(RF_SCALER_PATH)
+        # prefer the compact export: mmapped, no unpickling, batched inference
+        compact = CompactForest(RF_COMPACT_DIR) if (RF_COMPACT_DIR / "meta.json").exists() else None
+        if compact is not None:
+            # a retrained pickle that was never re-exported wins over the export
+            stale = compact.stale_sources(RF_MODEL_PATH, *([RF_SCALER_PATH] if compact.scaler is not None else []))
+            if stale:
+                logger.warning("%s is not an export of the current %s (re-run scripts.export_rf); "
+                               "serving the sklearn pickles", RF_COMPACT_DIR, ", ".join(stale))
+                compact = None
+
+        if compact is None and not RF_MODEL_PATH.exists():
+            raise FileNotFoundError(f"Missing RF model: {RF_MODEL_PATH}")
+        if (compact is None or compact.scaler is None) and not RF_SCALER_PATH.exists():
+            raise FileNotFoundError(f"Missing scaler: {RF_SCALER_PATH}")
+
+        if compact is not None:
+            rf = compact
+            scaler = compact.scaler or joblib.load(RF_SCALER_PATH)
+            RF_BACKEND = "compact"
+        else:
+            rf = joblib.load(RF_MODEL_PATH)
+            scaler = joblib.load(RF_SCALER_PATH)
+            RF_BACKEND = "sklearn"
         with open(RF_FEATURES_PATH, "r", encoding="utf-8") as f:
             MODEL_FEATURES = json.load(f)
 
@@ -77,6 +237,9 @@ def load_rf_artifacts():
         scaler = None
         MODEL_FEATURES = []
         RF_LOAD_ERROR = str(e)
+        RF_BACKEND = None
+        logger.warning("RF model not loaded: %s", e)
+    MODEL_LOADED.set(int(rf is not None), model="rf", backend=RF_BACKEND or "none")
 
 
 load_rf_artifacts()
@@ -92,19 +255,65 @@ def health():
     return {
         "status": "ok",
         "forecast_model_loaded": predictor is not None,
+        "tank_forecast_model_loaded": tank_predictor is not None,
+        "forecast_model_version": predictor.version if predictor is not None else None,
+        "tank_forecast_model_version": tank_predictor.version if tank_predictor is not None else None,
         "base_dir": str(BASE_DIR),
+        "memory": process_memory(),
     }
 
 
+def _require_admin(request: Request):
+    if not is_admin(request.headers):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+@app.get("/admin/profiles")
+def admin_profiles(request: Request):
+    _require_admin(request)
+    return {"profiles": list_profiles()}
+
+
+@app.get("/admin/profiles/{profile_id}")
+def admin_profile(profile_id: str, request: Request):
+    _require_admin(request)
+    if not valid_profile_id(profile_id):
+        raise HTTPException(status_code=400, detail="Invalid profile id")
+    _, json_path = profile_paths(profile_id)
+    if not json_path.exists():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return json.loads(json_path.read_text(encoding="utf-8"))
+
+
+@app.get("/admin/profiles/{profile_id}/download")
+def admin_profile_download(profile_id: str, request: Request):
+    """Raw cProfile stats: `python -m pstats <file>` or snakeviz."""
+    _require_admin(request)
+    if not valid_profile_id(profile_id):
+        raise HTTPException(status_code=400, detail="Invalid profile id")
+    prof_path, _ = profile_paths(profile_id)
+    if not prof_path.exists():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(prof_path, media_type="application/octet-stream", filename=prof_path.name)
+
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus text exposition of this worker's latency / upload / cache metrics."""
+    return Response(render(), media_type=CONTENT_TYPE)
+
+
 @app.get("/ml/health")
 def ml_health():
     return {
         "status": "ok",
         "rf_loaded": rf is not None,
+        "rf_backend": RF_BACKEND,
         "scaler_loaded": scaler is not None,
         "features_loaded": bool(MODEL_FEATURES),
         "rf_dir": str(RF_DIR),
         "rf_model_path": str(RF_MODEL_PATH),
+        "rf_compact_dir": str(RF_COMPACT_DIR),
         "rf_scaler_path": str(RF_SCALER_PATH),
         "rf_features_path": str(RF_FEATURES_PATH),
         "features_count": len(MODEL_FEATURES) if MODEL_FEATURES else 0,
@@ -129,41 +338,61 @@ async def forecast(
         "ingested": False,
         "pdf_saved_as": None,
         "fuel_types_detected": None,
+        "sha256": None,
+        "dedup_hit": False,
         "stdout": None,
         "stderr": None,
     }
 
     fuel_filter = None
+    entry = None
+    digest = None
 
     if file is not None:
         if not file.filename.lower().endswith(".pdf"):
             raise HTTPException(status_code=400, detail="Only PDF files are allowed")
 
-        pdf_path = UPLOAD_DIR / file.filename
-        with open(pdf_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # stream + hash + validate; the final name is only decided once we
+        # know whether this exact report was ingested before
+        tmp_path, digest, _ = await receive_upload_measured(file, KIND_PDF, "/forecast", UPLOAD_DIR)
+        ingest_result["sha256"] = digest
+
+        entry = load_entry(digest)
+        CACHE_EVENTS.inc(cache="ingest", result="miss" if entry is None else "hit")
+        if entry is not None:
+            # duplicate upload: reuse the stored extraction, no parse / prepare_data
+            tmp_path.unlink(missing_ok=True)
+            parsed_json = entry.get("parse") or {}
+            ingest_result["ingested"] = True
+            ingest_result["dedup_hit"] = True
+            ingest_result["pdf_saved_as"] = entry.get("pdf_path")
+        else:
+            pdf_path = UPLOAD_DIR / file.filename
+            os.replace(tmp_path, pdf_path)
 
-        result = subprocess.run(
-            [sys.executable, "-m", "scripts.parse_report_pdf", str(pdf_path)],
-            cwd=str(BASE_DIR),
-            capture_output=True,
-            text=True,
-        )
+            with stage("parse"):
+                result = subprocess.run(
+                    [sys.executable, "-m", "scripts.parse_report_pdf", str(pdf_path)],
+                    cwd=str(BASE_DIR),
+                    capture_output=True,
+                    text=True,
+                    env=subprocess_env(),
+                )
 
-        ingest_result["pdf_saved_as"] = str(pdf_path)
-        ingest_result["stdout"] = result.stdout
-        ingest_result["stderr"] = result.stderr
+            ingest_result["pdf_saved_as"] = str(pdf_path)
+            ingest_result["stdout"] = result.stdout
+            ingest_result["stderr"] = result.stderr
 
-        if result.returncode != 0:
-            return {"ok": False, "message": "PDF ingest failed. Forecast not generated.", "ingest": ingest_result}
+            if result.returncode != 0:
+                return {"ok": False, "message": "PDF ingest failed. Forecast not generated.", "ingest": ingest_result}
 
-        ingest_result["ingested"] = True
+            ingest_result["ingested"] = True
 
-        output_text = (result.stdout or "").strip()
-        try:
-            parsed_json = json.loads(output_text)
-        except Exception:
-            parsed_json = None
+            output_text = (result.stdout or "").strip()
+            try:
+                parsed_json = json.loads(output_text)
+            except Exception:
+                parsed_json = None
 
         if isinstance(parsed_json, dict):
             fuels = parsed_json.get("fuel_types") or parsed_json.get("fuel_cols") or parsed_json.get("items")
@@ -171,30 +400,77 @@ async def forecast(
                 fuel_filter = fuels
                 ingest_result["fuel_types_detected"] = fuels
 
-        prep = subprocess.run(
-            [sys.executable, "-m", "scripts.prepare_data"],
-            cwd=str(BASE_DIR),
-            capture_output=True,
-            text=True,
-        )
-        if prep.returncode != 0:
-            return {
-                "ok": False,
-                "message": "prepare_data failed after ingest. Forecast not generated.",
-                "ingest": ingest_result,
-                "prepare_data_stdout": prep.stdout,
-                "prepare_data_stderr": prep.stderr,
-            }
+        if entry is None:
+            with stage("prepare_data"):
+                prep = subprocess.run(
+                    [sys.executable, "-m", "scripts.prepare_data"],
+                    cwd=str(BASE_DIR),
+                    capture_output=True,
+                    text=True,
+                    env=subprocess_env(),
+                )
+            if prep.returncode != 0:
+                return {
+                    "ok": False,
+                    "message": "prepare_data failed after ingest. Forecast not generated.",
+                    "ingest": ingest_result,
+                    "prepare_data_stdout": prep.stdout,
+                    "prepare_data_stderr": prep.stderr,
+                }
+
+            # only successful ingests are stored, so a failed one is retried next time
+            entry = new_entry(digest, file.filename, pdf_path, parsed_json if isinstance(parsed_json, dict) else {})
+            save_entry(digest, entry)
+        else:
+            forecast_result = cached_forecast(entry, mode, predictor)
+            CACHE_EVENTS.inc(cache="forecast", result="miss" if forecast_result is None else "hit")
+            if forecast_result is not None:
+                return {"ok": True, "message": "Forecast reused from previous upload of this report", "mode": mode, "ingest": ingest_result, "forecast": forecast_result}
 
     if not PROCESSED_DAILY_CSV.exists():
         raise HTTPException(status_code=400, detail="Processed dataset not found. Run prepare_data first.")
 
-    hist = pd.read_csv(PROCESSED_DAILY_CSV)
-    forecast_result = predictor.predict_mode(hist, mode, fuel_filter=fuel_filter)
+    with stage("history_load"):
+        hist = pd.read_csv(PROCESSED_DAILY_CSV)
+    with stage("inference"):
+        forecast_result = predictor.predict_mode(hist, mode, fuel_filter=fuel_filter)
+
+    if entry is not None:
+        record_forecast(digest, entry, mode, forecast_result, predictor)
 
     return {"ok": True, "message": "Forecast generated successfully", "mode": mode, "ingest": ingest_result, "forecast": forecast_result}
 
 
+# PER-TANK FORECAST (global model)
+@app.get("/forecast/tanks")
+def forecast_tanks(
+    mode: str = Query("weekly"),
+    tank: list[str] | None = Query(None, description="repeat for several tanks; omit for all"),
+    fuel: list[str] | None = Query(None),
+):
+    """
+    Forecast tanks from data/processed/fuel_daily_tanks.csv with the
+    global model: all requested tanks in one batched rollout.
+    """
+    if tank_predictor is None:
+        raise HTTPException(status_code=500, detail="Global forecast model not loaded. Run scripts.train_lstm --global first.")
+
+    mode = (mode or "").strip().lower()
+    if mode not in {"weekly", "monthly", "annual"}:
+        raise HTTPException(status_code=400, detail="mode must be weekly, monthly, or annual")
+    if not TANK_DAILY_CSV.exists():
+        raise HTTPException(status_code=400, detail="Per-tank dataset not found. Run prepare_data --by-tank first.")
+
+    with stage("history_load"):
+        hist = pd.read_csv(TANK_DAILY_CSV)
+    with stage("inference"):
+        result = tank_predictor.predict_tanks_mode(hist, mode, tanks=tank, fuel_filter=fuel)
+
+    if not result["tanks"]:
+        raise HTTPException(status_code=404, detail={"message": "No tank could be forecast", "skipped": result["skipped"]})
+    return {"ok": True, "message": "Forecast generated successfully", **result}
+
+
 
 #  MISBEHAVIOR SCORING: upload report -> convert -> score
 def _normalize_cols(df: pd.DataFrame) -> pd.DataFrame:
@@ -231,15 +507,15 @@ def _fix_unnamed_header(df: pd.DataFrame) -> pd.DataFrame:
     return df2.reset_index(drop=True)
 
 
-def load_uploaded_report(file: UploadFile) -> pd.DataFrame:
-    name = (file.filename or "").lower()
-    data = file.file.read()
+def load_uploaded_report(path: Path, filename: str) -> pd.DataFrame:
+    """Read an upload already streamed to disk by receive_upload."""
+    name = (filename or "").lower()
 
     try:
         if name.endswith(".csv"):
-            df = pd.read_csv(io.BytesIO(data))
+            df = pd.read_csv(path)
         elif name.endswith(".xlsx") or name.endswith(".xls"):
-            df = pd.read_excel(io.BytesIO(data))
+            df = pd.read_excel(path)
         else:
             raise HTTPException(status_code=400, detail="Upload CSV or Excel (.csv/.xlsx/.xls)")
     except HTTPException:
@@ -427,6 +703,26 @@ def rule_anomaly_reason(row, gap_tol: float, reset_tol: float, no_sales_drop_tol
     return score, "; ".join(reasons), anomaly_type
 
 
+def score_rules(daily: pd.DataFrame, gap_tol: float, reset_tol: float, no_sales_drop_tol: float):
+    """rule_anomaly_reason for every daily row: (rule_prob array, reasons, anomaly types)."""
+    rule_prob = np.zeros(len(daily), dtype=float)
+    reasons = [""] * len(daily)
+    anomaly_types = ["NORMAL"] * len(daily)
+
+    for i, (_, r) in enumerate(daily.iterrows()):
+        p, txt, a_type = rule_anomaly_reason(
+            r,
+            gap_tol=float(gap_tol),
+            reset_tol=float(reset_tol),
+            no_sales_drop_tol=float(no_sales_drop_tol),
+        )
+        rule_prob[i] = p
+        reasons[i] = txt
+        anomaly_types[i] = a_type
+
+    return rule_prob, reasons, anomaly_types
+
+
 def group_events(rows):
     """
     Group consecutive flagged days into events.
@@ -479,9 +775,16 @@ async def score_report(
     no_sales_drop_tol: float = Query(DEFAULT_NO_SALES_DROP_TOL, ge=0.0),
     file: UploadFile = File(...),
 ):
-    df_raw = load_uploaded_report(file)
-    tx = to_transactions(df_raw)
-    daily = build_daily_features(tx)
+    tmp_path, _, _ = await receive_upload_measured(file, KIND_REPORT, "/ml/score-report")
+    try:
+        with stage("parse"):
+            df_raw = load_uploaded_report(tmp_path, file.filename)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    with stage("feature_build"):
+        tx = to_transactions(df_raw)
+        daily = build_daily_features(tx)
+    ROWS_SCORED.observe(len(daily))
 
     if len(daily) == 0:
         return {
@@ -504,25 +807,14 @@ async def score_report(
         if missing:
             rf_ok = False
         else:
-            X = daily[MODEL_FEATURES].fillna(0.0).values
-            Xs = scaler.transform(X)
-            rf_prob = rf.predict_proba(Xs)[:, 1]
+            with stage("inference"):
+                X = daily[MODEL_FEATURES].fillna(0.0).values
+                Xs = scaler.transform(X)
+                rf_prob = rf.predict_proba(Xs)[:, 1]
 
     # Rule score
-    rule_prob = np.zeros(len(daily), dtype=float)
-    reasons = [""] * len(daily)
-    anomaly_types = ["NORMAL"] * len(daily)
-
-    for i, (_, r) in enumerate(daily.iterrows()):
-        p, txt, a_type = rule_anomaly_reason(
-            r,
-            gap_tol=float(gap_tol),
-            reset_tol=float(reset_tol),
-            no_sales_drop_tol=float(no_sales_drop_tol),
-        )
-        rule_prob[i] = p
-        reasons[i] = txt
-        anomaly_types[i] = a_type
+    with stage("rule_scoring"):
+        rule_prob, reasons, anomaly_types = score_rules(daily, gap_tol, reset_tol, no_sales_drop_tol)
 
     # FINAL probability = max(RF, RULE)
     prob = np.maximum(rf_prob, rule_prob)
@@ -546,42 +838,43 @@ async def score_report(
     scored["severity"] = [sev(p) for p in prob]
     scored = scored.sort_values("day_dt").reset_index(drop=True)
 
-    rows = []
-    for _, r in scored.iterrows():
-        anomaly_id = make_anomaly_id(
-            r["station_id"],
-            r["tank_id"],
-            r["fuel_type"],
-            r["day"],
-            r["anomaly_type"],
-        )
-
-        reason_text = r["reason"]
-        if not reason_text:
-            reason_text = "RF score used" if rf_ok else "No anomaly pattern detected"
-
-        rows.append(
-            {
-                "id": anomaly_id,                       # unique fuel dispense error id
-                "day": r["day"],
-                "stationId": r["station_id"],
-                "tankId": r["tank_id"],
-                "fuelType": r["fuel_type"],
-                "totalQty": float(r["total_qty"]),
-                "balanceDelta": float(r["balance_delta"]),
-                "gap": float(r["qty_vs_balance_gap"]),
-                "qtyChange": float(r["qty_change"]),
-                "prob": float(r["prob_irregular"]),     # frontend uses this
-                "pred": int(r["pred"]),
-                "severity": r["severity"],
-                "reason": reason_text,
-                "anomalyType": r["anomaly_type"],      
-                "rfProb": float(r["rf_prob"]),
-                "ruleProb": float(r["rule_prob"]),
-            }
-        )
-
-    events = group_events(rows)
+    with stage("serialization"):
+        rows = []
+        for _, r in scored.iterrows():
+            anomaly_id = make_anomaly_id(
+                r["station_id"],
+                r["tank_id"],
+                r["fuel_type"],
+                r["day"],
+                r["anomaly_type"],
+            )
+
+            reason_text = r["reason"]
+            if not reason_text:
+                reason_text = "RF score used" if rf_ok else "No anomaly pattern detected"
+
+            rows.append(
+                {
+                    "id": anomaly_id,                       # unique fuel dispense error id
+                    "day": r["day"],
+                    "stationId": r["station_id"],
+                    "tankId": r["tank_id"],
+                    "fuelType": r["fuel_type"],
+                    "totalQty": float(r["total_qty"]),
+                    "balanceDelta": float(r["balance_delta"]),
+                    "gap": float(r["qty_vs_balance_gap"]),
+                    "qtyChange": float(r["qty_change"]),
+                    "prob": float(r["prob_irregular"]),     # frontend uses this
+                    "pred": int(r["pred"]),
+                    "severity": r["severity"],
+                    "reason": reason_text,
+                    "anomalyType": r["anomaly_type"],      
+                    "rfProb": float(r["rf_prob"]),
+                    "ruleProb": float(r["rule_prob"]),
+                }
+            )
+
+        events = group_events(rows)
 
     return {
         "ok": True,
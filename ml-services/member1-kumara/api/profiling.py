@@ -0,0 +1,141 @@
+# api/profiling.py
+"""
+Opt-in profiling of a single request, for admins.
+
+A request is profiled when it carries `X-Profile: 1` (or `?profile=1`) AND
+`X-Admin-Token` matching FUELWATCH_ADMIN_TOKEN. With no token configured
+profiling is off. Requests without the flag only pay one header / query
+lookup in the middleware.
+
+For a profiled request we record:
+    - a cProfile trace (<id>.prof, open with pstats / snakeviz)
+    - peak traced memory and the top allocation sites (tracemalloc runs only
+      while the request is being handled)
+    - a JSON summary (<id>.json) with the top functions by cumulative time
+
+Both endpoints that matter here (/forecast, /ml/score-report) are async, so
+their work runs on the event-loop thread the profiler is attached to. Only
+one request per worker is profiled at a time; concurrent requests on the
+same worker can still show up in the trace and the memory peak.
+"""
+
+import cProfile
+import hmac
+import io
+import json
+import os
+import pstats
+import re
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+from utils.config import PROFILE_DIR, PROFILE_ADMIN_TOKEN
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_QUERY = "profile"
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 15
+
+_PROFILE_ID_RE = re.compile(r"^[A-Za-z0-9_.-]{1,100}$")
+
+
+def profile_requested(headers, query_params) -> bool:
+    flag = headers.get(PROFILE_HEADER) or query_params.get(PROFILE_QUERY)
+    return bool(flag) and flag.lower() not in {"0", "false", "no", "off"}
+
+
+def is_admin(headers) -> bool:
+    token = headers.get(ADMIN_TOKEN_HEADER) or ""
+    return bool(PROFILE_ADMIN_TOKEN) and hmac.compare_digest(token.encode(), PROFILE_ADMIN_TOKEN.encode())
+
+
+def valid_profile_id(profile_id: str) -> bool:
+    return bool(_PROFILE_ID_RE.match(profile_id or ""))
+
+
+def profile_paths(profile_id: str) -> tuple[Path, Path]:
+    return PROFILE_DIR / f"{profile_id}.prof", PROFILE_DIR / f"{profile_id}.json"
+
+
+class RequestProfiler:
+    """cProfile + tracemalloc around one request; save() writes the artifacts."""
+
+    def __init__(self, profile_id: str, method: str, path: str):
+        self.profile_id = profile_id
+        self.method = method
+        self.path = path
+        self.status = None
+        self._profile = cProfile.Profile()
+        self._started_tracemalloc = False
+
+    def __enter__(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self._started_tracemalloc = True
+        tracemalloc.reset_peak()
+        self._mem0 = tracemalloc.get_traced_memory()[0]
+        self._t0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._profile.disable()
+        self.wall_s = time.perf_counter() - self._t0
+        self.cpu_s = time.process_time() - self._cpu0
+        current, peak = tracemalloc.get_traced_memory()
+        self.peak_bytes = peak - self._mem0
+        self.retained_bytes = current - self._mem0
+        snapshot = tracemalloc.take_snapshot()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        self._allocations = [
+            {"site": str(stat.traceback[0]), "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+            for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]
+        ]
+        return False
+
+    def save(self) -> dict:
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        prof_path, json_path = profile_paths(self.profile_id)
+        self._profile.dump_stats(prof_path)
+
+        buf = io.StringIO()
+        pstats.Stats(self._profile, stream=buf).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+
+        summary = {
+            "id": self.profile_id,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "wall_s": round(self.wall_s, 4),
+            "cpu_s": round(self.cpu_s, 4),
+            "peak_alloc_mb": round(self.peak_bytes / (1024 * 1024), 3),
+            "retained_alloc_mb": round(self.retained_bytes / (1024 * 1024), 3),
+            "top_allocations": self._allocations,
+            "top_functions": buf.getvalue(),
+            "download": f"/admin/profiles/{self.profile_id}/download",
+        }
+        tmp = json_path.with_suffix(f".tmp{os.getpid()}")
+        tmp.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+        os.replace(tmp, json_path)
+        return summary
+
+
+def list_profiles(limit: int = 50) -> list[dict]:
+    """Newest first: id, path, status, wall_s, peak_alloc_mb."""
+    if not PROFILE_DIR.exists():
+        return []
+    out = []
+    for p in sorted(PROFILE_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)[:limit]:
+        try:
+            s = json.loads(p.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        out.append({k: s.get(k) for k in ("id", "created_at", "method", "path", "status", "wall_s", "peak_alloc_mb")})
+    return out
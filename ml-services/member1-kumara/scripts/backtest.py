@@ -0,0 +1,167 @@
+# scripts/backtest.py
+"""
+Rolling-origin backtest of the demand forecaster (utils/backtest.py).
+
+    python -m scripts.backtest                                     # every origin, horizons 1 / 7 / 30
+    python -m scripts.backtest --step 7 --workers 4 --out backtest.json
+    python -m scripts.backtest --models-dir models/global --append models/backtest_history.jsonl
+
+Origins run from the first day with a full lookback to the last day with
+max(--horizons) known days after it (every --step days, the latest
+--max-origins). A global model is backtested on every tank of the
+per-tank history (or --tanks) in the same batched rollout.
+
+--workers splits the origins into chunks scored in separate processes, each
+loading the predictor once with --threads TF threads; error sums merge
+exactly, so the report does not depend on the split. The report is small
+(MAE / MAPE per fuel and horizon, plus run metadata); --append adds it as one
+JSON line to a history file so nightly runs can be compared over time.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.config import MODELS_DIR, PROCESSED_DAILY_CSV, TANK_DAILY_CSV
+
+# per worker process
+_predictor = None
+
+
+def _init_worker(models_dir: str, threads: int, version: str | None = None):
+    global _predictor
+    os.environ.setdefault("FUELWATCH_LOG_LEVEL", "WARNING")
+    if threads:
+        # read by utils.tf_runtime when the predictor module is imported
+        os.environ["FUELWATCH_TF_INTRA_THREADS"] = str(threads)
+        os.environ["FUELWATCH_TF_INTER_THREADS"] = "1"
+    from utils.predictor import FuelDemandPredictor
+
+    _predictor = FuelDemandPredictor(Path(models_dir), version=version)
+
+
+def _score_chunk(series: list, horizons: list, method: str) -> dict:
+    from utils.backtest import backtest_errors
+
+    return backtest_errors(_predictor, series, horizons, method)
+
+
+def _chunks(series: list, n: int) -> list:
+    """Split every series' origins into n interleaved chunks (similar origin dates in each)."""
+    chunks = [[] for _ in range(n)]
+    for hist, origins, tank in series:
+        for k in range(n):
+            part = origins[k::n]
+            if len(part):
+                chunks[k].append((hist, part, tank))
+    return [c for c in chunks if c]
+
+
+def load_series(predictor, history: Path, tanks, horizon: int, step: int, max_origins) -> list:
+    from utils.backtest import origin_grid
+
+    hist = pd.read_csv(history)
+    hist["Date"] = pd.to_datetime(hist["Date"])
+    if not predictor.is_global:
+        hist = hist.sort_values("Date").reset_index(drop=True)
+        return [(hist, origin_grid(len(hist), predictor.lookback, horizon, step, max_origins), None)]
+
+    if predictor.tank_col not in hist.columns:
+        raise ValueError(f"History is missing the tank column '{predictor.tank_col}'")
+    hist[predictor.tank_col] = hist[predictor.tank_col].astype(str).str.strip()
+    wanted = [str(s).strip() for s in tanks] if tanks else sorted(hist[predictor.tank_col].unique())
+    series = []
+    for name in wanted:
+        g = hist[hist[predictor.tank_col] == name].sort_values("Date").reset_index(drop=True)
+        origins = origin_grid(len(g), predictor.lookback, horizon, step, max_origins)
+        if len(origins):
+            series.append((g, origins, name))
+    return series
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models-dir", type=Path, default=MODELS_DIR)
+    parser.add_argument("--version", default=None, help="registered version to evaluate (default: the active one)")
+    parser.add_argument("--history", type=Path, default=None,
+                        help="daily history CSV (default: processed pivot, per-tank file for a global model)")
+    parser.add_argument("--tanks", nargs="+", default=None, help="global model: tanks to backtest")
+    parser.add_argument("--horizons", type=int, nargs="+", default=[1, 7, 30])
+    parser.add_argument("--method", choices=["auto", "recursive", "direct"], default="auto")
+    parser.add_argument("--step", type=int, default=1, help="days between origins")
+    parser.add_argument("--max-origins", type=int, default=None, help="per series, the latest ones")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=0, help="TF intra-op threads per worker (0 = TF default)")
+    parser.add_argument("--out", type=Path, default=None, help="write the report as JSON")
+    parser.add_argument("--append", type=Path, default=None, help="append the report as one JSON line")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    _init_worker(str(args.models_dir), args.threads if args.workers == 1 else 0, args.version)
+    from utils.backtest import merge_errors, summarize
+
+    predictor = _predictor
+    history = args.history or (TANK_DAILY_CSV if predictor.is_global else PROCESSED_DAILY_CSV)
+    series = load_series(predictor, history, args.tanks, max(args.horizons), args.step, args.max_origins)
+    if not series:
+        raise SystemExit(f"No origin in {history} has {predictor.lookback} days before it "
+                         f"and {max(args.horizons)} after it.")
+
+    chunks = _chunks(series, max(1, args.workers))
+    if len(chunks) == 1:
+        errors = _score_chunk(chunks[0], args.horizons, args.method)
+    else:
+        ctx = multiprocessing.get_context("spawn")  # TF is not fork-safe
+        with ProcessPoolExecutor(len(chunks), mp_context=ctx, initializer=_init_worker,
+                                 # same version as above even if CURRENT moves meanwhile
+                                 initargs=(str(args.models_dir), args.threads, predictor.version)) as pool:
+            parts = list(pool.map(_score_chunk, chunks, [args.horizons] * len(chunks), [args.method] * len(chunks)))
+        errors = merge_errors(parts)
+
+    origins = np.concatenate([o for _, o, _ in series])
+    dates = pd.to_datetime([hist["Date"].iloc[t - 1] for hist, o, _ in series for t in (o[0], o[-1])])
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "models_dir": str(args.models_dir),
+        "model_version": predictor.version,
+        "model_type": predictor.meta.get("model_type", "single"),
+        "test_mse_scaled": predictor.meta.get("test_mse_scaled"),
+        "history": str(history),
+        "method": args.method,
+        "origins": int(len(origins)),
+        "origin_dates": [str(dates.min().date()), str(dates.max().date())],
+        "tanks": [s for _, _, s in series if s is not None] or None,
+        "workers": len(chunks),
+        "runtime_s": round(time.perf_counter() - t0, 2),
+        "horizons": summarize(errors, predictor.fuel_cols),
+    }
+
+    for h, res in report["horizons"].items():
+        mape = res["all"]["mape"]
+        print(f"h={h:>3} ({res['method']:<9}) MAE {res['all']['mae']:10.2f}  "
+              f"MAPE {mape if mape is not None else float('nan'):7.3f}")
+        for fc, m in res["fuels"].items():
+            fm = m["mape"] if m["mape"] is not None else float("nan")
+            print(f"      {fc:<28} MAE {m['mae']:10.2f}  MAPE {fm:7.3f}")
+    print(f"{report['origins']} origins, {report['workers']} worker(s), {report['runtime_s']:.1f}s")
+
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Wrote {args.out}")
+    if args.append:
+        args.append.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.append, "a", encoding="utf-8") as f:
+            f.write(json.dumps(report) + "\n")
+        print(f"Appended to {args.append}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# scripts/benchmark_parse_pdf.py
+"""
+Benchmark serial vs page-parallel PDF text extraction, and the single-pass
+row scanner against the original per-pattern extractor.
+
+Usage:
+    python -m scripts.benchmark_parse_pdf                 # multi-page PDFs in data/raw
+    python -m scripts.benchmark_parse_pdf a.pdf b.pdf --workers 4 --repeat 3
+
+For every PDF it also checks that both paths produce identical text and
+identical extracted rows (including last-seen-date carry-over). The row
+section compares extract_rows_from_text with _reference_extract_rows on the
+text of every PDF in data/raw plus EDGE_CASE_LINES; any difference is fatal.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+import pdfplumber
+
+from scripts.parse_report_pdf import (
+    RAW_DIR, PARALLEL_MIN_PAGES, DATE_PATTERNS, QTY_PATTERN,
+    extract_pdf_text, extract_rows_from_text, load_known_fuels,
+    normalize_spaces, parse_date_str,
+)
+
+# Lines that exercise the corners of the scanner: invalid ISO falling back to
+# D/M/Y, mixed separators, overlapping fuel names, case, commas, no qty.
+EDGE_CASE_LINES = [
+    "2026-01-22 Lanka Auto Diesel 1,234.50",
+    "2026-13-40 22/01/2026 Lanka Petrol 92 Octane 500",
+    "22-01-2026 petrol 95 12",
+    "22/01-2026 Diesel 40",
+    "12345-01-2026 Super Diesel 7",
+    "LANKA SUPER DIESEL 3,000",
+    "Auto Diesel Lanka Auto Diesel 99",
+    "Diesel",
+    "Kerosene 1,23,456",
+    "   Lanka   Petrol   95   Octane\t  88.8  ",
+    "2026-02-29 Petrol 92 10",
+    "31/04/2026 Petrol 92 10",
+    "2025-12-31x01/01/2026 Diesel 5",
+    "",
+    "Petrol 92 2026-03-01 1.5",
+]
+
+
+def _reference_extract_rows(text: str, known_fuels: list[str]) -> list[dict]:
+    """The original line-by-line extractor, kept verbatim as a parity oracle."""
+    rows = []
+    lines = [normalize_spaces(x) for x in (text or "").splitlines() if normalize_spaces(x)]
+    fuel_regexes = [(fuel, re.compile(re.escape(fuel), re.IGNORECASE)) for fuel in known_fuels]
+
+    date_res = [re.compile(p) for p in DATE_PATTERNS]
+    qty_re = re.compile(QTY_PATTERN)
+
+    last_seen_date = None
+
+    for line in lines:
+        found_date = None
+        for dr in date_res:
+            m = dr.search(line)
+            if m:
+                maybe = parse_date_str(m.group("date"))
+                if maybe:
+                    found_date = maybe
+                    last_seen_date = maybe
+                    break
+
+        matched_fuel = None
+        for fuel, fre in fuel_regexes:
+            if fre.search(line):
+                matched_fuel = fuel
+                break
+
+        if not matched_fuel:
+            continue
+
+        qm = qty_re.search(line)
+        if not qm:
+            continue
+
+        qty_str = qm.group("qty").replace(",", "")
+        try:
+            qty_val = float(qty_str)
+        except Exception:
+            continue
+
+        row_date = found_date if found_date else last_seen_date
+
+        rows.append({
+            "Date": str(row_date) if row_date else None,
+            "Item": matched_fuel,
+            "Qty": qty_val,
+            "Source": "PDF"
+        })
+
+    return rows
+
+
+def _default_pdfs() -> list[Path]:
+    pdfs = []
+    for p in sorted(RAW_DIR.glob("*.pdf")):
+        with pdfplumber.open(str(p)) as pdf:
+            if len(pdf.pages) >= PARALLEL_MIN_PAGES:
+                pdfs.append(p)
+    return pdfs
+
+
+def _best_of(fn, repeat: int) -> tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def _row_scanner_benchmark(known_fuels: list[str], repeat: int) -> dict:
+    """Time old vs new row extraction over all data/raw PDF text; check parity."""
+    texts = [extract_pdf_text(p) for p in sorted(RAW_DIR.glob("*.pdf"))]
+    texts.append("\n".join(EDGE_CASE_LINES))
+    corpus = "\n".join(texts)
+
+    mismatches = [
+        i for i, text in enumerate(texts)
+        if extract_rows_from_text(text, known_fuels) != _reference_extract_rows(text, known_fuels)
+    ]
+    # per-line too, so carry-over can't mask a single-line difference
+    mismatches += [
+        line for line in EDGE_CASE_LINES
+        if extract_rows_from_text(line, known_fuels) != _reference_extract_rows(line, known_fuels)
+    ]
+
+    reference_s, _ = _best_of(lambda: _reference_extract_rows(corpus, known_fuels), repeat)
+    scanner_s, rows = _best_of(lambda: extract_rows_from_text(corpus, known_fuels), repeat)
+
+    return {
+        "documents": len(texts),
+        "lines": corpus.count("\n") + 1,
+        "rows": len(rows),
+        "reference_s": round(reference_s, 4),
+        "scanner_s": round(scanner_s, 4),
+        "speedup": round(reference_s / scanner_s, 2) if scanner_s > 0 else None,
+        "rows_match": not mismatches,
+        "mismatches": [str(m) for m in mismatches],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdfs", nargs="*", type=Path)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    pdfs = args.pdfs or _default_pdfs()
+    known_fuels = load_known_fuels()
+    results = []
+
+    for pdf_path in pdfs:
+        with pdfplumber.open(str(pdf_path)) as pdf:
+            n_pages = len(pdf.pages)
+
+        serial_s, serial_text = _best_of(lambda: extract_pdf_text(pdf_path, workers=1), args.repeat)
+        parallel_s, parallel_text = _best_of(lambda: extract_pdf_text(pdf_path, workers=args.workers), args.repeat)
+
+        rows_match = (
+            extract_rows_from_text(serial_text, known_fuels)
+            == extract_rows_from_text(parallel_text, known_fuels)
+        )
+
+        results.append({
+            "pdf": pdf_path.name,
+            "pages": n_pages,
+            "workers": args.workers,
+            "serial_s": round(serial_s, 4),
+            "parallel_s": round(parallel_s, 4),
+            "speedup": round(serial_s / parallel_s, 2) if parallel_s > 0 else None,
+            "text_match": serial_text == parallel_text,
+            "rows_match": rows_match,
+        })
+
+    rows_result = _row_scanner_benchmark(known_fuels, args.repeat)
+
+    if args.json:
+        print(json.dumps({"pages": results, "rows": rows_result}, indent=2))
+        if not rows_result["rows_match"]:
+            sys.exit(1)
+        return
+
+    print(f"{'pages':>5}  {'serial s':>9}  {'parallel s':>10}  {'speedup':>7}  parity  pdf")
+    for r in results:
+        parity = "ok" if r["text_match"] and r["rows_match"] else "DIFF"
+        print(f"{r['pages']:>5}  {r['serial_s']:>9.3f}  {r['parallel_s']:>10.3f}  "
+              f"{r['speedup']:>7.2f}  {parity:>6}  {r['pdf']}")
+
+    r = rows_result
+    print(f"\nrow scanner: {r['documents']} docs, {r['lines']} lines, {r['rows']} rows")
+    print(f"  reference {r['reference_s']:.4f}s  scanner {r['scanner_s']:.4f}s  "
+          f"speedup {r['speedup']}x  parity {'ok' if r['rows_match'] else 'DIFF'}")
+    if not r["rows_match"]:
+        print(f"  mismatches: {r['mismatches']}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# scripts/benchmark_rf.py
+"""
+Parity check + benchmark: compact forest (utils/forest.py) vs sklearn
+RandomForestClassifier.predict_proba.
+
+Usage:
+    python -m scripts.benchmark_rf                      # rf_outputs/rf_model.pkl
+    python -m scripts.benchmark_rf --rows 200000 --repeat 3 --json
+
+If rf_outputs/rf_model.pkl is not present, a stand-in forest with the
+notebook's hyperparameters (400 trees, depth 8, min_samples_leaf 3,
+balanced classes) is trained on rf_outputs/daily_behavior_dataset.csv, so
+the comparison still runs on realistic tree shapes. The scoring batch is
+that dataset's feature rows tiled to --rows. Exits non-zero on a parity
+failure.
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from utils.forest import CompactForest, export_forest
+
+BASE_DIR = Path(__file__).resolve().parent.parent  # member1-kumara/
+RF_DIR = BASE_DIR / "rf_outputs"
+DATASET = RF_DIR / "daily_behavior_dataset.csv"
+
+PARITY_ATOL = 1e-12
+
+
+def _best_of(fn, repeat: int) -> tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def _load_or_train(features: list[str]):
+    model_path, scaler_path = RF_DIR / "rf_model.pkl", RF_DIR / "scaler.pkl"
+    if model_path.exists() and scaler_path.exists():
+        return joblib.load(model_path), joblib.load(scaler_path), str(model_path)
+
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    df = pd.read_csv(DATASET)
+    X = df[features].fillna(0.0).values
+    y = (df["rule_score"] >= df["rule_score"].quantile(0.75)).astype(int).values
+    scaler = StandardScaler().fit(X)
+    rf = RandomForestClassifier(
+        n_estimators=400, max_depth=8, min_samples_leaf=3,
+        class_weight="balanced", random_state=42, n_jobs=-1,
+    ).fit(scaler.transform(X), y)
+    return rf, scaler, "stand-in (trained on daily_behavior_dataset.csv)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--api-rows", type=int, default=500, help="batch size of a typical /ml/score-report call")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    features = json.loads((RF_DIR / "model_features.json").read_text(encoding="utf-8"))
+    rf, scaler, source = _load_or_train(features)
+
+    base = pd.read_csv(DATASET)[features].fillna(0.0).values
+    X = np.resize(base, (args.rows, base.shape[1]))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pkl_path = Path(tmp) / "rf.pkl"
+        joblib.dump(rf, pkl_path)
+        export_dir = export_forest(rf, Path(tmp) / "rf_compact", scaler=scaler, feature_names=features)
+
+        load_pickle_s, _ = _best_of(lambda: joblib.load(pkl_path), args.repeat)
+        load_compact_s, forest = _best_of(lambda: CompactForest(export_dir), args.repeat)
+
+        sk_s, sk_prob = _best_of(lambda: rf.predict_proba(scaler.transform(X)), args.repeat)
+        cf_s, cf_prob = _best_of(lambda: forest.predict_proba(forest.scaler.transform(X)), args.repeat)
+
+        X_api = X[:args.api_rows]
+        sk_api_s, _ = _best_of(lambda: rf.predict_proba(scaler.transform(X_api)), args.repeat)
+        cf_api_s, _ = _best_of(lambda: forest.predict_proba(forest.scaler.transform(X_api)), args.repeat)
+
+        export_bytes = sum(p.stat().st_size for p in export_dir.iterdir())
+        result = {
+            "model": source,
+            "trees": forest.n_trees,
+            "nodes": int(forest.meta["n_nodes"]),
+            "rows": args.rows,
+            "pickle_bytes": pkl_path.stat().st_size,
+            "compact_bytes": export_bytes,
+            "load_pickle_s": round(load_pickle_s, 4),
+            "load_compact_s": round(load_compact_s, 4),
+            "sklearn_s": round(sk_s, 4),
+            "compact_s": round(cf_s, 4),
+            "speedup": round(sk_s / cf_s, 2) if cf_s > 0 else None,
+            "api_rows": len(X_api),
+            "sklearn_api_s": round(sk_api_s, 5),
+            "compact_api_s": round(cf_api_s, 5),
+            "api_speedup": round(sk_api_s / cf_api_s, 2) if cf_api_s > 0 else None,
+            "max_abs_diff": float(np.max(np.abs(sk_prob - cf_prob))),
+        }
+    result["parity_ok"] = result["max_abs_diff"] <= PARITY_ATOL
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"model: {result['model']}  ({result['trees']} trees, {result['nodes']} nodes)")
+        print(f"size:    pickle {result['pickle_bytes'] / 1e6:.2f} MB   compact {result['compact_bytes'] / 1e6:.2f} MB")
+        print(f"load:    pickle {result['load_pickle_s']:.4f}s   compact (mmap) {result['load_compact_s']:.4f}s")
+        print(f"predict: sklearn {result['sklearn_s']:.4f}s   compact {result['compact_s']:.4f}s   "
+              f"speedup {result['speedup']}x on {result['rows']} rows")
+        print(f"         sklearn {result['sklearn_api_s']:.5f}s   compact {result['compact_api_s']:.5f}s   "
+              f"speedup {result['api_speedup']}x on {result['api_rows']} rows")
+        print(f"parity:  max |diff| = {result['max_abs_diff']:.3g}  {'ok' if result['parity_ok'] else 'DIFF'}")
+
+    if not result["parity_ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# scripts/compare_horizons.py
+"""
+Accuracy and latency of direct multi-horizon heads vs the recursive rollout.
+
+    python -m scripts.compare_horizons
+    python -m scripts.compare_horizons --origins 12 --out horizon_report.json
+    python -m scripts.compare_horizons --models-dir models/global --tank "Petrol Tank 01"
+
+For every mode with a direct head (models/direct/h<H>, train_lstm --horizon H)
+both paths forecast from several origins in the held-out end of the history,
+where the next H days are known. Errors are measured in the unit the mode
+reports: daily values for weekly / monthly, block totals for annual. Latency
+is predict_mode() wall time per path (median of --repeat calls).
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.config import MODELS_DIR, PROCESSED_DAILY_CSV, TANK_DAILY_CSV, MODE_DAYS
+from utils.predictor import FuelDemandPredictor
+
+
+def _errors(pred: np.ndarray, actual: np.ndarray) -> dict:
+    err = pred - actual
+    denom = float(np.abs(actual).sum())
+    return {
+        "mae": float(np.abs(err).mean()),
+        "rmse": float(np.sqrt((err ** 2).mean())),
+        "wape": float(np.abs(err).sum() / denom) if denom > 0 else None,
+        "bias": float(err.mean()),
+    }
+
+
+def _blocks(values: np.ndarray, blocks) -> np.ndarray:
+    return np.add.reduceat(values, np.concatenate([[0], np.cumsum(blocks)[:-1]]), axis=0)
+
+
+def _origins(n_rows: int, lookback: int, horizon: int, count: int, start_frac: float) -> list[int]:
+    """Forecast origins t (history rows[:t], actual rows[t:t + horizon]), spread over the held-out end."""
+    hi = n_rows - horizon
+    lo = max(lookback, int(n_rows * start_frac))
+    if hi < lo:
+        lo = lookback
+    if hi < lo:
+        return []
+    return sorted(set(np.linspace(lo, hi, num=count).astype(int).tolist()))
+
+
+def _median_call(fn, repeat: int) -> float:
+    fn()  # warm-up (tracing)
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return float(np.median(samples))
+
+
+def compare_mode(predictor: FuelDemandPredictor, hist: pd.DataFrame, mode: str, args, tank=None) -> dict:
+    horizon = MODE_DAYS[mode]
+    head = predictor.direct_heads.get(horizon)
+    if head is None:
+        return {"mode": mode, "skipped": f"no direct head (train_lstm --horizon {horizon})"}
+
+    origins = _origins(len(hist), predictor.lookback, horizon, args.origins, args.start_frac)
+    if not origins:
+        return {"mode": mode, "skipped": f"history of {len(hist)} days is too short for a {horizon}-day check"}
+
+    fuels = predictor.fuel_cols
+    preds = {"recursive": [], "direct": []}
+    actual = []
+    for t in origins:
+        past = hist.iloc[:t]
+        truth = hist.iloc[t:t + horizon][fuels].to_numpy(dtype=np.float64)
+        for method in preds:
+            fc = predictor.forecast_days(past, horizon, tank=tank, method=method)[fuels].to_numpy()
+            preds[method].append(_blocks(fc, head.target_blocks) if head.target_blocks else fc)
+        actual.append(_blocks(truth, head.target_blocks) if head.target_blocks else truth)
+
+    actual = np.stack(actual)
+    report = {
+        "mode": mode,
+        "horizon": horizon,
+        "unit": "block totals" if head.target_blocks else "daily",
+        "origins": [str(pd.to_datetime(hist["Date"].iloc[t]).date()) for t in origins],
+        "accuracy": {m: _errors(np.stack(p), actual) for m, p in preds.items()},
+        "latency_s": {
+            m: _median_call(lambda m=m: predictor.forecast_days(hist, horizon, tank=tank, method=m), args.repeat)
+            for m in preds
+        },
+    }
+    report["speedup"] = report["latency_s"]["recursive"] / max(report["latency_s"]["direct"], 1e-9)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models-dir", type=Path, default=MODELS_DIR)
+    parser.add_argument("--version", default=None, help="registered version to evaluate (default: the active one)")
+    parser.add_argument("--history", type=Path, default=None,
+                        help="daily history CSV (default: processed pivot, or the per-tank file with --tank)")
+    parser.add_argument("--tank", default=None, help="tank to evaluate (global models)")
+    parser.add_argument("--modes", nargs="+", choices=sorted(MODE_DAYS), default=["weekly", "monthly", "annual"])
+    parser.add_argument("--origins", type=int, default=8, help="forecast origins per mode")
+    parser.add_argument("--start-frac", type=float, default=0.7,
+                        help="origins are taken after this share of the history (the held-out part)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", type=Path, default=None)
+    args = parser.parse_args()
+
+    predictor = FuelDemandPredictor(args.models_dir, version=args.version)
+    history = args.history or (TANK_DAILY_CSV if args.tank else PROCESSED_DAILY_CSV)
+    hist = pd.read_csv(history)
+    if args.tank:
+        hist = hist[hist[predictor.tank_col].astype(str).str.strip() == args.tank]
+    hist["Date"] = pd.to_datetime(hist["Date"])
+    hist = hist.sort_values("Date").reset_index(drop=True)
+
+    reports = [compare_mode(predictor, hist, mode, args, tank=args.tank) for mode in args.modes]
+
+    for r in reports:
+        if "skipped" in r:
+            print(f"{r['mode']:<8} skipped: {r['skipped']}")
+            continue
+        for method in ("recursive", "direct"):
+            acc = r["accuracy"][method]
+            wape = f"{acc['wape']:.3f}" if acc["wape"] is not None else "n/a"
+            print(f"{r['mode']:<8} {method:<10} MAE {acc['mae']:10.2f}  RMSE {acc['rmse']:10.2f}  "
+                  f"WAPE {wape:>6}  {r['latency_s'][method] * 1e3:8.1f} ms")
+        print(f"{r['mode']:<8} direct is {r['speedup']:.1f}x faster over {len(r['origins'])} origins ({r['unit']})")
+
+    if args.out:
+        args.out.write_text(json.dumps({"models_dir": str(args.models_dir), "model_version": predictor.version,
+                                        "history": str(history), "tank": args.tank, "modes": reports},
+                                       indent=2), encoding="utf-8")
+        print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
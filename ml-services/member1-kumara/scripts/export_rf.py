@@ -0,0 +1,49 @@
+# scripts/export_rf.py
+"""
+Export the misbehavior RandomForest (rf_outputs/rf_model.pkl + scaler.pkl)
+to the compact .npy format used by the API (utils/forest.py).
+
+Usage:
+    python -m scripts.export_rf
+    python -m scripts.export_rf --model rf_outputs/rf_model.pkl --out rf_outputs/rf_compact
+
+Re-run after retraining the forest; the API prefers rf_outputs/rf_compact/
+when it exists and falls back to the pickles otherwise, or when the pickles'
+sha256 no longer matches the one recorded at export. The new export is
+built next to the old one and swapped in by rename (utils.artifacts.save_bundle),
+so running API workers keep their mapped copy until they restart.
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import joblib
+
+from utils.forest import export_forest
+
+BASE_DIR = Path(__file__).resolve().parent.parent  # member1-kumara/
+RF_DIR = BASE_DIR / "rf_outputs"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", type=Path, default=RF_DIR / "rf_model.pkl")
+    parser.add_argument("--scaler", type=Path, default=RF_DIR / "scaler.pkl")
+    parser.add_argument("--features", type=Path, default=RF_DIR / "model_features.json")
+    parser.add_argument("--out", type=Path, default=RF_DIR / "rf_compact")
+    args = parser.parse_args()
+
+    rf = joblib.load(args.model)
+    scaler = joblib.load(args.scaler) if args.scaler.exists() else None
+    features = json.loads(args.features.read_text(encoding="utf-8")) if args.features.exists() else None
+
+    sources = [args.model] + ([args.scaler] if scaler is not None else [])
+    out = export_forest(rf, args.out, scaler=scaler, feature_names=features, source_paths=sources)
+    meta = json.loads((out / "meta.json").read_text(encoding="utf-8"))
+    print(f"Exported {meta['n_trees']} trees / {meta['n_nodes']} nodes "
+          f"(max depth {meta['max_depth']}, scaler={'yes' if scaler is not None else 'no'}) -> {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# scripts/model_registry.py
+"""
+Inspect and switch the registered versions of the demand LSTM (utils/registry.py).
+
+    python -m scripts.model_registry list
+    python -m scripts.model_registry verify                    # the active version
+    python -m scripts.model_registry promote 20260301-020000
+    python -m scripts.model_registry rollback
+    python -m scripts.model_registry adopt --promote           # register flat models/ artifacts
+    python -m scripts.model_registry --models-dir models/global list
+
+promote / rollback swap CURRENT atomically; API workers pick the new
+version up on their next start (or pin one with FUELWATCH_MODEL_VERSION /
+FUELWATCH_GLOBAL_MODEL_VERSION). adopt turns a pre-registry models dir
+(artifacts directly in it) into its first version.
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+from utils.config import MODELS_DIR
+from utils.registry import (
+    commit_version, current_version, discard_staging, list_versions, promote, rollback, stage_version, verify_version,
+)
+
+
+def _fmt(v, spec=".5f"):
+    return format(v, spec) if isinstance(v, (int, float)) else "-"
+
+
+def cmd_list(root: Path, args):
+    active = current_version(root)
+    rows = list_versions(root)
+    if not rows:
+        print(f"No registered versions in {root}")
+        return
+    print(f"{'':2}{'version':<20}{'source':<24}{'parent':<20}{'test mse':>10}{'7d ms':>9}{'30d ms':>9}")
+    for m in rows:
+        metrics, latency = m.get("metrics", {}), m.get("metrics", {}).get("latency_ms", {})
+        mark = "* " if m["version"] == active else "  "
+        print(f"{mark}{m['version']:<20}{m.get('source') or '-':<24}{m.get('parent') or '-':<20}"
+              f"{_fmt(metrics.get('test_mse_scaled')):>10}{_fmt(latency.get('forecast_7d_ms'), '.2f'):>9}"
+              f"{_fmt(latency.get('forecast_30d_ms'), '.2f'):>9}")
+    if args.json:
+        print(json.dumps(rows, indent=2))
+
+
+def cmd_verify(root: Path, args):
+    version = args.version or current_version(root)
+    if version is None:
+        raise SystemExit(f"{root} has no active version")
+    problems = verify_version(root, version)
+    if problems:
+        print(f"{version}: FAILED")
+        for p in problems:
+            print(f"  {p}")
+        raise SystemExit(1)
+    print(f"{version}: ok")
+
+
+def cmd_promote(root: Path, args):
+    try:
+        previous = promote(root, args.version)
+    except (FileNotFoundError, ValueError) as e:
+        raise SystemExit(str(e))
+    print(f"Active model: {args.version} (was {previous or 'flat layout'})")
+
+
+def cmd_rollback(root: Path, args):
+    try:
+        target = rollback(root)
+    except (FileNotFoundError, ValueError) as e:
+        raise SystemExit(str(e))
+    if target is None:
+        raise SystemExit(f"No earlier promotion recorded in {root}")
+    print(f"Rolled back to {target}")
+
+
+def cmd_adopt(root: Path, args):
+    meta_path = root / "model_meta.json"
+    if not meta_path.exists():
+        raise SystemExit(f"No flat artifacts to adopt in {root}")
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    staging = stage_version(root, root)
+    try:
+        version, version_dir = commit_version(
+            root, staging, source="adopted",
+            metrics={"test_mse_scaled": meta.get("test_mse_scaled"), "final_val_loss": meta.get("final_val_loss")},
+        )
+    except BaseException:
+        discard_staging(staging)
+        raise
+    print(f"Registered {root} as version {version}: {version_dir}")
+    if args.promote:
+        promote(root, version)
+        print(f"Active model: {version}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models-dir", type=Path, default=MODELS_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("list", help="registered versions, * marks the active one")
+    p.add_argument("--json", action="store_true", help="also print the full manifests")
+    p.set_defaults(fn=cmd_list)
+    p = sub.add_parser("verify", help="check a version's files against its manifest checksums")
+    p.add_argument("version", nargs="?", default=None)
+    p.set_defaults(fn=cmd_verify)
+    p = sub.add_parser("promote", help="make a version the active one")
+    p.add_argument("version")
+    p.set_defaults(fn=cmd_promote)
+    p = sub.add_parser("rollback", help="re-activate the version that was active before the current one")
+    p.set_defaults(fn=cmd_rollback)
+    p = sub.add_parser("adopt", help="register the flat artifacts in --models-dir as a version")
+    p.add_argument("--promote", action="store_true")
+    p.set_defaults(fn=cmd_adopt)
+
+    args = parser.parse_args(argv)
+    args.fn(args.models_dir, args)
+
+
+if __name__ == "__main__":
+    main()
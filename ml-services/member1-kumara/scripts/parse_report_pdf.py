@@ -14,7 +14,7 @@ Outputs (stdout):
       "rows_extracted": 25,
       "positive_qty_rows": 25,
       "dated_rows": 25,
-      "saved_csv": "...\data\raw\pdf_extracted_20260122_104500.csv",
+      "saved_csv": "...\data\raw\pdf_extracted_3f2a9c0d1b7e4a56.csv",
       "reasons": []
     }
 
@@ -22,16 +22,33 @@ If the PDF is irrelevant / invalid for forecasting:
     - ok=false
     - reasons filled
     - exits with code 2
+
+Environment:
+    PDF_PARSE_WORKERS   processes for page-parallel text extraction of long
+                        PDFs (default: min(4, CPUs); 1 disables the pool).
+                        The API runs one parse per upload in each uvicorn
+                        worker, so keep workers x PDF_PARSE_WORKERS near the
+                        core count.
 """
 
+import hashlib
+import logging
+import os
 import sys
 import json
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from datetime import datetime
+from datetime import date, datetime
 import pandas as pd
 import pdfplumber
 
+from shared.logs import setup_logging
+from utils.config import MODELS_DIR, MODEL_VERSION
+from utils.registry import active_meta_path
+
+logger = logging.getLogger(__name__)
+
 # -----------------------------
 # Project paths
 # -----------------------------
@@ -39,25 +56,34 @@ BASE_DIR = Path(__file__).resolve().parent.parent  # member1-kumara/
 RAW_DIR = BASE_DIR / "data" / "raw"
 RAW_DIR.mkdir(parents=True, exist_ok=True)
 
-MODEL_META_PATH = BASE_DIR / "models" / "model_meta.json"
-
 # -----------------------------
 # Validation thresholds
 # -----------------------------
 MIN_ROWS = 5                 # must extract at least this many rows
 MIN_POSITIVE_ROWS = 3        # must have at least this many rows where Qty > 0
 
+# -----------------------------
+# Page-parallel text extraction
+# -----------------------------
+# Worker processes for layout analysis. Bounded by default: every API worker
+# may be running a parse at the same time.
+DEFAULT_PARSE_WORKERS = min(4, os.cpu_count() or 1)
+PARSE_WORKERS = int(os.environ.get("PDF_PARSE_WORKERS", "0")) or DEFAULT_PARSE_WORKERS
+# Below this many pages the process pool costs more than it saves
+PARALLEL_MIN_PAGES = 8
+
 # -----------------------------
 # Fuel name normalization
 # -----------------------------
 def load_known_fuels():
     """
-    Try to load fuel names used in training (model_meta.json).
-    If not found, use a default list.
+    Try to load fuel names used in training (model_meta.json of the active
+    model version). If not found, use a default list.
     """
-    if MODEL_META_PATH.exists():
+    meta_path = active_meta_path(MODELS_DIR, MODEL_VERSION)
+    if meta_path.exists():
         try:
-            meta = json.loads(MODEL_META_PATH.read_text(encoding="utf-8"))
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
             fuels = meta.get("fuel_cols") or meta.get("fuel_types") or []
             fuels = [str(x).strip() for x in fuels if str(x).strip()]
             if fuels:
@@ -81,33 +107,101 @@ def load_known_fuels():
 
 
 def normalize_spaces(s: str) -> str:
-    return re.sub(r"\s+", " ", s).strip()
+    return " ".join(s.split())
 
 
 def match_fuel_names(text: str, known_fuels: list[str]) -> set[str]:
     """
     Detect fuel types in PDF by matching known names (case-insensitive).
+    The document is lower-cased once, not once per fuel.
     """
     t = (text or "").lower()
-    detected = set()
-    for fuel in known_fuels:
-        f = fuel.lower()
-        if f and f in t:
-            detected.add(fuel)
-    return detected
+    return {fuel for fuel in known_fuels if fuel and fuel.lower() in t}
+
+
+class FuelScanner:
+    """
+    One compiled automaton for all known fuel names.
+
+    The alternation is ordered by known_fuels priority and wrapped in a
+    lookahead, so a single finditer pass reports the highest-priority fuel
+    starting at every position. The overall winner is the lowest priority
+    index seen - i.e. the same fuel the old per-fuel loop returned (first
+    fuel in list order found anywhere in the line).
+    """
+
+    def __init__(self, known_fuels: list[str]):
+        # An empty name matched every line but was falsy, so the old loop
+        # skipped the line; names after it could never win.
+        self.fuels = []
+        for fuel in known_fuels:
+            if not fuel:
+                break
+            self.fuels.append(fuel)
+        self.priority = {}
+        for i, fuel in enumerate(self.fuels):
+            self.priority.setdefault(fuel.lower(), i)
+
+        alternation = "|".join(re.escape(f) for f in self.fuels)
+        self.regex = re.compile(f"(?=({alternation}))", re.IGNORECASE) if self.fuels else None
+
+    def match(self, line: str) -> str | None:
+        if self.regex is None:
+            return None
+        best = None
+        for m in self.regex.finditer(line):
+            idx = self.priority[m.group(1).lower()]
+            if best is None or idx < best:
+                best = idx
+                if best == 0:
+                    break
+        return None if best is None else self.fuels[best]
 
 
 # -----------------------------
 # Extract text from PDF
 # -----------------------------
-def extract_pdf_text(pdf_path: Path) -> str:
-    parts = []
+def _extract_page_range(job: tuple[str, int, int]) -> list[str]:
+    """Worker: text of pages [start, stop) (0-based), one string per page."""
+    pdf_path, start, stop = job
+    with pdfplumber.open(pdf_path, pages=list(range(start + 1, stop + 1))) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages]
+
+
+def _page_ranges(n_pages: int, n_workers: int) -> list[tuple[int, int]]:
+    """Split pages into contiguous ranges, a couple per worker for balance."""
+    n_chunks = min(n_pages, n_workers * 2)
+    bounds = [round(i * n_pages / n_chunks) for i in range(n_chunks + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(n_chunks)]
+
+
+def extract_pdf_pages(pdf_path: Path, workers: int | None = None) -> list[str]:
+    """
+    Text of every page, in page order.
+
+    Long documents are split into page ranges extracted in a process pool;
+    results are merged back in order, so callers see the same sequence of
+    pages as a serial walk.
+    """
     with pdfplumber.open(str(pdf_path)) as pdf:
-        for page in pdf.pages:
-            txt = page.extract_text() or ""
-            if txt:
-                parts.append(txt)
-    return "\n".join(parts)
+        n_pages = len(pdf.pages)
+        n_workers = min(workers or PARSE_WORKERS, n_pages)
+
+        if n_workers <= 1 or n_pages < PARALLEL_MIN_PAGES:
+            return [page.extract_text() or "" for page in pdf.pages]
+
+    jobs = [(str(pdf_path), start, stop) for start, stop in _page_ranges(n_pages, n_workers)]
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        chunks = pool.map(_extract_page_range, jobs)
+        return [txt for chunk in chunks for txt in chunk]
+
+
+def extract_pdf_text(pdf_path: Path, workers: int | None = None) -> str:
+    """
+    Whole-document text. Pages are joined in order, so last_seen_date in
+    extract_rows_from_text carries over page boundaries as before.
+    """
+    return "\n".join(txt for txt in extract_pdf_pages(pdf_path, workers) if txt)
 
 
 # -----------------------------
@@ -121,6 +215,14 @@ DATE_PATTERNS = [
 # Quantity like: 1234, 1234.56, 1,234.56
 QTY_PATTERN = r"(?P<qty>\d{1,3}(?:,\d{3})*(?:\.\d+)?|\d+(?:\.\d+)?)"
 
+# Both date layouts in one scan. The lookahead reports overlapping
+# candidates so the first ISO and first D/M/Y match are found exactly as two
+# separate searches would find them.
+DATE_SCAN_RE = re.compile(
+    r"(?=(?P<iso>\d{4}-\d{2}-\d{2})|(?P<dmy>\d{2}[/-]\d{2}[/-]\d{4}))"
+)
+QTY_RE = re.compile(QTY_PATTERN)
+
 
 def parse_date_str(s: str):
     s = (s or "").strip()
@@ -132,56 +234,89 @@ def parse_date_str(s: str):
     return None
 
 
+def _iso_to_date(s: str):
+    """'YYYY-MM-DD' -> date via integer slicing (None if out of range)."""
+    try:
+        return date(int(s[0:4]), int(s[5:7]), int(s[8:10]))
+    except ValueError:
+        return None
+
+
+def _dmy_to_date(s: str):
+    """'DD/MM/YYYY' or 'DD-MM-YYYY' -> date (None on mixed separators / out of range)."""
+    if s[2] != s[5]:
+        return None
+    try:
+        return date(int(s[6:10]), int(s[3:5]), int(s[0:2]))
+    except ValueError:
+        return None
+
+
+def find_line_date(line: str):
+    """
+    Date on a line, or None. ISO dates take priority over D/M/Y: the first
+    ISO candidate is used if valid, otherwise the first D/M/Y candidate.
+    """
+    # every date layout needs a separator; most lines have none
+    if "-" not in line and "/" not in line:
+        return None
+
+    first_dmy = None
+    iso_checked = False
+    for m in DATE_SCAN_RE.finditer(line):
+        iso = m.group("iso")
+        if iso is not None:
+            if iso_checked:
+                continue
+            iso_checked = True
+            parsed = _iso_to_date(iso)
+            if parsed is not None:
+                return parsed
+        elif first_dmy is None:
+            first_dmy = m.group("dmy")
+        if iso_checked and first_dmy is not None:
+            break
+    return _dmy_to_date(first_dmy) if first_dmy is not None else None
+
+
 def extract_rows_from_text(text: str, known_fuels: list[str]) -> list[dict]:
     """
     Best-effort: find lines containing a fuel name and a quantity.
     Optionally also a date on the line.
 
+    Single pass per line: one date scan, one fuel automaton (FuelScanner),
+    one quantity search.
+
     Important:
     - Uses last_seen_date to attach dates to subsequent lines.
     - Skips rows with qty <= 0? (NO: we keep them but validation checks positives)
     """
     rows = []
-    lines = [normalize_spaces(x) for x in (text or "").splitlines() if normalize_spaces(x)]
-    fuel_regexes = [(fuel, re.compile(re.escape(fuel), re.IGNORECASE)) for fuel in known_fuels]
-
-    date_res = [re.compile(p) for p in DATE_PATTERNS]
-    qty_re = re.compile(QTY_PATTERN)
+    scanner = FuelScanner(known_fuels)
 
     last_seen_date = None
 
-    for line in lines:
+    for raw in (text or "").splitlines():
+        line = normalize_spaces(raw)
+        if not line:
+            continue
+
         # update last_seen_date if line contains a date
-        found_date = None
-        for dr in date_res:
-            m = dr.search(line)
-            if m:
-                maybe = parse_date_str(m.group("date"))
-                if maybe:
-                    found_date = maybe
-                    last_seen_date = maybe
-                    break
+        found_date = find_line_date(line)
+        if found_date:
+            last_seen_date = found_date
 
         # detect which fuel this line refers to
-        matched_fuel = None
-        for fuel, fre in fuel_regexes:
-            if fre.search(line):
-                matched_fuel = fuel
-                break
-
+        matched_fuel = scanner.match(line)
         if not matched_fuel:
             continue
 
         # find a quantity in the line
-        qm = qty_re.search(line)
+        qm = QTY_RE.search(line)
         if not qm:
             continue
 
-        qty_str = qm.group("qty").replace(",", "")
-        try:
-            qty_val = float(qty_str)
-        except Exception:
-            continue
+        qty_val = float(qm.group("qty").replace(",", ""))
 
         # decide date for this row
         row_date = found_date if found_date else last_seen_date
@@ -199,12 +334,24 @@ def extract_rows_from_text(text: str, known_fuels: list[str]) -> list[dict]:
 # -----------------------------
 # Save extracted rows to CSV
 # -----------------------------
-def save_rows_csv(rows: list[dict]) -> Path | None:
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def save_rows_csv(rows: list[dict], digest: str | None = None) -> Path | None:
+    """
+    Named after the source PDF's content hash when given, so re-parsing the
+    same report overwrites its CSV instead of adding a second copy.
+    """
     if not rows:
         return None
 
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    out_path = RAW_DIR / f"pdf_extracted_{ts}.csv"
+    tag = digest[:16] if digest else datetime.now().strftime("%Y%m%d_%H%M%S")
+    out_path = RAW_DIR / f"pdf_extracted_{tag}.csv"
     pd.DataFrame(rows).to_csv(out_path, index=False)
     return out_path
 
@@ -259,6 +406,9 @@ def validate_extraction(detected_fuels: list[str], rows: list[dict]) -> tuple[bo
 # Main
 # -----------------------------
 def main():
+    # logs go to stderr; stdout is the JSON result the API parses.
+    # Run from /forecast, records carry the request id of the upload.
+    setup_logging()
     if len(sys.argv) < 2:
         print(json.dumps({
             "ok": False,
@@ -289,7 +439,7 @@ def main():
         saved_csv = None
         if ok:
             # save only if valid (prevents poisoning your raw data with rubbish)
-            saved_csv = save_rows_csv(rows)
+            saved_csv = save_rows_csv(rows, file_sha256(pdf_path))
 
         payload = {
             "ok": ok,
@@ -302,6 +452,10 @@ def main():
             "reasons": reasons,
         }
 
+        logger.info(
+            "parsed %s: %d rows, fuels=%s, ok=%s",
+            pdf_path.name, stats["rows_extracted"], detected_fuels, ok,
+        )
         print(json.dumps(payload))
 
         # Exit code:
@@ -310,6 +464,7 @@ def main():
         sys.exit(0 if ok else 2)
 
     except Exception as e:
+        logger.exception("PDF parsing failed: %s", pdf_path.name)
         print(json.dumps({
             "ok": False,
             "pdf_path": str(pdf_path),
@@ -1,21 +1,34 @@
 # scripts/prepare_data.py
+"""
+Build the daily training / forecasting history from data/raw/fuel_dispenses.csv.
+
+    python -m scripts.prepare_data                 # network total -> fuel_daily_pivot.csv
+    python -m scripts.prepare_data --by-tank       # one series per fuel tank -> fuel_daily_tanks.csv
+"""
+
+import argparse
 import json
 from pathlib import Path
 
 import pandas as pd
-from utils.config import DATA_RAW_DIR, PROCESSED_DAILY_CSV, DATA_PROCESSED_DIR
+from utils.config import (
+    DATA_RAW_DIR, PROCESSED_DAILY_CSV, DATA_PROCESSED_DIR, TANK_DAILY_CSV,
+    MODELS_DIR, MODEL_VERSION, GLOBAL_MODELS_DIR, GLOBAL_MODEL_VERSION,
+)
+from utils.registry import active_meta_path
 from utils.time_features import add_time_features
 
 RAW_FILE = DATA_RAW_DIR / "fuel_dispenses.csv"  
+TIME_COLS = ["dow", "month", "weekofyear", "year", "is_weekend"]
 
 
-def _load_trained_fuels() -> list[str]:
+def _load_trained_fuels(meta_path: Path | None = None) -> list[str]:
     """
-    Read trained fuel column names from models/model_meta.json
-    If not available, return empty list (no enforcement).
+    Read trained fuel column names from model_meta.json of the active model
+    version in models/. If not available, return empty list (no enforcement).
     """
-    base_dir = Path(__file__).resolve().parents[1] 
-    meta_path = base_dir / "models" / "model_meta.json"
+    if meta_path is None:
+        meta_path = active_meta_path(MODELS_DIR, MODEL_VERSION)
 
     if not meta_path.exists():
         return []
@@ -29,7 +42,59 @@ def _load_trained_fuels() -> list[str]:
         return []
 
 
-def main():
+def _tank_column(columns) -> str | None:
+    """
+    The per-row tank column. Reports repeat 'Site' (read back as 'Site',
+    'Site.1'); the last one is filled on every row and names the dispensing
+    tank ("Diesel Tank 01", "Petrol Tank 02", ...) of the one station the
+    report covers, not a station.
+    """
+    candidates = [c for c in columns if str(c).split(".")[0].strip().lower() in {"site", "tank", "tank_id"}]
+    return candidates[-1] if candidates else None
+
+
+def _daily_pivot(df: pd.DataFrame, fuels: list[str]) -> pd.DataFrame:
+    """Date x fuel daily totals over the full date range, missing days as 0."""
+    pivot = (
+        df.groupby(["Date", "Item"])["Qty"].sum()
+        .unstack("Item", fill_value=0.0)
+        .sort_index()
+    )
+    full_idx = pd.date_range(pivot.index.min(), pivot.index.max(), freq="D")
+    pivot = pivot.reindex(index=full_idx, columns=fuels, fill_value=0.0)
+    pivot.index.name = "Date"
+    return pivot
+
+
+def build_tank_history(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    One daily series per fuel tank, stacked: Date, tank_id, fuels..., time
+    features. Each tank holds a single fuel, so every series has one
+    non-zero fuel column. Rows are grouped by tank and in date order, which
+    is what utils.windowing expects. Each tank covers its own first..last day.
+    """
+    col_site = _tank_column(df.columns)
+    if col_site is None:
+        raise ValueError(f"No site/tank column in {RAW_FILE} (columns: {list(df.columns)})")
+    df = df.assign(tank_id=df[col_site].fillna("UNKNOWN").astype(str).str.strip())
+
+    fuels = _load_trained_fuels(active_meta_path(GLOBAL_MODELS_DIR, GLOBAL_MODEL_VERSION)) or sorted(df["Item"].astype(str).unique())
+
+    frames = []
+    for tank, g in df.groupby("tank_id", sort=True):
+        pivot = _daily_pivot(g, fuels).reset_index()
+        pivot.insert(1, "tank_id", tank)
+        frames.append(pivot)
+    out = pd.concat(frames, ignore_index=True)
+    return add_time_features(out, "Date")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--by-tank", action="store_true",
+                        help=f"write per-tank history to {TANK_DAILY_CSV.name} (global model)")
+    args = parser.parse_args(argv)
+
     DATA_PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 
     df = pd.read_csv(RAW_FILE)
@@ -42,6 +107,15 @@ def main():
     # Drop rows with missing Date or Item
     df = df.dropna(subset=["Date", "Item"])
 
+    if args.by_tank:
+        out = build_tank_history(df)
+        out.to_csv(TANK_DAILY_CSV, index=False)
+        print(f"Saved per-tank dataset: {TANK_DAILY_CSV}")
+        print(f"Shape: {out.shape}")
+        print(f"Tanks: {out['tank_id'].nunique()}")
+        print("Fuel columns:", [c for c in out.columns if c not in ["Date", "tank_id"] + TIME_COLS])
+        return
+
    
     daily = (
         df.groupby(["Date", "Item"], as_index=False)["Qty"]
@@ -0,0 +1,309 @@
+# scripts/retrain_lstm.py
+"""
+Warm-start retraining of the next-day LSTM after new data is ingested.
+
+    python -m scripts.retrain_lstm                          # fine-tune the active model, register a new version
+    python -m scripts.retrain_lstm --promote                # ... and make it the active model if it holds up
+    python -m scripts.retrain_lstm --models-dir models/global --recent-days 45 --max-steps 150
+
+Instead of training from random weights and refitting the scalers, the active
+model and its scalers are loaded and fine-tuned for a bounded number of
+gradient steps (--max-steps) on
+
+    recent windows   targets in the last --recent-days days before the holdout
+    replay windows   --replay windows sampled from the older history, so the
+                     model does not forget earlier seasons
+
+The last --holdout-days days are not trained on; the parent and the
+fine-tuned model are both scored there (scaled MSE).
+
+Scaler drift: the parent scalers are applied to the new history. A column
+that now leaves the fitted [0, 1] range by more than --drift-tolerance gets
+its MinMax range widened to cover the new data, and the LSTM input kernel /
+output layer are re-parameterized so the widened model computes exactly what
+the parent did before fine-tuning starts. Drift beyond --max-drift (the range
+would more than double by default) stops the run: that is a full retrain
+(scripts.train_lstm), not a top-up. Calendar columns (dow, month, weekofyear,
+is_weekend) are widened to their whole domain and never stop the run.
+
+The result is registered as a new version (utils/registry.py) with the
+active version's direct heads carried over; its model_meta.json records the
+drift report and the holdout scores. --promote makes it the active version
+only when its holdout MSE is no worse than the parent's (x --promote-margin).
+Only next-day models (horizon 1) are warm-started.
+"""
+
+import argparse
+import json
+import logging
+import math
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from joblib import load
+from sklearn.preprocessing import MinMaxScaler
+
+import tensorflow as tf
+from tensorflow.keras import layers
+
+from shared.logs import setup_logging
+from scripts.train_lstm import save_artifacts
+from utils.config import MODELS_DIR, PROCESSED_DAILY_CSV, TANK_DAILY_CSV, RANDOM_SEED, DIRECT_HEADS_DIRNAME
+from utils.registry import commit_version, discard_staging, forecast_latency, promote, resolve, stage_version
+from utils.windowing import WindowedSeries
+
+logger = logging.getLogger(__name__)
+
+
+# calendar features have a known domain; drift there is a short training span, not new behaviour
+CALENDAR_RANGES = {"dow": (0, 6), "month": (1, 12), "weekofyear": (1, 53), "is_weekend": (0, 1)}
+
+
+def scaled_drift(scaler: MinMaxScaler, X: np.ndarray) -> np.ndarray:
+    """Per column, how far X leaves the fitted [0, 1] range, in scaled units (0 = inside)."""
+    Xs = scaler.transform(X)
+    lo, hi = scaler.feature_range
+    return np.maximum(np.maximum(lo - Xs.min(axis=0), Xs.max(axis=0) - hi), 0.0)
+
+
+def widen_scaler(scaler: MinMaxScaler, X: np.ndarray, columns: np.ndarray):
+    """
+    Copy of scaler whose data range also covers X in the given columns.
+    Returns (scaler, a, c) with old_scaled = a * new_scaled + c per column.
+    """
+    lo, hi = scaler.data_min_.copy(), scaler.data_max_.copy()
+    lo[columns] = np.minimum(lo[columns], X[:, columns].min(axis=0))
+    hi[columns] = np.maximum(hi[columns], X[:, columns].max(axis=0))
+    wide = MinMaxScaler(feature_range=scaler.feature_range).fit(np.vstack([lo, hi]))
+    a = scaler.scale_ / wide.scale_
+    c = scaler.min_ - wide.min_ * a
+    return wide, a, c
+
+
+def reparameterize(model: tf.keras.Model, n_features: int, x_map, y_map):
+    """
+    Fold input (old = a * new + c) and output (new = a * old + c) scaler
+    changes into the first LSTM kernel and the output Dense, so the model
+    computes the same function under the widened scalers.
+    """
+    lstm = next(layer for layer in model.layers if isinstance(layer, layers.LSTM))
+    dense = [layer for layer in model.layers if isinstance(layer, layers.Dense)][-1]
+
+    if x_map is not None:
+        a, c = x_map
+        kernel, recurrent, bias = lstm.get_weights()
+        # the window features are the first rows of the kernel (global: then the embedding)
+        k = kernel[:n_features]
+        bias = bias + c.astype(np.float32) @ k
+        kernel[:n_features] = a.astype(np.float32)[:, None] * k
+        lstm.set_weights([kernel, recurrent, bias])
+
+    if y_map is not None:
+        a, c = y_map
+        w, b = dense.get_weights()
+        dense.set_weights([w * a.astype(np.float32)[None, :], b * a.astype(np.float32) + c.astype(np.float32)])
+
+
+def _series_ids(df: pd.DataFrame, meta: dict):
+    """Per-row tank id for a global model (None otherwise)."""
+    if meta.get("model_type") != "global":
+        return None
+    index = {s: i + 1 for i, s in enumerate(meta.get("tanks") or [])}
+    # tanks the parent never saw train the unknown-tank row (id 0)
+    return df[meta.get("tank_col", "tank_id")].astype(str).str.strip().map(index).fillna(0).astype(np.int32).to_numpy()
+
+
+def _target_split(df: pd.DataFrame, tank_col, holdout_days: int, recent_days: int) -> np.ndarray:
+    """Per row: 0 replay pool, 1 recent, 2 holdout (counted back from each series' last day)."""
+    if tank_col:
+        from_end = df.groupby(tank_col).cumcount(ascending=False).to_numpy()
+    else:
+        from_end = np.arange(len(df))[::-1]
+    split = np.zeros(len(df), dtype=np.int8)
+    split[from_end < holdout_days + recent_days] = 1
+    split[from_end < holdout_days] = 2
+    return split
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models-dir", type=Path, default=MODELS_DIR, help="registry whose active version to start from")
+    parser.add_argument("--history", type=Path, default=None,
+                        help="daily history CSV (default: processed pivot, per-tank file for a global model)")
+    parser.add_argument("--recent-days", type=int, default=60)
+    parser.add_argument("--holdout-days", type=int, default=14)
+    parser.add_argument("--replay", type=int, default=256, help="older windows mixed into the fine-tune set")
+    parser.add_argument("--epochs", type=int, default=10, help="upper bound; --max-steps usually binds first")
+    parser.add_argument("--max-steps", type=int, default=200, help="gradient steps per retrain (CPU budget)")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--learning-rate", type=float, default=1e-4)
+    parser.add_argument("--drift-tolerance", type=float, default=0.05,
+                        help="scaled units outside [0, 1] tolerated before a scaler is widened")
+    parser.add_argument("--max-drift", type=float, default=1.0,
+                        help="scaled units outside [0, 1] that call for a full retrain instead")
+    parser.add_argument("--force", action="store_true", help="warm-start even beyond --max-drift")
+    parser.add_argument("--promote", action="store_true", help="make the new version the active model")
+    parser.add_argument("--promote-margin", type=float, default=1.0,
+                        help="promote when holdout MSE <= parent MSE x margin")
+    args = parser.parse_args(argv)
+    setup_logging()
+    tf.keras.utils.set_random_seed(RANDOM_SEED)
+    t_start = time.perf_counter()
+
+    models_dir = args.models_dir
+    parent_dir, parent_version = resolve(models_dir)
+    meta = json.loads((parent_dir / "model_meta.json").read_text(encoding="utf-8"))
+    if int(meta.get("horizon", 1)) != 1:
+        raise SystemExit("Only next-day models (horizon 1) can be warm-started; retrain heads with train_lstm.")
+    is_global = meta.get("model_type") == "global"
+    feature_cols, fuel_cols = meta["feature_cols"], meta["fuel_cols"]
+    lookback = int(meta["lookback_days"])
+    tank_col = meta.get("tank_col", "tank_id") if is_global else None
+
+    history = args.history or (TANK_DAILY_CSV if is_global else PROCESSED_DAILY_CSV)
+    df = pd.read_csv(history)
+    df["Date"] = pd.to_datetime(df["Date"])
+    df = df.sort_values([tank_col, "Date"] if tank_col else ["Date"], kind="stable").reset_index(drop=True)
+    X_raw = df[feature_cols].to_numpy(dtype=np.float32)
+    y_raw = df[fuel_cols].to_numpy(dtype=np.float32)
+
+    # --- Scaler drift ---
+    scaler_X, scaler_y = load(parent_dir / "scaler_X.pkl"), load(parent_dir / "scaler_y.pkl")
+    drift_x, drift_y = scaled_drift(scaler_X, X_raw), scaled_drift(scaler_y, y_raw)
+    drift = {
+        "inputs": {c: round(float(d), 4) for c, d in zip(feature_cols, drift_x) if d > 0},
+        "targets": {c: round(float(d), 4) for c, d in zip(fuel_cols, drift_y) if d > 0},
+    }
+    calendar = np.array([c in CALENDAR_RANGES for c in feature_cols])
+    worst = float(max(drift_x[~calendar].max(initial=0.0), drift_y.max()))
+    if worst > args.max_drift and not args.force:
+        raise SystemExit(f"Scaler drift {worst:.2f} exceeds --max-drift {args.max_drift} ({drift}); "
+                         f"run a full retrain (python -m scripts.train_lstm) or pass --force.")
+
+    model = tf.keras.models.load_model(parent_dir / "fuel_lstm.keras", compile=False)
+    parent_X, parent_y = scaler_X, scaler_y
+    x_map = y_map = None
+    widen_x, widen_y = np.flatnonzero(drift_x > args.drift_tolerance), np.flatnonzero(drift_y > args.drift_tolerance)
+    if len(widen_x):
+        bounds = np.vstack([X_raw.min(axis=0), X_raw.max(axis=0)])
+        for i in np.flatnonzero(calendar):
+            lo, hi = CALENDAR_RANGES[feature_cols[i]]
+            bounds[:, i] = [min(bounds[0, i], lo), max(bounds[1, i], hi)]
+        scaler_X, a, c = widen_scaler(scaler_X, bounds, widen_x)
+        x_map = (a, c)
+    if len(widen_y):
+        new_y, a, c = widen_scaler(scaler_y, y_raw, widen_y)
+        # reparameterize wants new = a * old + c for the outputs
+        y_map = (1.0 / a, -c / a)
+        scaler_y = new_y
+    drift["widened"] = [feature_cols[i] for i in widen_x] + [f"target:{fuel_cols[i]}" for i in widen_y]
+
+    X_all, y_all = scaler_X.transform(X_raw), scaler_y.transform(y_raw)
+    tank_ids = _series_ids(df, meta)
+    # group by tank name: tanks the parent never saw all share id 0
+    groups = df[tank_col].astype(str).to_numpy() if tank_col else None
+    series = WindowedSeries(X_all, y_all, lookback, groups=groups, tank_ids=tank_ids)
+
+    split = _target_split(df, tank_col, args.holdout_days, args.recent_days)
+    holdout = series.where_target(split == 2)
+    recent = series.where_target(split == 1)
+    pool = series.where_target(split == 0).starts
+    rng = np.random.default_rng(RANDOM_SEED)
+    replay = rng.choice(pool, size=min(args.replay, len(pool)), replace=False) if len(pool) else pool
+    train = WindowedSeries(X_all, y_all, lookback, starts=np.sort(np.concatenate([recent.starts, replay])),
+                           tank_ids=tank_ids)
+    if len(train) == 0:
+        raise SystemExit(f"No windows to fine-tune on in {history} (lookback={lookback}).")
+
+    def holdout_mse(m):
+        return float(m.evaluate(holdout.to_dataset(args.batch_size), verbose=0)) if len(holdout) else None
+
+    model.compile(optimizer=tf.keras.optimizers.Adam(args.learning_rate), loss="mse")
+    if x_map is not None or y_map is not None:
+        parent = tf.keras.models.clone_model(model)
+        parent.set_weights(model.get_weights())
+        reparameterize(model, len(feature_cols), x_map, y_map)
+
+        # the widened model on widened scaling must still predict what the parent did
+        starts = (holdout if len(holdout) else series).starts[:64]
+        rows = starts[:, None] + np.arange(lookback)
+        X_parent = parent_X.transform(X_raw)
+        inputs = lambda X: X[rows] if tank_ids is None else [X[rows], tank_ids[starts]]
+        raw_parent = parent_y.inverse_transform(parent.predict(inputs(X_parent), verbose=0))
+        raw_new = scaler_y.inverse_transform(model.predict(inputs(X_all), verbose=0))
+        gap = float(np.max(np.abs(raw_parent - raw_new) / np.maximum(np.abs(raw_parent), 1.0)))
+        if gap > 1e-3:
+            raise RuntimeError(f"Scaler re-parameterization changed predictions (max rel diff {gap:.2e})")
+        logger.info("widened scalers for %s (max rel diff after re-parameterization %.1e)", drift["widened"], gap)
+    parent_mse = holdout_mse(model)
+
+    # --- Bounded fine-tune ---
+    steps_per_epoch = math.ceil(len(train) / args.batch_size)
+    epochs = max(1, min(args.epochs, args.max_steps // steps_per_epoch))
+    steps_per_fit_epoch = max(1, min(args.max_steps, steps_per_epoch * epochs) // epochs)
+    train_ds = train.to_dataset(args.batch_size, shuffle=True, seed=RANDOM_SEED, cache=True).repeat()
+    t0 = time.perf_counter()
+    model.fit(train_ds, epochs=epochs, steps_per_epoch=steps_per_fit_epoch, shuffle=False, verbose=0)
+    fit_s = time.perf_counter() - t0
+    child_mse = holdout_mse(model)
+
+    # --- Registered version ---
+    improved = parent_mse is None or (child_mse is not None and child_mse <= parent_mse * args.promote_margin)
+    new_meta = dict(meta)
+    new_meta.pop("version", None)  # written by earlier retrains; the registry owns version ids now
+    new_meta.update({
+        "test_mse_scaled": child_mse,
+        "warm_start": {
+            "parent": parent_version,
+            "history": str(history),
+            "last_date": str(df["Date"].max().date()),
+            "recent_days": args.recent_days,
+            "holdout_days": args.holdout_days,
+            "recent_windows": len(recent),
+            "replay_windows": int(len(replay)),
+            "holdout_windows": len(holdout),
+            "epochs": epochs,
+            "steps": steps_per_fit_epoch * epochs,
+            "learning_rate": args.learning_rate,
+            "fit_s": round(fit_s, 2),
+            "total_s": round(time.perf_counter() - t_start, 2),
+            "holdout_mse_parent": parent_mse,
+            "holdout_mse": child_mse,
+            "scaler_drift": drift,
+        },
+    })
+
+    # removed again if anything fails before it is registered
+    staging = stage_version(models_dir, parent_dir, names=(DIRECT_HEADS_DIRNAME,))
+    try:
+        save_artifacts(staging, model, scaler_X, scaler_y, new_meta)
+        hist = df[df[tank_col].astype(str) == str(groups[-1])] if tank_col else df
+        latency = forecast_latency(staging, hist, tank=groups[-1] if tank_col else None)
+        version, version_dir = commit_version(
+            models_dir, staging, parent=parent_version, source="scripts.retrain_lstm",
+            metrics={"test_mse_scaled": child_mse, "holdout_mse": child_mse, "holdout_mse_parent": parent_mse,
+                     "latency_ms": latency},
+        )
+    except BaseException:
+        discard_staging(staging)
+        raise
+
+    fmt = lambda v: f"{v:.5f}" if v is not None else "n/a"
+    print(f"Fine-tuned on {len(recent)} recent + {len(replay)} replay windows: "
+          f"{new_meta['warm_start']['steps']} steps in {fit_s:.1f}s")
+    print(f"Holdout MSE (scaled): parent {fmt(parent_mse)} -> new {fmt(child_mse)}")
+    if drift["widened"]:
+        print(f"Widened scalers: {', '.join(drift['widened'])}")
+    print(f"Registered version {version}: {version_dir}")
+    print(f"Latency: {latency}")
+    if args.promote and improved:
+        promote(models_dir, version)
+        print(f"Promoted {version} (was {parent_version or 'flat layout'})")
+    elif args.promote:
+        print("Not promoted: holdout MSE is worse than the parent's")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+# scripts/search_lstm.py
+"""
+Hyperparameter search for the fuel-demand LSTM (scripts/train_lstm.py).
+
+    python -m scripts.search_lstm                                  # 24 trials, all cores
+    python -m scripts.search_lstm --trials 36 --cores 8 --max-epochs 90
+    python -m scripts.search_lstm --global --latency-budget-ms 2 --out search.json
+
+Trials sample lookback, LSTM sizes, dropout and learning rate from SPACE and
+train in a process pool: --cores is split between --workers processes (TF
+intra-op threads per worker = cores // workers), so trials do not fight over
+one full-width thread pool each.
+
+Bad trials are pruned early by successive halving: every trial trains for
+--min-epochs, the best 1 / --eta by validation loss continue (from their saved
+weights and optimizer state) for eta times as many epochs, and so on up to
+--max-epochs. Each worker loads and scales the history once and keeps the
+windowed splits per lookback, so trials that share a lookback reuse them.
+
+Validation windows are those whose target days are in the validation split
+(their lookback may reach into the training days): the 15% splits are shorter
+than most lookbacks. The recommended train_lstm command passes
+--val-by-target so the final run validates on the same windows. Per trial
+the report has the validation loss at every rung, training time and
+examples/s, and, per architecture, the latency of one forward pass and of a
+30-day recursive rollout measured afterwards in a single process.
+--latency-budget-ms limits the recommendation to architectures whose rollout
+fits the budget.
+"""
+
+import argparse
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from utils.config import RANDOM_SEED, FORECAST_DAYS_MONTHLY
+
+SPACE = {
+    "lookback": [7, 14, 21, 28],
+    "units": [(32, 16), (64, 32), (128, 64)],
+    "dropout": [0.1, 0.2, 0.3],
+    "learning_rate": [3e-4, 1e-3, 3e-3],
+}
+
+# per worker process: scaled history and (train, val, test) windows per lookback
+_cache = {}
+
+
+def sample_trials(n: int, seed: int) -> list[dict]:
+    """n distinct points of SPACE (the whole grid when n covers it)."""
+    keys = list(SPACE)
+    grid = list(itertools.product(*(SPACE[k] for k in keys)))
+    rng = np.random.default_rng(seed)
+    picks = rng.permutation(len(grid))[:n]
+    return [dict(zip(keys, grid[i]), trial=k) for k, i in enumerate(sorted(picks))]
+
+
+def rungs(min_epochs: int, max_epochs: int, eta: int) -> list[int]:
+    """Cumulative epoch budget per rung: min_epochs, x eta, ..., max_epochs."""
+    out = [min_epochs]
+    while out[-1] < max_epochs:
+        out.append(min(out[-1] * eta, max_epochs))
+    return out
+
+
+def _init_worker(threads: int):
+    os.environ.setdefault("FUELWATCH_LOG_LEVEL", "WARNING")
+    os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+    from utils.tf_runtime import configure_runtime
+
+    configure_runtime("default", intra_threads=threads, inter_threads=1)
+
+
+def _windows(global_model: bool, lookback: int):
+    from scripts.train_lstm import load_history, scale_history, split_windows
+
+    if "data" not in _cache:
+        data = load_history(global_model)
+        _cache["data"] = (data, *scale_history(data)[2:])
+    key = ("windows", lookback)
+    if key not in _cache:
+        data, X_all, y_all = _cache["data"]
+        _cache[key] = split_windows(data, X_all, y_all, lookback, by_target=True)
+    return _cache["data"][0], _cache[key]
+
+
+def _build(trial: dict, data: dict, n_features: int, n_targets: int, embedding_dim: int):
+    from scripts.train_lstm import build_model, build_global_model
+
+    units, lr, dropout = tuple(trial["units"]), trial["learning_rate"], trial["dropout"]
+    if data["global"]:
+        return build_global_model(trial["lookback"], n_features, n_targets, len(data["tanks"]),
+                                  embedding_dim, lr, units=units, dropout=dropout)
+    return build_model(trial["lookback"], n_features, n_targets, lr, units=units, dropout=dropout)
+
+
+def run_trial(trial: dict, start_epoch: int, end_epoch: int, opts: dict) -> dict:
+    """Train one trial from start_epoch to end_epoch; weights are kept in opts['work_dir']."""
+    import tensorflow as tf
+    from scripts.train_lstm import TrainingStats, _with_tank_dropout
+
+    tf.keras.utils.set_random_seed(RANDOM_SEED + trial["trial"])
+    data, (train_w, val_w, test_w) = _windows(opts["global_model"], trial["lookback"])
+    if len(train_w) == 0 or len(val_w) == 0:
+        return {"trial": trial["trial"], "error": f"no train / val windows for lookback={trial['lookback']}"}
+
+    ckpt = Path(opts["work_dir"]) / f"trial_{trial['trial']}.keras"
+    model = tf.keras.models.load_model(ckpt) if start_epoch > 0 \
+        else _build(trial, data, train_w.n_features, train_w.n_targets, opts["embedding_dim"])
+
+    train_ds = train_w.to_dataset(opts["batch_size"], shuffle=True, seed=RANDOM_SEED, cache=True)
+    if data["global"] and opts["tank_dropout"] > 0:
+        train_ds = _with_tank_dropout(train_ds, opts["tank_dropout"], RANDOM_SEED)
+    stats = TrainingStats(len(train_w))
+    history = model.fit(train_ds, validation_data=val_w.to_dataset(opts["batch_size"], cache=True),
+                        initial_epoch=start_epoch, epochs=end_epoch, shuffle=False,
+                        callbacks=[stats], verbose=0)
+    model.save(ckpt)
+
+    out = {
+        "trial": trial["trial"],
+        "epochs": end_epoch,
+        "val_loss": float(min(history.history["val_loss"])),
+        "last_val_loss": float(history.history["val_loss"][-1]),
+        "train_s": round(sum(stats.epoch_times), 3),
+        "examples_per_s": stats.summary().get("examples_per_s"),
+        "train_windows": len(train_w),
+        "val_windows": len(val_w),
+    }
+    if end_epoch >= opts["max_epochs"] and len(test_w):
+        out["test_mse_scaled"] = float(model.evaluate(test_w.to_dataset(opts["batch_size"]), verbose=0))
+    return out
+
+
+def measure_latency(arch: dict, opts: dict) -> dict:
+    """Median forward-pass latency of one architecture (weights do not matter)."""
+    from utils.tf_runtime import make_step_fn
+
+    data, (train_w, _, _) = _windows(opts["global_model"], arch["lookback"])
+    model = _build(dict(arch, dropout=0.0, learning_rate=1e-3), data, train_w.n_features, train_w.n_targets,
+                   opts["embedding_dim"])
+    shape = (1, arch["lookback"], train_w.n_features)
+    xs = [np.random.default_rng(0).random(shape, dtype=np.float32)]
+    if data["global"]:
+        step = make_step_fn(model, [shape, (1,)])
+        xs.append(np.ones((1,), dtype=np.int32))
+    else:
+        step = make_step_fn(model, shape)
+    step(*xs)  # tracing
+    samples = []
+    for _ in range(opts["latency_calls"]):
+        t0 = time.perf_counter()
+        step(*xs)
+        samples.append(time.perf_counter() - t0)
+    step_ms = float(np.median(samples)) * 1e3
+    return {"step_ms": round(step_ms, 4), "rollout_30d_ms": round(step_ms * FORECAST_DAYS_MONTHLY, 3),
+            "params": int(model.count_params())}
+
+
+def _arch_key(trial: dict) -> tuple:
+    return trial["lookback"], tuple(trial["units"])
+
+
+def _command(trial: dict, args) -> str:
+    cmd = (f"python -m scripts.train_lstm --lookback {trial['lookback']} --units {' '.join(map(str, trial['units']))} "
+           f"--dropout {trial['dropout']} --learning-rate {trial['learning_rate']} --batch-size {args.batch_size} "
+           f"--val-by-target")
+    return cmd + (" --global" if args.global_model else "")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trials", type=int, default=24)
+    parser.add_argument("--min-epochs", type=int, default=10, help="epochs every trial gets before pruning")
+    parser.add_argument("--max-epochs", type=int, default=90)
+    parser.add_argument("--eta", type=int, default=3, help="keep the best 1/eta trials at each rung")
+    parser.add_argument("--cores", type=int, default=os.cpu_count() or 1, help="CPU budget for the search")
+    parser.add_argument("--workers", type=int, default=None, help="trial processes (default: one per core)")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--global", dest="global_model", action="store_true", help="search the multi-tank model")
+    parser.add_argument("--embedding-dim", type=int, default=8)
+    parser.add_argument("--tank-dropout", type=float, default=0.1)
+    parser.add_argument("--latency-budget-ms", type=float, default=None,
+                        help="max 30-day rollout latency of the recommended architecture")
+    parser.add_argument("--latency-calls", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=RANDOM_SEED)
+    parser.add_argument("--work-dir", type=Path, default=None, help="trial checkpoints (default: temp dir, removed)")
+    parser.add_argument("--out", type=Path, default=None)
+    args = parser.parse_args()
+
+    if args.eta < 2:
+        parser.error("--eta must be at least 2")
+    trials = sample_trials(args.trials, args.seed)
+    workers = max(1, min(args.workers or args.cores, args.cores, len(trials)))
+    threads = max(1, args.cores // workers)
+    work_dir = args.work_dir or Path(tempfile.mkdtemp(prefix="lstm_search_"))
+    work_dir.mkdir(parents=True, exist_ok=True)
+    opts = {
+        "global_model": args.global_model, "batch_size": args.batch_size, "embedding_dim": args.embedding_dim,
+        "tank_dropout": args.tank_dropout, "max_epochs": args.max_epochs,
+        "latency_calls": args.latency_calls, "work_dir": str(work_dir),
+    }
+    schedule = rungs(args.min_epochs, args.max_epochs, args.eta)
+    print(f"{len(trials)} trials, rungs {schedule}, {workers} workers x {threads} threads", flush=True)
+
+    results = {t["trial"]: {"config": t, "rungs": []} for t in trials}
+    ctx = multiprocessing.get_context("spawn")  # TF is not fork-safe
+    t_search = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(workers, mp_context=ctx, initializer=_init_worker, initargs=(threads,)) as pool:
+            alive, done_epochs = list(trials), 0
+            for k, epochs in enumerate(schedule):
+                rung = list(pool.map(run_trial, alive, itertools.repeat(done_epochs),
+                                     itertools.repeat(epochs), itertools.repeat(opts)))
+                for r in rung:
+                    results[r["trial"]]["rungs"].append(r)
+                ok = sorted((r for r in rung if "error" not in r), key=lambda r: r["val_loss"])
+                if k < len(schedule) - 1:
+                    ok = ok[:max(1, math.ceil(len(ok) / args.eta))]
+                best = ok[0]["val_loss"] if ok else float("nan")
+                print(f"rung {k} ({epochs} epochs): {len(rung)} trials, best val_loss {best:.5f}, "
+                      f"{len(ok)} kept", flush=True)
+                keep = {r["trial"] for r in ok}
+                alive, done_epochs = [t for t in alive if t["trial"] in keep], epochs
+        search_s = time.perf_counter() - t_search
+
+        # one process, no other trials running: latency per architecture
+        archs = {_arch_key(t): {"lookback": t["lookback"], "units": t["units"]} for t in trials}
+        with ProcessPoolExecutor(1, mp_context=ctx, initializer=_init_worker, initargs=(threads,)) as pool:
+            latency = dict(zip(archs, pool.map(measure_latency, archs.values(), itertools.repeat(opts))))
+    finally:
+        if args.work_dir is None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    board = []
+    for tid, res in results.items():
+        runs = [r for r in res["rungs"] if "error" not in r]
+        last = runs[-1] if runs else {}
+        board.append({
+            **res["config"],
+            "units": list(res["config"]["units"]),
+            "epochs": last.get("epochs", 0),
+            "val_loss": last.get("val_loss"),
+            "test_mse_scaled": last.get("test_mse_scaled"),
+            "train_s": round(sum(r["train_s"] for r in runs), 3),
+            "examples_per_s": last.get("examples_per_s"),
+            "pruned": last.get("epochs", 0) < args.max_epochs,
+            "val_loss_by_rung": [r["val_loss"] for r in runs],
+            "error": next((r["error"] for r in res["rungs"] if "error" in r), None),
+            **latency[_arch_key(res["config"])],
+        })
+    # finished trials first, then by how far they got and their loss
+    board.sort(key=lambda b: (b["val_loss"] is None, -b["epochs"], b["val_loss"] or 0.0))
+
+    eligible = [b for b in board if b["val_loss"] is not None and not b["pruned"]
+                and (args.latency_budget_ms is None or b["rollout_30d_ms"] <= args.latency_budget_ms)]
+    best = eligible[0] if eligible else None
+
+    print(f"\n{'trial':>5} {'lookback':>8} {'units':>10} {'drop':>5} {'lr':>8} {'epochs':>6} "
+          f"{'val_loss':>10} {'train_s':>8} {'ex/s':>8} {'step_ms':>8} {'30d_ms':>8}")
+    for b in board:
+        val = f"{b['val_loss']:.5f}" if b["val_loss"] is not None else "n/a"
+        print(f"{b['trial']:>5} {b['lookback']:>8} {'/'.join(map(str, b['units'])):>10} {b['dropout']:>5} "
+              f"{b['learning_rate']:>8.0e} {b['epochs']:>6} {val:>10} {b['train_s']:>8.1f} "
+              f"{b['examples_per_s'] or 0:>8.0f} {b['step_ms']:>8.3f} {b['rollout_30d_ms']:>8.2f}")
+    print(f"\nsearch took {search_s:.1f}s")
+    if best:
+        print(f"best: trial {best['trial']} (val_loss {best['val_loss']:.5f}, "
+              f"30-day rollout {best['rollout_30d_ms']:.2f} ms)\n  {_command(best, args)}")
+    else:
+        print("no finished trial fits the latency budget")
+
+    if args.out:
+        report = {
+            "search": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+            "space": {k: [list(v) if isinstance(v, tuple) else v for v in vals] for k, vals in SPACE.items()},
+            "rungs": schedule,
+            "workers": workers,
+            "threads_per_worker": threads,
+            "search_s": round(search_s, 2),
+            "best": best,
+            "command": _command(best, args) if best else None,
+            "trials": board,
+        }
+        args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,56 @@
 # scripts/train_lstm.py
+"""
+Train the fuel-demand LSTM on data/processed/fuel_daily_pivot.csv.
+
+    python -m scripts.train_lstm                              # batch 16, lr 1e-3
+    python -m scripts.train_lstm --batch-size 256             # lr scaled by sqrt(256 / 16)
+    python -m scripts.train_lstm --batch-size 512 --lr-scaling linear --warmup-epochs 3
+    python -m scripts.train_lstm --global --batch-size 256   # one model for every tank
+    python -m scripts.train_lstm --horizon 30                # direct 30-day head
+    python -m scripts.train_lstm --lookback 21 --units 128 64 --learning-rate 3e-3 --val-by-target   # from scripts.search_lstm
+
+Input is a tf.data pipeline over utils/windowing.py windows: shuffled within
+the training split every epoch, optionally cached, and prefetched so batch
+preparation overlaps the training step. Larger batches cut the per-batch
+Python overhead that dominates on CPU; the learning rate is scaled from
+BASE_LR at BASE_BATCH_SIZE. Epoch time and examples/sec are logged and
+stored in model_meta.json.
+
+By default a validation / test window needs its lookback rows and targets
+inside the split; with a long lookback the 15% splits can hold none, and
+early stopping falls back to the training loss. --val-by-target only
+requires the target days to be in the split (the lookback may reach back
+into earlier days), the same windows scripts.search_lstm ranks trials on.
+
+--global trains one model across the site's fuel tanks on
+data/processed/fuel_daily_tanks.csv (scripts.prepare_data --by-tank),
+conditioned on a learned tank embedding, and writes it to models/global/.
+Each tank is split 70/15/15 by date and windows never cross tanks.
+Tank id 0 stands for "unknown tank": during training a share of the
+windows (--tank-dropout) is shown with id 0, so a new tank still gets a
+site-average forecast.
+
+--horizon H (7, 30 or 365) trains a direct multi-horizon head instead of the
+next-day model: one forward pass predicts the next H days (365 as 12
+month-like block totals). It is added as direct/h<H>/ to a copy of the
+active version and FuelDemandPredictor uses it for the matching forecast
+mode; scripts.compare_horizons reports accuracy and latency against the
+recursive rollout.
+
+Every run is registered as a new version of models/ (or models/global/)
+with checksums, the test / validation loss and forecast latency in its
+manifest (utils/registry.py), then promoted to the active version unless
+--no-promote is given. A next-day run keeps the active version's direct heads.
+"""
+
+import argparse
 import json
+import logging
+import math
+import shutil
+import time
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
 from sklearn.preprocessing import MinMaxScaler
@@ -8,143 +59,414 @@ from joblib import dump
 import tensorflow as tf
 from tensorflow.keras import layers, models, callbacks
 
+from shared.logs import setup_logging
 from utils.config import (
     PROCESSED_DAILY_CSV, LOOKBACK_DAYS,
     MODEL_PATH, SCALER_X_PATH, SCALER_Y_PATH, MODEL_META_PATH,
-    MODELS_DIR, RANDOM_SEED
+    MODELS_DIR, RANDOM_SEED, TANK_DAILY_CSV, GLOBAL_MODELS_DIR,
+    DIRECT_HEADS_DIRNAME, MODE_DAYS, ANNUAL_BLOCKS,
 )
-from utils.windowing import make_supervised_windows
-
+from utils.registry import (
+    commit_version, discard_staging, forecast_latency, has_model, promote, resolve, stage_version,
+)
+from utils.windowing import WindowedSeries, block_lengths
+
+logger = logging.getLogger(__name__)
+
+BASE_BATCH_SIZE = 16
+BASE_LR = 1e-3
+DEFAULT_UNITS = (64, 32)
+DEFAULT_DROPOUT = 0.2
+TIME_COLS = ["dow", "month", "weekofyear", "year", "is_weekend"]
+
+
+def scaled_learning_rate(batch_size: int, scaling: str = "sqrt") -> float:
+    """BASE_LR adjusted for batch_size: linear, sqrt, or none."""
+    ratio = batch_size / BASE_BATCH_SIZE
+    if scaling == "linear":
+        return BASE_LR * ratio
+    if scaling == "sqrt":
+        return BASE_LR * math.sqrt(ratio)
+    return BASE_LR
+
+
+class TrainingStats(callbacks.Callback):
+    """Logs epoch time and examples/sec; totals end up in self.summary()."""
+
+    def __init__(self, n_examples: int):
+        super().__init__()
+        self.n_examples = n_examples
+        self.epoch_times = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._t0 = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        # includes validation, which is what an epoch costs end to end
+        elapsed = time.perf_counter() - self._t0
+        self.epoch_times.append(elapsed)
+        logs = logs or {}
+        logger.info(
+            "epoch %d: %.2fs, %.0f examples/s, loss=%.5f%s",
+            epoch + 1, elapsed, self.n_examples / elapsed, logs.get("loss", float("nan")),
+            f", val_loss={logs['val_loss']:.5f}" if "val_loss" in logs else "",
+        )
 
-def build_model(lookback: int, n_features: int, n_targets: int) -> tf.keras.Model:
+    def summary(self) -> dict:
+        if not self.epoch_times:
+            return {}
+        # the first epoch pays for tracing; report it separately
+        steady = self.epoch_times[1:] or self.epoch_times
+        mean_epoch = sum(steady) / len(steady)
+        return {
+            "epochs_run": len(self.epoch_times),
+            "first_epoch_s": round(self.epoch_times[0], 3),
+            "mean_epoch_s": round(mean_epoch, 3),
+            "examples_per_s": round(self.n_examples / mean_epoch, 1),
+            "total_train_s": round(sum(self.epoch_times), 2),
+        }
+
+
+class LinearWarmup(callbacks.Callback):
+    """Ramp the learning rate from BASE_LR up to the scaled rate over the first epochs."""
+
+    def __init__(self, target_lr: float, epochs: int):
+        super().__init__()
+        self.target_lr = target_lr
+        self.epochs = epochs
+
+    def on_epoch_begin(self, epoch, logs=None):
+        if epoch < self.epochs:
+            lr = BASE_LR + (self.target_lr - BASE_LR) * (epoch + 1) / (self.epochs + 1)
+            self.model.optimizer.learning_rate.assign(lr)
+        elif epoch == self.epochs:
+            self.model.optimizer.learning_rate.assign(self.target_lr)
+
+
+def _output_layers(n_targets: int, out_steps: int) -> list:
+    """Next-day regression output, or out_steps x n_targets for a direct head."""
+    if out_steps == 1:
+        return [layers.Dense(n_targets)]
+    return [layers.Dense(out_steps * n_targets), layers.Reshape((out_steps, n_targets))]
+
+
+def _lstm_stack(units, dropout: float) -> list:
+    """Stacked LSTMs (all but the last return sequences), each followed by dropout."""
+    out = []
+    for k, n in enumerate(units):
+        out += [layers.LSTM(n, return_sequences=k < len(units) - 1), layers.Dropout(dropout)]
+    return out
+
+
+def build_model(lookback: int, n_features: int, n_targets: int, learning_rate: float = BASE_LR,
+                out_steps: int = 1, units=DEFAULT_UNITS, dropout: float = DEFAULT_DROPOUT) -> tf.keras.Model:
     model = models.Sequential([
         layers.Input(shape=(lookback, n_features)),
-        layers.LSTM(64, return_sequences=True),
-        layers.Dropout(0.2),
-        layers.LSTM(32),
-        layers.Dropout(0.2),
-        layers.Dense(n_targets)  # regression output
+        *_lstm_stack(units, dropout),
+        *_output_layers(n_targets, out_steps),  # regression output
     ])
-    model.compile(optimizer=tf.keras.optimizers.Adam(1e-3), loss="mse")
+    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate), loss="mse")
     return model
 
 
-def main():
-    np.random.seed(RANDOM_SEED)
-    tf.random.set_seed(RANDOM_SEED)
-    MODELS_DIR.mkdir(parents=True, exist_ok=True)
+def build_global_model(lookback: int, n_features: int, n_targets: int, n_tanks: int,
+                       embedding_dim: int = 8, learning_rate: float = BASE_LR,
+                       out_steps: int = 1, units=DEFAULT_UNITS, dropout: float = DEFAULT_DROPOUT) -> tf.keras.Model:
+    """
+    build_model() plus a tank input: the tank embedding is appended to
+    every time step, so the LSTM sees which tank's dynamics it is reading.
+    Tank ids run 1..n_tanks; 0 is the unknown / site-average tank.
+    """
+    window = layers.Input(shape=(lookback, n_features), name="window")
+    tank = layers.Input(shape=(), dtype="int32", name="tank")
+    emb = layers.Embedding(n_tanks + 1, embedding_dim, name="tank_embedding")(tank)
+    emb = layers.RepeatVector(lookback)(emb)
+    x = layers.Concatenate()([window, emb])
+    for layer in _lstm_stack(units, dropout):
+        x = layer(x)
+    out = x
+    for layer in _output_layers(n_targets, out_steps):
+        out = layer(out)
+    model = models.Model([window, tank], out)
+    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate), loss="mse")
+    return model
 
-    df = pd.read_csv(PROCESSED_DAILY_CSV)
-    df["Date"] = pd.to_datetime(df["Date"])
 
-    time_cols = ["dow", "month", "weekofyear", "year", "is_weekend"]
-    fuel_cols = [c for c in df.columns if c not in ["Date"] + time_cols]
+def _with_tank_dropout(ds, rate: float, seed: int):
+    """Replace a share of the tank ids in each batch with 0 (unknown tank)."""
+    def drop(inputs, y):
+        window, tank = inputs
+        mask = tf.random.uniform(tf.shape(tank), seed=seed) < rate
+        return (window, tf.where(mask, tf.zeros_like(tank), tank)), y
 
-    # Features for model input: fuel history + time features
-    feature_cols = fuel_cols + time_cols
+    return ds.map(drop, num_parallel_calls=tf.data.AUTOTUNE)
 
-    X_raw = df[feature_cols].values.astype(np.float32)
-    y_raw = df[fuel_cols].values.astype(np.float32)
 
-    # --- Time-based split (no shuffling) ---
+def load_history(global_model: bool = False) -> dict:
+    """
+    Training history with its feature / target columns and a per-row split
+    (0 train, 1 val, 2 test). Single series: first 70% / next 15% / rest by
+    date. Global: the same per tank, rows grouped by tank.
+    """
+    df = pd.read_csv(TANK_DAILY_CSV if global_model else PROCESSED_DAILY_CSV)
+    df["Date"] = pd.to_datetime(df["Date"])
+    if global_model:
+        # windowing needs each tank's rows together and in date order
+        df = df.sort_values(["tank_id", "Date"], kind="stable").reset_index(drop=True)
+
+    fuel_cols = [c for c in df.columns if c not in ["Date", "tank_id"] + TIME_COLS]
+    # Features for model input: fuel history + time features
+    feature_cols = fuel_cols + TIME_COLS
+
     n = len(df)
     train_end = int(n * 0.7)
     val_end = int(n * 0.85)
+    split = np.zeros(n, dtype=np.int8)
+    tanks, tank_ids = None, None
+    if global_model:
+        tanks = sorted(df["tank_id"].astype(str).unique())
+        tank_ids = df["tank_id"].astype(str).map({s: i + 1 for i, s in enumerate(tanks)}).to_numpy()
+        pos = df.groupby("tank_id").cumcount().to_numpy()
+        size = df.groupby("tank_id")["Date"].transform("size").to_numpy()
+        split[pos >= (size * 0.7).astype(int)] = 1
+        split[pos >= (size * 0.85).astype(int)] = 2
+    else:
+        split[train_end:val_end] = 1
+        split[val_end:] = 2
 
-    X_train_raw, y_train_raw = X_raw[:train_end], y_raw[:train_end]
-    X_val_raw, y_val_raw = X_raw[train_end:val_end], y_raw[train_end:val_end]
-    X_test_raw, y_test_raw = X_raw[val_end:], y_raw[val_end:]
+    return {
+        "df": df,
+        "global": global_model,
+        "fuel_cols": fuel_cols,
+        "time_cols": list(TIME_COLS),
+        "feature_cols": feature_cols,
+        "X_raw": df[feature_cols].values.astype(np.float32),
+        "y_raw": df[fuel_cols].values.astype(np.float32),
+        "split": split,
+        "train_end": train_end,
+        "val_end": val_end,
+        "tanks": tanks,
+        "tank_ids": tank_ids,
+    }
 
-    # --- Scaling (fit only on training) ---
-    scaler_X = MinMaxScaler()
-    scaler_y = MinMaxScaler()
 
-    X_train = scaler_X.fit_transform(X_train_raw)
-    y_train = scaler_y.fit_transform(y_train_raw)
+def scale_history(data: dict):
+    """MinMax scalers fit on the training rows only; returns (scaler_X, scaler_y, X_all, y_all)."""
+    train_rows = data["split"] == 0
+    scaler_X = MinMaxScaler().fit(data["X_raw"][train_rows])
+    scaler_y = MinMaxScaler().fit(data["y_raw"][train_rows])
+    return scaler_X, scaler_y, scaler_X.transform(data["X_raw"]), scaler_y.transform(data["y_raw"])
+
+
+def split_windows(data: dict, X_all: np.ndarray, y_all: np.ndarray, lookback: int, horizon: int = 1,
+                  by_target: bool = False):
+    """
+    (train, val, test) WindowedSeries over one copy of the scaled rows. A
+    window belongs to a split when its lookback rows and targets are all in
+    it; by_target=True only requires the targets (val / test windows then look
+    back into the earlier splits, never forward).
+    """
+    blocks = block_lengths(horizon, ANNUAL_BLOCKS) if horizon > 31 else None
+    series = WindowedSeries(X_all, y_all, lookback, tank_ids=data["tank_ids"],
+                            horizon=horizon, blocks=blocks)
+    split = data["split"]
+    if by_target:
+        return (series.where(split == 0), series.where(split <= 1).where_target(split == 1),
+                series.where_target(split == 2))
+    return series.where(split == 0), series.where(split == 1), series.where(split == 2)
+
+
+def save_artifacts(out_dir: Path, model, scaler_X, scaler_y, meta: dict):
+    """Write one model's artifacts (model, scalers, model_meta.json) into a (staging) version dir."""
+    out_dir = Path(out_dir)
+    model.save(out_dir / MODEL_PATH.name)
+    dump(scaler_X, out_dir / SCALER_X_PATH.name)
+    dump(scaler_y, out_dir / SCALER_Y_PATH.name)
+    with open(out_dir / MODEL_META_PATH.name, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
 
-    X_val = scaler_X.transform(X_val_raw)
-    y_val = scaler_y.transform(y_val_raw)
 
-    X_test = scaler_X.transform(X_test_raw)
-    y_test = scaler_y.transform(y_test_raw)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=BASE_BATCH_SIZE)
+    parser.add_argument("--lr-scaling", choices=["sqrt", "linear", "none"], default="sqrt",
+                        help=f"how the learning rate follows --batch-size (base {BASE_LR} at {BASE_BATCH_SIZE})")
+    parser.add_argument("--warmup-epochs", type=int, default=0,
+                        help="ramp up to the scaled learning rate over this many epochs")
+    parser.add_argument("--epochs", type=int, default=150)
+    parser.add_argument("--cache", action="store_true",
+                        help="keep gathered windows in memory (faster epochs, N x lookback x features floats)")
+    parser.add_argument("--global", dest="global_model", action="store_true",
+                        help="one model for all tanks (per-tank history, tank embedding)")
+    parser.add_argument("--embedding-dim", type=int, default=8)
+    parser.add_argument("--tank-dropout", type=float, default=0.1,
+                        help="share of training windows shown as the unknown tank (--global)")
+    parser.add_argument("--horizon", type=int, choices=[1, *sorted(MODE_DAYS.values())], default=1,
+                        help="1 = next-day model for the recursive rollout; 7/30/365 = direct multi-horizon head")
+    parser.add_argument("--lookback", type=int, default=LOOKBACK_DAYS)
+    parser.add_argument("--units", type=int, nargs="+", default=list(DEFAULT_UNITS), help="LSTM sizes, first to last")
+    parser.add_argument("--dropout", type=float, default=DEFAULT_DROPOUT)
+    parser.add_argument("--learning-rate", type=float, default=None,
+                        help="fixed learning rate (overrides --lr-scaling)")
+    parser.add_argument("--val-by-target", action="store_true",
+                        help="val / test windows only need their targets in the split (as scripts.search_lstm)")
+    parser.add_argument("--no-promote", dest="promote", action="store_false",
+                        help="register the version without making it the active model")
+    args = parser.parse_args(argv)
+    setup_logging()
 
-    # --- Windowing ---
-    Xw_train, yw_train = make_supervised_windows(X_train, y_train, LOOKBACK_DAYS)
-    if len(Xw_train) == 0:
-        raise ValueError(
-            f"Not enough training data for LOOKBACK_DAYS={LOOKBACK_DAYS}. "
-            f"Train rows={len(X_train)}. Reduce LOOKBACK_DAYS or add more history."
-        )
+    np.random.seed(RANDOM_SEED)
+    tf.random.set_seed(RANDOM_SEED)
 
-    # Validation windows (only if enough data)
-    Xw_val, yw_val = (None, None)
-    if len(X_val) > LOOKBACK_DAYS:
-        Xw_val, yw_val = make_supervised_windows(X_val, y_val, LOOKBACK_DAYS)
-        if len(Xw_val) == 0:
-            Xw_val, yw_val = (None, None)
+    registry = GLOBAL_MODELS_DIR if args.global_model else MODELS_DIR
+    base_dir, parent = resolve(registry) if has_model(registry) else (None, None)
+    if args.horizon > 1 and base_dir is None:
+        raise SystemExit(f"No next-day model in {registry} to add a {args.horizon}-day head to; train it first.")
 
-    # Test windows (only if enough data)
-    Xw_test, yw_test = (None, None)
-    if len(X_test) > LOOKBACK_DAYS:
-        Xw_test, yw_test = make_supervised_windows(X_test, y_test, LOOKBACK_DAYS)
-        if len(Xw_test) == 0:
-            Xw_test, yw_test = (None, None)
+    data = load_history(args.global_model)
+    df, fuel_cols, time_cols, feature_cols = data["df"], data["fuel_cols"], data["time_cols"], data["feature_cols"]
+    train_end, val_end, tanks = data["train_end"], data["val_end"], data["tanks"]
+
+    # --- Scaling (fit only on training) ---
+    scaler_X, scaler_y, X_all, y_all = scale_history(data)
+
+    # --- Windowing: one copy of the rows, each split keeps only window starts ---
+    lookback = args.lookback
+    train_windows, val_windows, test_windows = split_windows(data, X_all, y_all, lookback, args.horizon,
+                                                             by_target=args.val_by_target)
+    if len(train_windows) == 0:
+        raise ValueError(
+            f"Not enough training data for lookback={lookback}. "
+            f"Train rows={int((data['split'] == 0).sum())}, horizon={args.horizon}. Reduce the lookback or add more history."
+        )
+    blocks = train_windows.blocks
 
-    n_features = Xw_train.shape[-1]
-    n_targets = yw_train.shape[-1]
+    n_features = train_windows.n_features
+    n_targets = train_windows.n_targets
+    out_steps = train_windows.target_shape[0] if args.horizon > 1 else 1
 
-    model = build_model(LOOKBACK_DAYS, n_features, n_targets)
+    learning_rate = args.learning_rate or scaled_learning_rate(args.batch_size, args.lr_scaling)
+    units = tuple(args.units)
+    if args.global_model:
+        model = build_global_model(lookback, n_features, n_targets, len(tanks),
+                                   args.embedding_dim, learning_rate, out_steps, units, args.dropout)
+    else:
+        model = build_model(lookback, n_features, n_targets, learning_rate, out_steps, units, args.dropout)
+    logger.info("training on %d windows (val %d, test %d), batch_size=%d, lr=%.2e",
+                len(train_windows), len(val_windows), len(test_windows), args.batch_size, learning_rate)
 
     # Callbacks: if no validation set, monitor training loss instead
-    monitor_metric = "val_loss" if Xw_val is not None else "loss"
+    monitor_metric = "val_loss" if len(val_windows) else "loss"
+    if not len(val_windows) and not args.val_by_target:
+        logger.warning("no validation windows for lookback=%d; early stopping on training loss "
+                       "(--val-by-target validates on windows whose targets are in the split)", lookback)
     cbs = [
         callbacks.EarlyStopping(monitor=monitor_metric, patience=10, restore_best_weights=True),
         callbacks.ReduceLROnPlateau(monitor=monitor_metric, patience=5, factor=0.5, min_lr=1e-6)
     ]
+    if args.warmup_epochs > 0 and learning_rate > BASE_LR:
+        cbs.insert(0, LinearWarmup(learning_rate, args.warmup_epochs))
+    stats = TrainingStats(len(train_windows))
+    cbs.append(stats)
+
+    train_ds = train_windows.to_dataset(args.batch_size, shuffle=True, seed=RANDOM_SEED, cache=args.cache)
+    if args.global_model and args.tank_dropout > 0:
+        train_ds = _with_tank_dropout(train_ds, args.tank_dropout, RANDOM_SEED)
 
     fit_kwargs = dict(
-        x=Xw_train,
-        y=yw_train,
-        epochs=150,
-        batch_size=16,
+        x=train_ds,
+        epochs=args.epochs,
+        shuffle=False,  # the dataset reshuffles window starts every epoch
         callbacks=cbs,
-        verbose=1
+        verbose=2
     )
 
-    if Xw_val is not None:
-        fit_kwargs["validation_data"] = (Xw_val, yw_val)
+    if len(val_windows):
+        fit_kwargs["validation_data"] = val_windows.to_dataset(args.batch_size, cache=args.cache)
 
     history = model.fit(**fit_kwargs)
 
     test_loss = None
-    if Xw_test is not None:
-        test_loss = float(model.evaluate(Xw_test, yw_test, verbose=0))
+    if len(test_windows):
+        test_loss = float(model.evaluate(test_windows.to_dataset(args.batch_size), verbose=0))
         print("Test MSE (scaled):", test_loss)
     else:
         print("Test set too small for windowing — skipping test evaluation.")
 
-    # Save artifacts
-    model.save(MODEL_PATH)
-    dump(scaler_X, SCALER_X_PATH)
-    dump(scaler_y, SCALER_Y_PATH)
-
     meta = {
-        "lookback_days": LOOKBACK_DAYS,
+        "lookback_days": lookback,
         "feature_cols": feature_cols,
         "fuel_cols": fuel_cols,
         "time_cols": time_cols,
-        "train_end_date": str(df["Date"].iloc[train_end - 1].date()),
-        "val_end_date": str(df["Date"].iloc[val_end - 1].date()) if val_end > train_end else None,
-        "test_start_date": str(df["Date"].iloc[val_end].date()) if val_end < len(df) else None,
+        "train_end_date": str(df["Date"].iloc[train_end - 1].date()) if not args.global_model else None,
+        "val_end_date": str(df["Date"].iloc[val_end - 1].date()) if val_end > train_end and not args.global_model else None,
+        "test_start_date": str(df["Date"].iloc[val_end].date()) if val_end < len(df) and not args.global_model else None,
         "final_val_loss": float(min(history.history.get("val_loss", history.history["loss"]))),
         "test_mse_scaled": test_loss,
+        "training": {
+            "batch_size": args.batch_size,
+            "learning_rate": learning_rate,
+            "lr_scaling": args.lr_scaling if args.learning_rate is None else "fixed",
+            "units": list(units),
+            "dropout": args.dropout,
+            "train_windows": len(train_windows),
+            "val_windows": len(val_windows),
+            "val_by_target": args.val_by_target,
+            **stats.summary(),
+        },
     }
-
-    with open(MODEL_META_PATH, "w", encoding="utf-8") as f:
-        json.dump(meta, f, indent=2)
-
-    print(f"Saved model:  {MODEL_PATH}")
-    print(f"Saved meta:   {MODEL_META_PATH}")
+    if args.horizon > 1:
+        # predictor: one forward pass answers the matching mode
+        meta.update({
+            "horizon": args.horizon,
+            "target_blocks": blocks.tolist() if blocks is not None else None,
+        })
+    if args.global_model:
+        # tank i + 1 -> tanks[i]; 0 is the unknown tank
+        meta.update({
+            "model_type": "global",
+            "tank_col": "tank_id",
+            "tanks": tanks,
+            "embedding_dim": args.embedding_dim,
+            "tank_dropout": args.tank_dropout,
+            "split": "per tank by date, 70/15/15",
+        })
+
+    # Save artifacts into a staged version: the active next-day model (or its
+    # heads) plus what this run trained. Removed again if anything fails
+    # before it is registered.
+    if args.horizon > 1:
+        staging = stage_version(registry, base_dir)
+    else:
+        staging = stage_version(registry, base_dir, names=(DIRECT_HEADS_DIRNAME,))
+    try:
+        out_dir = staging
+        if args.horizon > 1:
+            out_dir = staging / DIRECT_HEADS_DIRNAME / f"h{args.horizon}"
+            shutil.rmtree(out_dir, ignore_errors=True)  # the head being replaced
+            out_dir.mkdir(parents=True)
+        save_artifacts(out_dir, model, scaler_X, scaler_y, meta)
+
+        if args.global_model:
+            tank, hist = tanks[0], df[data["tank_ids"] == 1]
+        else:
+            tank, hist = None, df
+        days = sorted({7, 30, args.horizon} - {1})
+        latency = forecast_latency(staging, hist, days=days, tank=tank)
+        version, version_dir = commit_version(
+            registry, staging, parent=parent if args.horizon > 1 else None, source="scripts.train_lstm",
+            metrics={"test_mse_scaled": test_loss, "final_val_loss": meta["final_val_loss"],
+                     "horizon": args.horizon, "latency_ms": latency},
+        )
+    except BaseException:
+        discard_staging(staging)
+        raise
+
+    print(f"Saved version: {version} -> {version_dir}")
+    print(f"Latency:      {latency}")
+    if args.promote:
+        promote(registry, version)
+        print(f"Active model: {version} (was {parent or 'flat layout'})")
     print(f"Fuel targets: {len(fuel_cols)}")
     print(f"Features:     {len(feature_cols)} (fuel={len(fuel_cols)} + time={len(time_cols)})")
 
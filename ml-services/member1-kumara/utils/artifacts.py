@@ -0,0 +1,214 @@
+# utils/artifacts.py
+"""
+Read-only model artifacts shared between API worker processes.
+
+Numeric artifacts are stored as "bundles": a directory of .npy arrays plus a
+meta.json, opened with mmap_mode="r". Every uvicorn worker that opens the same
+bundle maps the same page-cache pages, so N workers hold one physical copy
+(reported as shared memory, not per-worker RSS growth).
+
+- the compact RF (utils/forest.py) is a bundle
+- the MinMax scalers are converted from their pickles to bundles on first
+  load (keyed by the pickle's hash, so retraining invalidates them)
+
+The Keras LSTM is not covered: TensorFlow copies weights into its own
+per-process tensors, so each worker keeps a private copy of those.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+from utils.config import SHARED_ARTIFACTS_DIR
+
+# name -> bytes of every bundle array mapped by this process (for /health)
+_MAPPED = {}
+
+
+def _write_bundle(out_dir: Path, arrays: dict, meta: dict):
+    out_dir.mkdir(parents=True)
+    for name, arr in arrays.items():
+        np.save(out_dir / f"{name}.npy", np.ascontiguousarray(arr))
+    (out_dir / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+
+def save_bundle(out_dir: Path, arrays: dict, meta: dict) -> Path:
+    """
+    Write arrays as .npy files plus meta.json into out_dir, replacing any
+    bundle already there.
+
+    The bundle is built in a temp dir next to out_dir and renamed into place;
+    an existing bundle is renamed aside first and then deleted. Its files are
+    never rewritten, so workers that have them mapped keep reading the old
+    arrays (the unlinked inodes live until they unmap) instead of taking a
+    SIGBUS or mixing new arrays with the old meta.json.
+    """
+    out_dir = Path(out_dir)
+    tmp_dir = out_dir.with_name(f".{out_dir.name}.tmp{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    try:
+        _write_bundle(tmp_dir, arrays, meta)
+        if out_dir.exists():
+            old_dir = out_dir.with_name(f".{out_dir.name}.old{os.getpid()}")
+            shutil.rmtree(old_dir, ignore_errors=True)
+            os.replace(out_dir, old_dir)
+            try:
+                os.replace(tmp_dir, out_dir)
+            except OSError:
+                os.replace(old_dir, out_dir)
+                raise
+            shutil.rmtree(old_dir, ignore_errors=True)
+        else:
+            os.replace(tmp_dir, out_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return out_dir
+
+
+def load_bundle(bundle_dir: Path, names, mmap: bool = True) -> tuple[dict, dict]:
+    """Open a bundle; returns (arrays by name, meta). Arrays are read-only memmaps."""
+    bundle_dir = Path(bundle_dir)
+    meta_path = bundle_dir / "meta.json"
+    if not meta_path.exists():
+        raise FileNotFoundError(f"Missing artifact meta: {meta_path}")
+
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    mode = "r" if mmap else None
+    arrays = {name: np.load(bundle_dir / f"{name}.npy", mmap_mode=mode) for name in names}
+
+    if mmap:
+        _MAPPED[bundle_dir.name] = int(sum(a.nbytes for a in arrays.values()))
+    return arrays, meta
+
+
+def _file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class SharedMinMaxScaler:
+    """MinMaxScaler.transform / inverse_transform over mmapped scale_ / min_."""
+
+    def __init__(self, arrays: dict, meta: dict):
+        self.scale_ = arrays["scale_"]
+        self.min_ = arrays["min_"]
+        self.feature_range = tuple(meta["feature_range"])
+        self.clip = bool(meta.get("clip", False))
+
+    @staticmethod
+    def _as_float(X) -> np.ndarray:
+        # same dtype rule as sklearn: keep float32/float64, otherwise float64
+        X = np.asarray(X)
+        dtype = X.dtype if X.dtype in (np.float32, np.float64) else np.float64
+        return np.array(X, dtype=dtype, copy=True)
+
+    def transform(self, X) -> np.ndarray:
+        X = self._as_float(X)
+        X *= self.scale_
+        X += self.min_
+        if self.clip:
+            np.clip(X, self.feature_range[0], self.feature_range[1], out=X)
+        return X
+
+    def inverse_transform(self, X) -> np.ndarray:
+        X = self._as_float(X)
+        X -= self.min_
+        X /= self.scale_
+        return X
+
+
+def load_minmax_scaler(pkl_path: Path, shared_dir: Path = SHARED_ARTIFACTS_DIR):
+    """
+    A MinMaxScaler pickle as a SharedMinMaxScaler, converting it to a bundle
+    under shared_dir on first use. Anything that is not a MinMaxScaler is
+    returned as the unpickled object.
+    """
+    pkl_path = Path(pkl_path)
+    bundle_dir = Path(shared_dir) / f"{pkl_path.stem}-{_file_sha256(pkl_path)[:16]}"
+
+    if not (bundle_dir / "meta.json").exists():
+        from joblib import load
+        from sklearn.preprocessing import MinMaxScaler
+
+        scaler = load(pkl_path)
+        if not isinstance(scaler, MinMaxScaler):
+            return scaler
+
+        # build in a private temp dir, then rename: concurrent workers never
+        # see a half-written bundle
+        tmp_dir = bundle_dir.with_name(f"{bundle_dir.name}.tmp{os.getpid()}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        _write_bundle(
+            tmp_dir,
+            {"scale_": scaler.scale_, "min_": scaler.min_},
+            {"source": pkl_path.name, "feature_range": list(scaler.feature_range), "clip": bool(scaler.clip)},
+        )
+        try:
+            os.replace(tmp_dir, bundle_dir)
+        except OSError:
+            # another worker won the race; use its bundle
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    arrays, meta = load_bundle(bundle_dir, ("scale_", "min_"))
+    return SharedMinMaxScaler(arrays, meta)
+
+
+def _read_kb_fields(path: str, fields) -> dict:
+    out = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in fields:
+                    out[key] = int(rest.split()[0])
+    except OSError:
+        pass
+    return out
+
+
+def _mb(kb: int) -> float:
+    return round(kb / 1024.0, 1)
+
+
+def process_memory() -> dict:
+    """
+    Memory of this worker process from /proc (Linux), in MB.
+
+    private_mb is what this worker alone costs; shared_mb are pages also mapped
+    by other processes (mmapped artifacts, shared libraries); pss_mb splits
+    shared pages evenly between the processes mapping them.
+    """
+    info = {"pid": os.getpid()}
+    status = _read_kb_fields("/proc/self/status", {"VmRSS", "VmHWM", "RssAnon", "RssFile"})
+    if not status:
+        info["available"] = False
+        return info
+
+    info.update({
+        "available": True,
+        "rss_mb": _mb(status.get("VmRSS", 0)),
+        "peak_rss_mb": _mb(status.get("VmHWM", 0)),
+        "anon_mb": _mb(status.get("RssAnon", 0)),
+        "file_backed_mb": _mb(status.get("RssFile", 0)),
+    })
+
+    rollup = _read_kb_fields(
+        "/proc/self/smaps_rollup",
+        {"Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty"},
+    )
+    if rollup:
+        info.update({
+            "pss_mb": _mb(rollup.get("Pss", 0)),
+            "private_mb": _mb(rollup.get("Private_Clean", 0) + rollup.get("Private_Dirty", 0)),
+            "shared_mb": _mb(rollup.get("Shared_Clean", 0) + rollup.get("Shared_Dirty", 0)),
+        })
+
+    info["mapped_artifacts_mb"] = {name: round(n / (1024 * 1024), 3) for name, n in _MAPPED.items()}
+    return info
@@ -0,0 +1,105 @@
+# utils/backtest.py
+"""
+Rolling-origin backtest of FuelDemandPredictor.
+
+An origin t replays forecast_days(history.iloc[:t]) and compares it with the
+known days history.iloc[t:t + H]. All origins (and tanks) go through
+predictor.forecast_origins(): the history is scaled once and every origin
+advances in the same batched rollout, so a backtest costs about as many model
+calls as a single forecast.
+
+The recursive forecast of H days is the first H days of a longer rollout, so
+horizons without a direct head share one rollout of the longest of them;
+horizons with a head (method "auto" / "direct") get one head pass each.
+
+Errors are accumulated as sums (absolute error, absolute percentage error
+over days with demand > 0, point counts) so chunks computed in separate
+processes merge by addition; summarize() turns them into MAE / MAPE per fuel
+and horizon.
+"""
+
+import numpy as np
+
+
+def origin_grid(n_rows: int, lookback: int, horizon: int, step: int = 1, max_origins: int | None = None) -> np.ndarray:
+    """Origins t with a full lookback before and `horizon` known days after; the latest max_origins when set."""
+    origins = np.arange(n_rows - horizon, lookback - 1, -max(1, step), dtype=np.int64)[::-1]
+    return origins[-max_origins:] if max_origins else origins
+
+
+def _accumulate(pred: np.ndarray, actual: np.ndarray) -> dict:
+    """(K, H, n_fuels) forecasts vs actuals -> per-fuel error sums."""
+    err = np.abs(pred - actual)
+    demand = actual > 0
+    ape = np.where(demand, err / np.where(demand, actual, 1.0), 0.0)
+    return {
+        "abs_err": err.sum(axis=(0, 1)),
+        "points": np.full(err.shape[-1], err.shape[0] * err.shape[1], dtype=np.int64),
+        "ape": ape.sum(axis=(0, 1)),
+        "ape_points": demand.sum(axis=(0, 1)),
+    }
+
+
+def backtest_errors(predictor, series: list, horizons, method: str = "auto") -> dict:
+    """
+    series: [(history sorted by Date, origins, tank)]; every origin needs
+    max(horizons) known days after it.
+    Returns {horizon: {"method": used, **error sums}}.
+    """
+    horizons = sorted(set(int(h) for h in horizons))
+    direct = {h for h in horizons if predictor._head_for(h, method) is not None}
+    recursive = [h for h in horizons if h not in direct]
+
+    runs = {h: h for h in direct}
+    if recursive:
+        runs.update({h: max(recursive) for h in recursive})
+
+    actual_all = np.concatenate([
+        np.stack([hist[predictor.fuel_cols].to_numpy(dtype=np.float64)[t:t + max(horizons)] for t in origins])
+        for hist, origins, _ in series if len(origins)
+    ])
+
+    out, cache = {}, {}
+    for h in horizons:
+        days = runs[h]
+        if days not in cache:
+            cache[days] = predictor.forecast_origins(series, days, method="recursive" if h in recursive else method)
+        preds, used = cache[days]
+        out[h] = {"method": used, **_accumulate(preds[:, :h], actual_all[:, :h])}
+    return out
+
+
+def merge_errors(parts: list) -> dict:
+    """Sum backtest_errors() results of disjoint origin chunks."""
+    merged = {}
+    for part in parts:
+        for h, acc in part.items():
+            if h not in merged:
+                merged[h] = dict(acc)
+                continue
+            for key in ("abs_err", "points", "ape", "ape_points"):
+                merged[h][key] = merged[h][key] + acc[key]
+    return merged
+
+
+def _metrics(abs_err, points, ape, ape_points) -> dict:
+    return {
+        "mae": round(float(abs_err / points), 4) if points else None,
+        "mape": round(float(ape / ape_points), 4) if ape_points else None,
+    }
+
+
+def summarize(errors: dict, fuel_cols: list) -> dict:
+    """Error sums -> {horizon: {"method", "all": {mae, mape}, "fuels": {fuel: {mae, mape}}}}."""
+    report = {}
+    for h in sorted(errors):
+        acc = errors[h]
+        report[str(h)] = {
+            "method": acc["method"],
+            "all": _metrics(acc["abs_err"].sum(), acc["points"].sum(), acc["ape"].sum(), acc["ape_points"].sum()),
+            "fuels": {
+                fc: _metrics(acc["abs_err"][j], acc["points"][j], acc["ape"][j], acc["ape_points"][j])
+                for j, fc in enumerate(fuel_cols)
+            },
+        }
+    return report
@@ -1,4 +1,5 @@
 # utils/config.py
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parents[1]
@@ -7,16 +8,52 @@ DATA_RAW_DIR = BASE_DIR / "data" / "raw"
 DATA_PROCESSED_DIR = BASE_DIR / "data" / "processed"
 MODELS_DIR = BASE_DIR / "models"
 
+# Parsed uploads, keyed by the SHA-256 of the uploaded file
+INGEST_STORE_DIR = BASE_DIR / "data" / "ingest_store"
+
 PROCESSED_DAILY_CSV = DATA_PROCESSED_DIR / "fuel_daily_pivot.csv"
 MODEL_PATH = MODELS_DIR / "fuel_lstm.keras"
 SCALER_X_PATH = MODELS_DIR / "scaler_X.pkl"
 SCALER_Y_PATH = MODELS_DIR / "scaler_y.pkl"
 MODEL_META_PATH = MODELS_DIR / "model_meta.json"
 
+# Global multi-tank model (scripts.train_lstm --global): same artifact
+# names as above, in their own folder, trained on the per-tank history
+# (the fuel tanks of the one site in the dispensing reports)
+TANK_DAILY_CSV = DATA_PROCESSED_DIR / "fuel_daily_tanks.csv"
+GLOBAL_MODELS_DIR = MODELS_DIR / "global"
+
+# Direct multi-horizon heads (scripts.train_lstm --horizon H) live in
+# <models dir>/direct/h<H>; the 365-day head predicts ANNUAL_BLOCKS block totals
+DIRECT_HEADS_DIRNAME = "direct"
+ANNUAL_BLOCKS = 12
+
+# models/ and models/global/ are version registries (utils/registry.py); the
+# API loads the active version unless one is pinned here
+MODEL_VERSION = os.environ.get("FUELWATCH_MODEL_VERSION") or None
+GLOBAL_MODEL_VERSION = os.environ.get("FUELWATCH_GLOBAL_MODEL_VERSION") or None
+
+# mmapped copies of model artifacts shared by API workers (utils/artifacts.py)
+SHARED_ARTIFACTS_DIR = MODELS_DIR / "shared"
+
+# Per-request profiles (api/profiling.py); profiling is off unless an admin
+# token is configured
+PROFILE_DIR = BASE_DIR / "data" / "profiles"
+PROFILE_ADMIN_TOKEN = os.environ.get("FUELWATCH_ADMIN_TOKEN") or None
+
+# Upload limits (override with env vars, in MB)
+MAX_PDF_UPLOAD_BYTES = int(float(os.environ.get("MAX_PDF_UPLOAD_MB", "25")) * 1024 * 1024)
+MAX_REPORT_UPLOAD_BYTES = int(float(os.environ.get("MAX_REPORT_UPLOAD_MB", "50")) * 1024 * 1024)
+
 # Defaults (can tune later)
 LOOKBACK_DAYS = 14
 FORECAST_DAYS_WEEKLY = 7
 FORECAST_DAYS_MONTHLY = 30
 FORECAST_DAYS_ANNUAL = 365
+MODE_DAYS = {
+    "weekly": FORECAST_DAYS_WEEKLY,
+    "monthly": FORECAST_DAYS_MONTHLY,
+    "annual": FORECAST_DAYS_ANNUAL,
+}
 
 RANDOM_SEED = 42
@@ -0,0 +1,200 @@
+# utils/forest.py
+"""
+Compact, memory-mappable RandomForest predictor for the misbehavior scorer.
+
+export_forest flattens a fitted sklearn RandomForestClassifier (and optionally
+its StandardScaler) into a directory of plain .npy arrays:
+
+    feature.npy    int32   (n_nodes,)            split feature (0 at leaves)
+    threshold.npy  float64 (n_nodes,)            split threshold (+inf at leaves)
+    children.npy   int32   (n_nodes, 2)          global index of left / right child
+    value.npy      float64 (n_classes, n_nodes)  class probabilities per node
+    roots.npy      int32   (n_trees,)            global index of each tree's root
+    depth.npy      int32   (n_trees,)            depth of each tree
+    scaler_mean.npy / scaler_scale.npy           optional StandardScaler stats
+    meta.json                                    classes, depth, feature names,
+                                                 sha256 of the source pickles
+
+Trees are stored deepest first and leaves point to themselves with
+threshold=+inf. Prediction walks all trees one level at a time over a whole
+batch; at level d only the prefix of trees deeper than d is advanced, so
+shallow trees stop costing work once their samples have reached a leaf.
+The export is a utils.artifacts bundle opened with mmap_mode="r": several
+API workers loading it share the OS page cache instead of each unpickling a
+forest.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+from utils.artifacts import _file_sha256, load_bundle, save_bundle
+
+FOREST_FORMAT_VERSION = 1
+
+_ARRAYS = ("feature", "threshold", "children", "value", "roots", "depth")
+
+
+def export_forest(rf, out_dir: Path, scaler=None, feature_names=None, source_paths=()) -> Path:
+    """
+    Write a fitted RandomForestClassifier (+ optional StandardScaler) to
+    out_dir. source_paths are the pickles rf / scaler were loaded from; their
+    sha256 is recorded so CompactForest.stale_sources can spot a retrain.
+    """
+    if getattr(rf, "n_outputs_", 1) != 1:
+        raise ValueError("Only single-output forests can be exported")
+
+    features, thresholds, children, values, roots, depths = [], [], [], [], [], []
+    offset = 0
+
+    # deepest trees first (the sum over trees is order-independent)
+    estimators = sorted(rf.estimators_, key=lambda e: e.tree_.max_depth, reverse=True)
+
+    for est in estimators:
+        t = est.tree_
+        n = t.node_count
+        idx = np.arange(n, dtype=np.int64) + offset
+        is_leaf = t.children_left == -1
+
+        features.append(np.where(is_leaf, 0, t.feature).astype(np.int32))
+        thresholds.append(np.where(is_leaf, np.inf, t.threshold).astype(np.float64))
+        children.append(np.column_stack([
+            np.where(is_leaf, idx, t.children_left + offset),
+            np.where(is_leaf, idx, t.children_right + offset),
+        ]).astype(np.int32))
+
+        # per-node class distribution -> probabilities, as tree.predict_proba does
+        v = t.value[:, 0, :].astype(np.float64)
+        totals = v.sum(axis=1, keepdims=True)
+        totals[totals == 0.0] = 1.0
+        values.append(v / totals)
+
+        roots.append(offset)
+        depths.append(int(t.max_depth))
+        offset += n
+
+    if offset >= np.iinfo(np.int32).max:
+        raise ValueError("Forest too large for int32 node indices")
+
+    arrays = {
+        "feature": np.concatenate(features),
+        "threshold": np.concatenate(thresholds),
+        "children": np.concatenate(children),
+        "value": np.concatenate(values).T,  # class-major: one contiguous row per class
+        "roots": np.asarray(roots, dtype=np.int32),
+        "depth": np.asarray(depths, dtype=np.int32),
+    }
+    if scaler is not None:
+        arrays["scaler_mean"] = np.asarray(scaler.mean_, dtype=np.float64)
+        arrays["scaler_scale"] = np.asarray(scaler.scale_, dtype=np.float64)
+
+    meta = {
+        "format_version": FOREST_FORMAT_VERSION,
+        "n_trees": len(roots),
+        "n_nodes": int(offset),
+        "n_features": int(rf.n_features_in_),
+        "max_depth": max(depths, default=0),
+        "classes": [c.item() if hasattr(c, "item") else c for c in rf.classes_],
+        "feature_names": list(feature_names) if feature_names is not None else None,
+        "has_scaler": scaler is not None,
+        "sources": {Path(p).name: _file_sha256(Path(p)) for p in source_paths},
+    }
+    return save_bundle(out_dir, arrays, meta)
+
+
+class ExportedScaler:
+    """StandardScaler.transform from exported mean_/scale_ (no sklearn object)."""
+
+    def __init__(self, mean: np.ndarray, scale: np.ndarray):
+        self.mean_ = mean
+        self.scale_ = scale
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+
+class CompactForest:
+    """Vectorized predict_proba over a forest exported with export_forest."""
+
+    def __init__(self, model_dir: Path, mmap: bool = True):
+        model_dir = Path(model_dir)
+        meta_path = model_dir / "meta.json"
+        if not meta_path.exists():
+            raise FileNotFoundError(f"Missing compact forest meta: {meta_path}")
+
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if meta.get("format_version") != FOREST_FORMAT_VERSION:
+            raise ValueError(f"Unsupported compact forest format: {meta.get('format_version')}")
+
+        names = _ARRAYS + (("scaler_mean", "scaler_scale") if meta.get("has_scaler") else ())
+        arrays, self.meta = load_bundle(model_dir, names, mmap=mmap)
+        for name in _ARRAYS:
+            setattr(self, name, arrays[name])
+
+        self.scaler = None
+        if self.meta.get("has_scaler"):
+            self.scaler = ExportedScaler(arrays["scaler_mean"], arrays["scaler_scale"])
+
+        self.classes_ = np.asarray(self.meta["classes"])
+        self.n_trees = int(self.meta["n_trees"])
+        self.n_features = int(self.meta["n_features"])
+        self.max_depth = int(self.meta["max_depth"])
+        self.feature_names = self.meta.get("feature_names")
+
+        # _active[d] = number of trees with depth > d (trees are deepest first)
+        depth = np.asarray(self.depth)
+        self._active = [int(np.count_nonzero(depth > d)) for d in range(self.max_depth)]
+        self._child = self.children.reshape(-1)  # [2*i] left, [2*i + 1] right
+
+    def stale_sources(self, *paths: Path) -> list[str]:
+        """
+        Names of the given pickles that exist but are not the ones this
+        forest was exported from (changed since, or not recorded at all).
+        """
+        recorded = self.meta.get("sources") or {}
+        stale = []
+        for path in map(Path, paths):
+            if path.exists() and recorded.get(path.name) != _file_sha256(path):
+                stale.append(path.name)
+        return stale
+
+    def _leaves(self, X32: np.ndarray) -> np.ndarray:
+        """Leaf index reached in every tree: (n_trees, n_samples)."""
+        n = len(X32)
+        # feature-major copy so one feature's values are contiguous
+        Xt = np.ascontiguousarray(X32.T)
+        roots = np.asarray(self.roots, dtype=np.intp)
+        if self.max_depth == 0:
+            return np.repeat(roots[:, None], n, axis=1)
+
+        # level 0: each tree's root split is a whole-column comparison.
+        # float32 input vs float64 threshold, same comparison sklearn makes.
+        go_right = ~(Xt[self.feature[roots]] <= self.threshold[roots][:, None])
+        node = self._child[(2 * roots)[:, None] + go_right]
+
+        flat = Xt.reshape(-1)
+        cols = np.arange(n, dtype=np.intp)
+        for level in range(1, self.max_depth):
+            k = self._active[level]  # trees deeper than this level
+            cur = node[:k]
+            go_right = ~(flat[self.feature[cur] * n + cols] <= self.threshold[cur])
+            node[:k] = self._child[2 * cur + go_right]
+        return node
+
+    def predict_proba(self, X: np.ndarray, batch_size: int = 1024) -> np.ndarray:
+        """
+        Mean of per-tree leaf probabilities, like RandomForestClassifier.predict_proba.
+        X must already be scaled and free of NaN (the API fills NaN with 0).
+        """
+        X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected X with {self.n_features} features, got shape {X.shape}")
+
+        X32 = X.astype(np.float32)
+        out = np.empty((len(X32), len(self.classes_)), dtype=np.float64)
+        for start in range(0, len(X32), batch_size):
+            leaves = self._leaves(X32[start:start + batch_size])
+            for c in range(len(self.classes_)):
+                out[start:start + batch_size, c] = self.value[c].take(leaves).sum(axis=0) / self.n_trees
+        return out
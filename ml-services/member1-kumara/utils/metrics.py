@@ -0,0 +1,51 @@
+# utils/metrics.py
+"""
+Prometheus-style metrics of the forecast / misbehavior API. The metric
+types, render() and the FUELWATCH_METRICS switch are shared/metrics.py.
+
+    with stage("parse"):
+        ...
+    UPLOAD_BYTES.observe(size, endpoint="/forecast")
+    CACHE_EVENTS.inc(cache="ingest", result="hit")
+
+GET /metrics returns render(); values are per uvicorn worker.
+"""
+
+from shared.metrics import CONTENT_TYPE, METRICS_ENABLED, Counter, Gauge, Histogram, render, stage_timer  # noqa: F401
+
+# seconds; covers sub-ms RF scoring up to multi-second annual forecasts
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# bytes; 1 KB .. 64 MB
+SIZE_BUCKETS = tuple(float(1024 * 4 ** i) for i in range(10))
+
+# ----------------------------------------------------------------
+# Service metrics
+# ----------------------------------------------------------------
+STAGE_SECONDS = Histogram(
+    "fuelwatch_stage_seconds",
+    "Time spent per pipeline stage (upload, parse, prepare_data, history_load, feature_build, inference, rule_scoring, serialization).",
+    ("stage",), buckets=LATENCY_BUCKETS,
+)
+REQUEST_SECONDS = Histogram(
+    "fuelwatch_request_seconds", "End-to-end request latency.", ("endpoint", "status"),
+    buckets=LATENCY_BUCKETS,
+)
+UPLOAD_BYTES = Histogram(
+    "fuelwatch_upload_bytes", "Size of accepted uploads.", ("endpoint",), buckets=SIZE_BUCKETS,
+)
+UPLOADS_REJECTED = Counter(
+    "fuelwatch_uploads_rejected_total", "Uploads rejected before parsing.", ("endpoint", "status"),
+)
+CACHE_EVENTS = Counter(
+    "fuelwatch_cache_total", "Ingest store / forecast cache lookups.", ("cache", "result"),
+)
+ROWS_SCORED = Histogram(
+    "fuelwatch_rows_scored", "Daily rows scored per /ml/score-report call.", (),
+    buckets=(1, 10, 50, 100, 500, 1000, 5000, 10000, 50000),
+)
+MODEL_LOADED = Gauge(
+    "fuelwatch_model_loaded", "1 if the model is loaded in this worker.", ("model", "backend"),
+)
+
+# with stage("inference"): ... times one stage into STAGE_SECONDS
+stage = stage_timer(STAGE_SECONDS)
@@ -1,8 +1,11 @@
 # utils/pdf_parser.py
 
+import logging
 import re
 import pdfplumber
 
+logger = logging.getLogger(__name__)
+
 # Example patterns (adjust to your PDF format)
 # These are common examples: "Petrol 92  1200" or "Diesel: 4500"
 FUEL_LINE_REGEX = re.compile(
@@ -67,7 +70,6 @@ def extract_fuel_data_from_pdf(pdf_path: str):
         if not results:
             # Print first-page preview to help you tune regex/table logic
             first_text = (pdf.pages[0].extract_text() or "")[:1000]
-            print("⚠️ No fuel data found. First page text preview:")
-            print(first_text)
+            logger.warning("No fuel data found. First page text preview:\n%s", first_text)
 
         return results
@@ -1,12 +1,25 @@
 # utils/predictor.py
 import json
+import logging
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 from pathlib import Path
-from joblib import load
+
+from utils.tf_runtime import configure_runtime, make_step_fn, with_precision
+
+# thread pools / oneDNN have to be fixed before TensorFlow initializes
+TF_RUNTIME = configure_runtime()
+
 import tensorflow as tf
 
-from utils.config import LOOKBACK_DAYS
+from utils.config import LOOKBACK_DAYS, DIRECT_HEADS_DIRNAME, MODE_DAYS
+from utils.artifacts import load_minmax_scaler
+from utils.registry import resolve
+
+logger = logging.getLogger(__name__)
+
+FORECAST_METHODS = ("auto", "recursive", "direct")
 
 
 @tf.keras.utils.register_keras_serializable()
@@ -52,9 +65,27 @@ def compute_floor_from_history(series: np.ndarray) -> float:
 
 
 class FuelDemandPredictor:
-    def __init__(self):
+    """
+    Recursive daily forecast from the trained LSTM.
+
+    models_dir defaults to models/. When it is a registry (utils/registry.py)
+    the active version is loaded, or `version` when given. A global model (models/global, from
+    scripts.train_lstm --global) also takes a tank id; forecast_tanks()
+    rolls out many tanks together, one batched model call per day.
+
+    Direct heads found in <models_dir>/direct/h<H> (train_lstm --horizon H)
+    answer an H-day forecast in one forward pass; method="auto" uses them
+    when present, "recursive" / "direct" force a path.
+    """
+
+    ALPHA = 0.7
+
+    def __init__(self, models_dir: Path | None = None, load_heads: bool = True, version: str | None = None):
         base_dir = Path(__file__).resolve().parents[1]
-        models_dir = base_dir / "models"
+        models_dir = Path(models_dir) if models_dir is not None else base_dir / "models"
+        # every artifact below comes from this one directory
+        models_dir, self.version = resolve(models_dir, version)
+        self.models_dir = models_dir
 
         self.model_path = models_dir / "fuel_lstm.keras"
         self.scaler_x_path = models_dir / "scaler_X.pkl"
@@ -67,27 +98,52 @@ class FuelDemandPredictor:
             )
 
         with open(self.meta_path, "r", encoding="utf-8") as f:
-            self.meta = json.load(f)
-
-        self.lookback = int(self.meta.get("lookback_days", LOOKBACK_DAYS))
-        self.feature_cols = self.meta["feature_cols"]
-        self.fuel_cols = self.meta["fuel_cols"]
-        self.time_cols = self.meta["time_cols"]
+            meta = json.load(f)
+        self._init_meta(meta)
 
         self.model = tf.keras.models.load_model(self.model_path, compile=False)
-        self.scaler_X = load(self.scaler_x_path)
-        self.scaler_y = load(self.scaler_y_path)
-
-    def _row_features_from_state(self, date: pd.Timestamp, fuel_values: dict) -> list:
-        tfv = make_time_features_for_date(date)
-
-        row = {}
-        for fc in self.fuel_cols:
-            row[fc] = float(fuel_values.get(fc, 0.0))
-        for tc in self.time_cols:
-            row[tc] = float(tfv[tc])
-
-        return [row[c] for c in self.feature_cols]
+        self._init_runtime()
+        # mmapped, shared with the other API workers
+        self.scaler_X = load_minmax_scaler(self.scaler_x_path)
+        self.scaler_y = load_minmax_scaler(self.scaler_y_path)
+
+        self.direct_heads = self._load_direct_heads(models_dir) if load_heads else {}
+
+    def _init_meta(self, meta: dict):
+        self.meta = meta
+        self.lookback = int(meta.get("lookback_days", LOOKBACK_DAYS))
+        self.feature_cols = meta["feature_cols"]
+        self.fuel_cols = meta["fuel_cols"]
+        self.time_cols = meta["time_cols"]
+        # global model: tank i + 1 -> tanks[i], 0 = unknown tank
+        self.is_global = meta.get("model_type") == "global"
+        self.tank_col = meta.get("tank_col", "tank_id")
+        self.tanks = list(meta.get("tanks") or [])
+        self._tank_index = {s: i + 1 for i, s in enumerate(self.tanks)}
+        self._fuel_pos = [self.feature_cols.index(c) for c in self.fuel_cols]
+        self._time_pos = [self.feature_cols.index(c) for c in self.time_cols]
+        self.horizon = int(meta.get("horizon", 1))
+        self.target_blocks = meta.get("target_blocks")
+        self.direct_heads = {}
+
+    @staticmethod
+    def _load_direct_heads(models_dir: Path) -> dict:
+        heads = {}
+        for horizon in sorted(set(MODE_DAYS.values())):
+            head_dir = Path(models_dir) / DIRECT_HEADS_DIRNAME / f"h{horizon}"
+            if not (head_dir / "model_meta.json").exists():
+                continue
+            try:
+                heads[horizon] = FuelDemandPredictor(head_dir, load_heads=False)
+            except Exception as e:
+                logger.warning("Direct %d-day head not loaded: %s", horizon, e)
+        return heads
+
+    def _init_runtime(self):
+        """Inference copy of the model (precision) and the compiled step function."""
+        self.runtime = TF_RUNTIME
+        self.infer_model = with_precision(self.model, self.runtime["precision"])
+        self._step = make_step_fn(self.infer_model, self.model.input_shape, xla=self.runtime["xla"])
 
     def _normalize_fuel_filter(self, fuel_filter):
         if not fuel_filter:
@@ -117,11 +173,12 @@ class FuelDemandPredictor:
                 floors[fc] = 0.0
         return floors
 
-    def forecast_days(self, history_df: pd.DataFrame, days: int, fuel_filter=None) -> pd.DataFrame:
-        selected_fuels = self._normalize_fuel_filter(fuel_filter)
+    def tank_id(self, tank) -> int:
+        """Embedding index of a tank; 0 (unknown) for new tanks or non-global models."""
+        return self._tank_index.get(str(tank).strip(), 0) if tank is not None else 0
 
-        hist = history_df.copy()
-        hist["Date"] = pd.to_datetime(hist["Date"])
+    def _prepare_history(self, hist: pd.DataFrame):
+        """Sorted history -> (scaled lookback window, last fuel values, floors, last date)."""
         hist = hist.sort_values("Date").reset_index(drop=True)
 
         floors = self._compute_floors(hist)
@@ -135,78 +192,250 @@ class FuelDemandPredictor:
             raise ValueError(f"History is missing required columns: {missing_cols}")
 
         feats = hist_tail[self.feature_cols].values.astype(np.float32)
-        feats_scaled = self.scaler_X.transform(feats)
-
-        last_date = pd.to_datetime(hist_tail["Date"].iloc[-1])
-        preds = []
-
-        last_fuel_vals = {fc: float(hist_tail[fc].iloc[-1]) for fc in self.fuel_cols}
-        seq = feats_scaled.copy()
-
-        ALPHA = 0.7
+        last_vals = [float(hist_tail[fc].iloc[-1]) for fc in self.fuel_cols]
+        return (
+            feats,
+            np.array(last_vals, dtype=np.float64),
+            np.array([float(floors.get(fc, 0.0)) for fc in self.fuel_cols], dtype=np.float64),
+            pd.to_datetime(hist_tail["Date"].iloc[-1]),
+        )
+
+    def _time_rows(self, dates) -> np.ndarray:
+        """Time-feature rows for a list of dates (computed once per distinct date)."""
+        cache = {}
+        rows = np.empty((len(dates), len(self.time_cols)), dtype=np.float64)
+        for k, d in enumerate(dates):
+            if d not in cache:
+                tfv = make_time_features_for_date(d)
+                cache[d] = [float(tfv[tc]) for tc in self.time_cols]
+            rows[k] = cache[d]
+        return rows
+
+    def _scale_windows(self, feats: np.ndarray) -> np.ndarray:
+        S = feats.shape[0]
+        return self.scaler_X.transform(feats.reshape(S * self.lookback, -1)).reshape(S, self.lookback, -1)
+
+    def _rollout(self, feats: np.ndarray, last_vals: np.ndarray, floors: np.ndarray,
+                 last_dates: list, days: int, tank_ids=None, scaled: bool = False) -> np.ndarray:
+        """
+        Recursive forecast for S series at once.
+
+        feats: (S, lookback, n_features) history windows (already through
+        scaler_X when scaled=True)
+        last_vals / floors: (S, n_fuels)
+        returns (S, days, n_fuels) post-processed daily predictions
+        """
+        S = feats.shape[0]
+        seq = feats if scaled else self._scale_windows(feats)
+        tank_in = None
+        if self.is_global:
+            tank_in = np.zeros(S, dtype=np.int32) if tank_ids is None else np.asarray(tank_ids, dtype=np.int32)
+
+        out = np.empty((S, days, len(self.fuel_cols)), dtype=np.float64)
+        last = last_vals
+        ALPHA = self.ALPHA
 
         for i in range(1, days + 1):
-            next_date = last_date + pd.Timedelta(days=i)
-
-            x_in = seq.reshape(1, self.lookback, seq.shape[-1])
-            yhat_scaled = self.model.predict(x_in, verbose=0)[0]
-            yhat = self.scaler_y.inverse_transform(yhat_scaled.reshape(1, -1))[0]
-
-            pred_row = {"Date": next_date}
-            all_pred = {}
-
-            for j, fc in enumerate(self.fuel_cols):
-                raw_pred = float(yhat[j])
-                last_val = float(last_fuel_vals.get(fc, 0.0))
-
-                if not np.isfinite(raw_pred):
-                    raw_pred = last_val
-
-                safe_pred = max(raw_pred, 0.0)
-
-                floor = float(floors.get(fc, 0.0))
-                if floor > 0:
-                    safe_pred = max(safe_pred, floor)
+            yhat_scaled = self._step(seq) if tank_in is None else self._step(seq, tank_in)
+            raw = self.scaler_y.inverse_transform(yhat_scaled).astype(np.float64)
+
+            raw = np.where(np.isfinite(raw), raw, last)
+            safe = np.maximum(raw, 0.0)
+            safe = np.where(floors > 0, np.maximum(safe, floors), safe)
+            safe = ALPHA * safe + (1.0 - ALPHA) * last
+            out[:, i - 1] = safe
+            last = safe
+
+            next_dates = [d + pd.Timedelta(days=i) for d in last_dates]
+            next_feat = np.zeros((S, len(self.feature_cols)), dtype=np.float64)
+            next_feat[:, self._fuel_pos] = safe
+            next_feat[:, self._time_pos] = self._time_rows(next_dates)
+            next_scaled = self.scaler_X.transform(next_feat.astype(np.float32))
+
+            seq = np.concatenate([seq[:, 1:], next_scaled[:, None, :]], axis=1)
+
+        return out
+
+    def _direct(self, feats: np.ndarray, last_vals: np.ndarray, floors: np.ndarray, tank_ids=None,
+                scaled: bool = False) -> np.ndarray:
+        """
+        One forward pass of a direct head for S series; same post-processing
+        as the rollout. Block heads (365 days) predict block totals, which are
+        spread evenly over their days. Returns (S, horizon, n_fuels) daily.
+        """
+        S = feats.shape[0]
+        seq = feats if scaled else self._scale_windows(feats)
+        if self.is_global:
+            tank_in = np.zeros(S, dtype=np.int32) if tank_ids is None else np.asarray(tank_ids, dtype=np.int32)
+            yhat = self._step(seq, tank_in)
+        else:
+            yhat = self._step(seq)
+        n_fuels = len(self.fuel_cols)
+
+        if self.target_blocks:
+            # block sums of scaled days: sum(y) = (pred - n * min_) / scale_
+            n = np.asarray(self.target_blocks, dtype=np.float64)[None, :, None]
+            raw = (yhat.astype(np.float64) - n * np.asarray(self.scaler_y.min_)) / np.asarray(self.scaler_y.scale_)
+            raw = np.where(np.isfinite(raw), raw, last_vals[:, None, :] * n)
+            safe = np.maximum(raw, 0.0)
+            safe = np.where(floors[:, None, :] > 0, np.maximum(safe, floors[:, None, :] * n), safe)
+            return np.repeat(safe / n, np.asarray(self.target_blocks), axis=1)
+
+        days = self.scaler_y.inverse_transform(yhat.reshape(S * self.horizon, n_fuels)).astype(np.float64)
+        days = days.reshape(S, self.horizon, n_fuels)
+        out = np.empty_like(days)
+        last = last_vals
+        for i in range(self.horizon):
+            raw = np.where(np.isfinite(days[:, i]), days[:, i], last)
+            safe = np.maximum(raw, 0.0)
+            safe = np.where(floors > 0, np.maximum(safe, floors), safe)
+            safe = self.ALPHA * safe + (1.0 - self.ALPHA) * last
+            out[:, i] = safe
+            last = safe
+        return out
+
+    def _head_for(self, days: int, method: str):
+        """Direct head answering a days-long forecast under method, or None for the rollout."""
+        if method not in FORECAST_METHODS:
+            raise ValueError(f"method must be one of: {', '.join(FORECAST_METHODS)}")
+        head = self.direct_heads.get(days) if method != "recursive" else None
+        if method == "direct" and head is None:
+            raise ValueError(f"No direct {days}-day head loaded (train_lstm --horizon {days})")
+        return head
+
+    def _forecast(self, prepared: list, days: int, tank_names: list, method: str):
+        """
+        prepared: _prepare_history() tuples, one per series.
+        Returns ((S, days, n_fuels) predictions, method used).
+        """
+        head = self._head_for(days, method)
+
+        feats, last_vals, floors, last_dates = (list(x) for x in zip(*prepared))
+        if head is not None:
+            tank_ids = [head.tank_id(n) for n in tank_names]
+            return head._direct(np.stack(feats), np.stack(last_vals), np.stack(floors), tank_ids), "direct"
+
+        tank_ids = [self.tank_id(n) for n in tank_names]
+        preds = self._rollout(np.stack(feats), np.stack(last_vals), np.stack(floors), last_dates, days,
+                              tank_ids=tank_ids)
+        return preds, "recursive"
+
+    def _origin_inputs(self, hist: pd.DataFrame, origins: np.ndarray):
+        """
+        _prepare_history(hist.iloc[:t]) for every origin t, with the history
+        scaled once: (scaled windows, last values, floors, last dates).
+        """
+        missing_cols = [c for c in self.feature_cols if c not in hist.columns]
+        if missing_cols:
+            raise ValueError(f"History is missing required columns: {missing_cols}")
+        origins = np.asarray(origins, dtype=np.int64)
+        if len(origins) and (origins.min() < self.lookback or origins.max() > len(hist)):
+            raise ValueError(f"Origins must lie in [{self.lookback}, {len(hist)}] for this history.")
+
+        X = self.scaler_X.transform(hist[self.feature_cols].to_numpy(dtype=np.float32))
+        seq = sliding_window_view(X, self.lookback, axis=0).transpose(0, 2, 1)[origins - self.lookback]
+
+        y = hist[self.fuel_cols].to_numpy(dtype=np.float64)
+        span = max(self.lookback * 2, 30)
+        floors = np.array([[compute_floor_from_history(y[max(0, t - span):t, j]) for j in range(y.shape[1])]
+                           for t in origins], dtype=np.float64).reshape(len(origins), y.shape[1])
+        dates = pd.to_datetime(hist["Date"]).to_numpy()[origins - 1]
+        return seq, y[origins - 1], floors, [pd.Timestamp(d) for d in dates]
+
+    def forecast_origins(self, series: list, days: int, method: str = "auto"):
+        """
+        Forecasts from many origins in one batched rollout (one direct-head
+        pass when a head answers `days`), for backtests.
+
+        series: [(history DataFrame, origins, tank)], each history sorted by
+        Date. Row k of the result for origin t is
+        forecast_days(history.iloc[:t], days, tank=tank).
+        Returns ((total origins, days, n_fuels) predictions, method used).
+        """
+        head = self._head_for(days, method)
+        model = head if head is not None else self
+
+        parts = [model._origin_inputs(hist, origins) for hist, origins, _ in series]
+        seq = np.concatenate([p[0] for p in parts])
+        last_vals = np.concatenate([p[1] for p in parts])
+        floors = np.concatenate([p[2] for p in parts])
+        last_dates = [d for p in parts for d in p[3]]
+        tank_ids = np.concatenate([np.full(len(origins), model.tank_id(tank), dtype=np.int32)
+                                      for _, origins, tank in series])
+
+        if head is not None:
+            return head._direct(seq, last_vals, floors, tank_ids, scaled=True), "direct"
+        return self._rollout(seq, last_vals, floors, last_dates, days, tank_ids=tank_ids, scaled=True), "recursive"
+
+    def _daily_frame(self, preds: np.ndarray, out_fuels: list, method: str) -> pd.DataFrame:
+        """(days, n_fuels) predictions -> Date + fuel columns, dated from tomorrow; attrs["method"]."""
+        from datetime import date
+        today = pd.Timestamp(date.today())
+        frame = pd.DataFrame({"Date": [today + pd.Timedelta(days=i + 1) for i in range(len(preds))]})
+        for fc in out_fuels:
+            frame[fc] = preds[:, self.fuel_cols.index(fc)]
+        frame.attrs["method"] = method
+        return frame
+
+    def forecast_days(self, history_df: pd.DataFrame, days: int, fuel_filter=None, tank=None,
+                      method: str = "auto") -> pd.DataFrame:
+        selected_fuels = self._normalize_fuel_filter(fuel_filter)
 
-                safe_pred = ALPHA * safe_pred + (1.0 - ALPHA) * last_val
-                all_pred[fc] = float(safe_pred)
+        hist = history_df.copy()
+        hist["Date"] = pd.to_datetime(hist["Date"])
 
-            out_fuels = selected_fuels if selected_fuels is not None else self.fuel_cols
-            for fc in out_fuels:
-                pred_row[fc] = all_pred[fc]
+        preds, used = self._forecast([self._prepare_history(hist)], days, [tank], method)
 
-            preds.append(pred_row)
+        out_fuels = selected_fuels if selected_fuels is not None else self.fuel_cols
+        return self._daily_frame(preds[0], out_fuels, used)
 
-            last_fuel_vals = all_pred
-            next_feat_row = self._row_features_from_state(next_date, last_fuel_vals)
+    def forecast_tanks(self, history_df: pd.DataFrame, days: int, tanks=None, fuel_filter=None,
+                          method: str = "auto"):
+        """
+        Forecast several tanks in one batched rollout.
 
-            next_feat_scaled = self.scaler_X.transform(
-                np.array(next_feat_row, dtype=np.float32).reshape(1, -1)
-            )[0]
+        history_df holds every tank's daily history with a tank column.
+        tanks=None forecasts every tank in the history. Returns
+        ({tank: daily DataFrame}, {tank: reason skipped}); tanks with
+        less than `lookback` days of history are skipped.
+        """
+        if self.tank_col not in history_df.columns:
+            raise ValueError(f"History is missing the tank column '{self.tank_col}'")
+        selected_fuels = self._normalize_fuel_filter(fuel_filter)
+        out_fuels = selected_fuels if selected_fuels is not None else self.fuel_cols
 
-            seq = np.vstack([seq[1:], next_feat_scaled])
+        hist = history_df.copy()
+        hist["Date"] = pd.to_datetime(hist["Date"])
+        hist[self.tank_col] = hist[self.tank_col].astype(str).str.strip()
+        groups = dict(tuple(hist.groupby(self.tank_col, sort=True)))
+        wanted = [str(s).strip() for s in tanks] if tanks else list(groups)
+
+        names, prepared, skipped = [], [], {}
+        for name in wanted:
+            if name not in groups:
+                skipped[name] = "no history for this tank"
+                continue
+            try:
+                prepared.append(self._prepare_history(groups[name]))
+            except ValueError as e:
+                skipped[name] = str(e)
+                continue
+            names.append(name)
 
-        from datetime import date
-        today = pd.Timestamp(date.today())
-        for i, p in enumerate(preds):
-            p["Date"] = today + pd.Timedelta(days=i + 1)
+        if not names:
+            return {}, skipped
 
-        return pd.DataFrame(preds)
+        preds, used = self._forecast(prepared, days, names, method)
+        return {name: self._daily_frame(preds[k], out_fuels, used) for k, name in enumerate(names)}, skipped
 
-    def predict_mode(self, history_df: pd.DataFrame, mode: str, fuel_filter=None) -> dict:
-        mode = mode.lower().strip()
-        if mode == "weekly":
-            days = 7
-        elif mode == "monthly":
-            days = 30
-        elif mode == "annual":
-            days = 365
-        else:
+    @staticmethod
+    def _mode_days(mode: str) -> int:
+        if mode not in MODE_DAYS:
             raise ValueError("mode must be one of: weekly, monthly, annual")
+        return MODE_DAYS[mode]
 
-        selected_fuels = self._normalize_fuel_filter(fuel_filter)
-        daily_preds = self.forecast_days(history_df, days=days, fuel_filter=selected_fuels)
-
+    @staticmethod
+    def _summarize(daily_preds: pd.DataFrame, mode: str) -> dict:
         fuels_in_output = [c for c in daily_preds.columns if c != "Date"]
         totals = daily_preds[fuels_in_output].sum().to_dict()
 
@@ -230,4 +459,27 @@ class FuelDemandPredictor:
             "totals": {k: float(v) for k, v in totals.items()},
             "daily": daily_preds.to_dict(orient="records") if mode != "annual" else [],
             "monthly": monthly,
-        }
\ No newline at end of file
+        }
+
+    def predict_mode(self, history_df: pd.DataFrame, mode: str, fuel_filter=None, method: str = "auto") -> dict:
+        mode = mode.lower().strip()
+        days = self._mode_days(mode)
+
+        selected_fuels = self._normalize_fuel_filter(fuel_filter)
+        daily_preds = self.forecast_days(history_df, days=days, fuel_filter=selected_fuels, method=method)
+        return {**self._summarize(daily_preds, mode), "method": daily_preds.attrs["method"]}
+
+    def predict_tanks_mode(self, history_df: pd.DataFrame, mode: str, tanks=None, fuel_filter=None,
+                              method: str = "auto") -> dict:
+        """predict_mode() for several tanks, from one batched rollout."""
+        mode = mode.lower().strip()
+        days = self._mode_days(mode)
+
+        daily, skipped = self.forecast_tanks(history_df, days, tanks=tanks, fuel_filter=fuel_filter,
+                                                method=method)
+        return {
+            "mode": mode,
+            "method": next(iter(daily.values())).attrs["method"] if daily else None,
+            "tanks": {name: self._summarize(frame, mode) for name, frame in daily.items()},
+            "skipped": skipped,
+        }
@@ -0,0 +1,92 @@
+# utils/registry.py
+"""
+Local registry of trained model versions.
+
+    models/                         (or models/global/: its own registry)
+        CURRENT                     id of the active version (one line)
+        versions/<version>/         one training run, never modified
+            fuel_lstm.keras, scaler_X.pkl, scaler_y.pkl, model_meta.json, direct/h<H>/...
+            manifest.json           sha256 + size of every file, metrics, parent
+        versions/promotions.jsonl   one line per promotion / rollback
+
+Staging, manifests, the atomic CURRENT swap and rollback are shared/registry.py
+(installed with requirements.txt, see shared/README.md). This module adds the
+demand LSTM's artifacts: what a version is made of, the model_meta.json every
+version needs, and forecast latency. Readers resolve CURRENT once and load
+every artifact from that version dir, so a retrain next to the API can no
+longer hand it a new model with the previous scalers.
+
+A models dir without CURRENT is the flat layout (artifacts directly in it)
+and resolves to itself, as before the registry existed.
+"""
+
+import time
+from pathlib import Path
+
+from shared import registry as _registry
+from shared.registry import (  # noqa: F401  (re-exported)
+    CURRENT_FILENAME, MANIFEST_FILENAME, PROMOTIONS_FILENAME, REGISTRY_FORMAT_VERSION, VERSIONS_DIRNAME,
+    current_version, discard_staging, file_digests, list_versions, new_version_id, previous_version,
+    promote, read_manifest, resolve, rollback, verify_version, version_dir,
+)
+
+# what a flat models dir contributes to a version (stage_version / adopt)
+FLAT_ARTIFACTS = ("fuel_lstm.keras", "scaler_X.pkl", "scaler_y.pkl", "model_meta.json", "direct")
+
+
+def stage_version(root: Path, base: Path | None = None, names=FLAT_ARTIFACTS) -> Path:
+    """
+    A private staging dir to write a new version into. With base (a version
+    dir or a flat models dir) its artifacts in names are copied in first, e.g.
+    to add a direct head to the active model.
+    """
+    return _registry.stage_version(root, base, names)
+
+
+def commit_version(root: Path, staging: Path, metrics: dict | None = None, parent: str | None = None,
+                   source: str | None = None, version: str | None = None) -> tuple[str, Path]:
+    """
+    Checksum a staged version (it must have a model_meta.json), write its
+    manifest and rename it into versions/<version>/. CURRENT is untouched.
+    """
+    return _registry.commit_version(root, staging, metrics=metrics, parent=parent, source=source,
+                                    version=version, required=("model_meta.json",))
+
+
+def active_meta_path(root: Path, version: str | None = None) -> Path:
+    """
+    model_meta.json of the active (or pinned) version, for scripts that only
+    need the trained fuel list. A flat models dir, or a version that cannot
+    be resolved, gives root/model_meta.json (which may not exist).
+    """
+    try:
+        return resolve(root, version)[0] / "model_meta.json"
+    except (FileNotFoundError, ValueError):
+        return Path(root) / "model_meta.json"
+
+
+def has_model(root: Path) -> bool:
+    """True if root holds an active version or flat artifacts."""
+    root = Path(root)
+    return current_version(root) is not None or (root / "model_meta.json").exists()
+
+
+def forecast_latency(models_dir: Path, history, days=(7, 30), tank=None, repeat: int = 5) -> dict:
+    """
+    Load time and median forecast_days latency (ms) of the model in
+    models_dir, on a daily history frame (one tank's for a global model).
+    """
+    from utils.predictor import FuelDemandPredictor
+
+    t0 = time.perf_counter()
+    predictor = FuelDemandPredictor(models_dir)
+    out = {"load_ms": round((time.perf_counter() - t0) * 1e3, 1)}
+    for d in days:
+        predictor.forecast_days(history, d, tank=tank)  # warm-up / tracing
+        samples = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            predictor.forecast_days(history, d, tank=tank)
+            samples.append(time.perf_counter() - t0)
+        out[f"forecast_{d}d_ms"] = round(sorted(samples)[len(samples) // 2] * 1e3, 3)
+    return out
@@ -0,0 +1,169 @@
+# utils/tf_runtime.py
+"""
+TensorFlow inference runtime for FuelDemandPredictor.
+
+TensorFlow's defaults size both thread pools to every core. With several
+uvicorn workers on one host each worker then runs a full-width pool, and the
+pools fight over the same cores; for the 1 x 14 x 9 input of one rollout step
+the thread hand-off also costs more than the math. A runtime profile pins:
+
+    intra_threads   threads inside one op (matmul / LSTM cell)       0 = TF default
+    inter_threads   ops run in parallel                               0 = TF default
+    onednn          oneDNN CPU kernels (TF_ENABLE_ONEDNN_OPTS)        None = TF default
+    precision       Keras dtype policy for the inference copy of the model:
+                    float32 | float16 | bfloat16 | mixed_float16 | mixed_bfloat16
+    xla             compile the step function with XLA (jit_compile)
+
+Profiles (FUELWATCH_TF_PROFILE):
+
+    default      TF defaults, float32, no XLA (previous behaviour)
+    worker       1 intra / 1 inter thread: one process per core, scale with workers
+    throughput   all cores to one process, XLA on
+
+Any field can be overridden with FUELWATCH_TF_INTRA_THREADS,
+FUELWATCH_TF_INTER_THREADS, FUELWATCH_TF_ONEDNN, FUELWATCH_TF_PRECISION and
+FUELWATCH_TF_XLA. Thread counts and oneDNN must be fixed before TensorFlow
+runs its first op, so configure_runtime() has to be called before
+tensorflow is imported (utils/predictor.py does this at import time).
+
+benchmarks/bench_tf_runtime.py measures throughput per core for each setting.
+"""
+
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+PRECISIONS = ("float32", "float16", "bfloat16", "mixed_float16", "mixed_bfloat16")
+
+PROFILES = {
+    "default": {"intra_threads": 0, "inter_threads": 0, "onednn": None, "precision": "float32", "xla": False},
+    "worker": {"intra_threads": 1, "inter_threads": 1, "onednn": None, "precision": "float32", "xla": False},
+    "throughput": {"intra_threads": 0, "inter_threads": 2, "onednn": None, "precision": "float32", "xla": True},
+}
+
+_ENV_OVERRIDES = {
+    "intra_threads": "FUELWATCH_TF_INTRA_THREADS",
+    "inter_threads": "FUELWATCH_TF_INTER_THREADS",
+    "onednn": "FUELWATCH_TF_ONEDNN",
+    "precision": "FUELWATCH_TF_PRECISION",
+    "xla": "FUELWATCH_TF_XLA",
+}
+
+_runtime = None
+
+
+def _parse_bool(value: str) -> bool:
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def resolve_profile(name: str | None = None, **overrides) -> dict:
+    """Profile settings after env and keyword overrides (keyword wins)."""
+    name = name or os.environ.get("FUELWATCH_TF_PROFILE", "default")
+    if name not in PROFILES:
+        raise ValueError(f"Unknown TF runtime profile {name!r} (expected one of {sorted(PROFILES)})")
+    settings = dict(PROFILES[name], profile=name)
+
+    for key, env in _ENV_OVERRIDES.items():
+        raw = os.environ.get(env)
+        if raw is None or raw.strip() == "":
+            continue
+        if key in ("intra_threads", "inter_threads"):
+            settings[key] = int(raw)
+        elif key in ("onednn", "xla"):
+            settings[key] = _parse_bool(raw)
+        else:
+            settings[key] = raw.strip()
+
+    settings.update({k: v for k, v in overrides.items() if v is not None})
+    if settings["precision"] not in PRECISIONS:
+        raise ValueError(f"Unknown precision {settings['precision']!r} (expected one of {PRECISIONS})")
+    return settings
+
+
+def configure_runtime(name: str | None = None, **overrides) -> dict:
+    """
+    Apply a runtime profile to this process, once. Call before importing
+    tensorflow; later calls return the settings already in effect.
+    """
+    global _runtime
+    if _runtime is not None:
+        return _runtime
+
+    settings = resolve_profile(name, **overrides)
+    if settings["onednn"] is not None:
+        # read by TensorFlow when its CPU kernels are registered
+        os.environ["TF_ENABLE_ONEDNN_OPTS"] = "1" if settings["onednn"] else "0"
+
+    import tensorflow as tf
+
+    try:
+        if settings["intra_threads"]:
+            tf.config.threading.set_intra_op_parallelism_threads(settings["intra_threads"])
+        if settings["inter_threads"]:
+            tf.config.threading.set_inter_op_parallelism_threads(settings["inter_threads"])
+    except RuntimeError as e:
+        # TensorFlow already ran an op in this process; the pools are fixed
+        logger.warning("TF thread settings not applied: %s", e)
+
+    settings["effective_intra_threads"] = tf.config.threading.get_intra_op_parallelism_threads()
+    settings["effective_inter_threads"] = tf.config.threading.get_inter_op_parallelism_threads()
+    _runtime = settings
+    logger.info("TF runtime: %s", settings)
+    return settings
+
+
+def with_precision(model, precision: str):
+    """
+    Copy of a float32 Keras model whose layers use the given dtype policy
+    (weights cast on copy). float32 returns the model itself.
+    """
+    if precision == "float32":
+        return model
+
+    import keras
+
+    def clone_layer(layer):
+        config = layer.get_config()
+        config["dtype"] = precision
+        # weights are copied below; some initializers (orthogonal -> Qr) have
+        # no bfloat16 CPU kernel, so skip them
+        for key in config:
+            if key.endswith("_initializer") and config[key] is not None:
+                config[key] = "zeros"
+        return layer.__class__.from_config(config)
+
+    clone = keras.models.clone_model(model, clone_function=clone_layer)
+    if not clone.built:
+        clone.build(model.input_shape)
+    clone.set_weights(model.get_weights())
+    return clone
+
+
+def make_step_fn(model, input_shape, xla: bool = False):
+    """
+    One forward pass for a fixed input shape, as a traced tf.function.
+
+    model.predict() rebuilds a data pipeline on every call, which dominates
+    the cost of a (1, lookback, features) rollout step. The returned function
+    takes and returns numpy arrays (float32 out). Multi-input models (the
+    global model's (window, tank id)) pass a list of shapes and get one
+    positional argument per input.
+    """
+    import numpy as np
+    import tensorflow as tf
+
+    shapes = input_shape if isinstance(input_shape, list) else [input_shape]
+    dtypes = [tf.as_dtype(getattr(t, "dtype", "float32")) for t in model.inputs] \
+        if len(shapes) > 1 else [tf.float32]
+    signature = [tf.TensorSpec(shape=(None, *shape[1:]), dtype=dtype) for shape, dtype in zip(shapes, dtypes)]
+    np_dtypes = [dtype.as_numpy_dtype for dtype in dtypes]
+
+    @tf.function(input_signature=signature, jit_compile=bool(xla), reduce_retracing=True)
+    def step(*xs):
+        return tf.cast(model(xs[0] if len(xs) == 1 else list(xs), training=False), tf.float32)
+
+    def run(*xs):
+        return step(*(np.asarray(x, dtype=dt) for x, dt in zip(xs, np_dtypes))).numpy()
+
+    return run
@@ -1,16 +1,217 @@
 # utils/windowing.py
+"""
+Supervised windows for the LSTM without materializing them.
+
+A window is (X[s : s + lookback], y[s + lookback]): the past `lookback` days
+and the day to predict. Stacking all windows costs lookback times the source
+data, so windows are kept as start indices into one float32 copy of the rows:
+
+    window_view(X, lookback)      strided (N, lookback, F) view, no copy
+    WindowedSeries                starts + base arrays; row-mask subsets,
+                                  batch gathers and a streamed tf.data pipeline
+
+Multi-tank histories are passed as one (T, F) array with rows grouped by
+tank (each tank's rows contiguous and in date order) plus a per-row
+`groups` label; windows never cross a tank boundary. Passing integer
+`tank_ids` instead also feeds each window's tank to the model, as a
+second input ((Xw, tank), yw).
+
+horizon > 1 makes the target the next `horizon` days, (horizon, n_targets),
+for direct multi-horizon heads; `blocks` (day counts summing to horizon)
+sums those days into blocks, e.g. 12 month-like blocks for a 365-day head.
+"""
+
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def window_view(X: np.ndarray, lookback: int) -> np.ndarray:
+    """
+    X: (T, n_features)
+    returns a read-only (T - lookback, lookback, n_features) view whose i-th
+    entry is X[i:i + lookback] (windows that still have a next-day target).
+    """
+    if len(X) <= lookback:
+        return np.empty((0, lookback, *X.shape[1:]), dtype=X.dtype)
+    return sliding_window_view(X, lookback, axis=0)[:-1].transpose(0, 2, 1)
+
+
+def block_lengths(horizon: int, n_blocks: int) -> np.ndarray:
+    """Split horizon days into n_blocks near-equal blocks (longer ones first)."""
+    return np.array([len(b) for b in np.array_split(np.arange(horizon), n_blocks)], dtype=np.int64)
+
+
+def window_starts(n_rows: int, lookback: int, groups=None, horizon: int = 1) -> np.ndarray:
+    """Start row of every window whose lookback rows and target days share a group."""
+    span = lookback + horizon
+    if n_rows < span:
+        return np.empty(0, dtype=np.int64)
+    starts = np.arange(n_rows - span + 1, dtype=np.int64)
+    if groups is None:
+        return starts
+
+    groups = np.asarray(groups)
+    if len(groups) != n_rows:
+        raise ValueError(f"groups has {len(groups)} labels for {n_rows} rows")
+    run_id = np.concatenate([[0], np.cumsum(groups[1:] != groups[:-1])])
+    if run_id[-1] + 1 != len(np.unique(groups)):
+        raise ValueError("Rows of each group must be contiguous (sort by tank, then date)")
+    return starts[run_id[starts] == run_id[starts + span - 1]]
+
+
+class WindowedSeries:
+    """
+    Windows over one (T, n_features) / (T, n_targets) pair of arrays.
+
+    Subsets from where() share the base arrays, so train / val / test splits
+    add only their start indices. With tank_ids (one int per row) every
+    window also carries its tank, and windows stay within one tank.
+    """
+
+    def __init__(self, X: np.ndarray, y: np.ndarray, lookback: int, groups=None, starts=None,
+                 tank_ids=None, horizon: int = 1, blocks=None):
+        self.X = np.ascontiguousarray(X, dtype=np.float32)
+        self.y = np.ascontiguousarray(y, dtype=np.float32)
+        if len(self.X) != len(self.y):
+            raise ValueError(f"X has {len(self.X)} rows, y has {len(self.y)}")
+        self.tank_ids = None if tank_ids is None else np.ascontiguousarray(tank_ids, dtype=np.int32)
+        if groups is None:
+            groups = self.tank_ids
+        self.lookback = int(lookback)
+        self.horizon = int(horizon)
+        self.blocks = None if blocks is None else np.asarray(blocks, dtype=np.int64)
+        if self.blocks is not None and int(self.blocks.sum()) != self.horizon:
+            raise ValueError(f"blocks sum to {int(self.blocks.sum())} days, horizon is {self.horizon}")
+        self.starts = window_starts(len(self.X), self.lookback, groups, self.horizon) if starts is None \
+            else np.asarray(starts, dtype=np.int64)
+        self._view = window_view(self.X, self.lookback)
+        self._y_view = None
+        if self.horizon > 1 and len(self.y) >= self.horizon:
+            self._y_view = sliding_window_view(self.y, self.horizon, axis=0).transpose(0, 2, 1)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def n_features(self) -> int:
+        return self.X.shape[-1]
+
+    @property
+    def n_targets(self) -> int:
+        return self.y.shape[-1]
+
+    @property
+    def target_shape(self) -> tuple:
+        if self.horizon == 1:
+            return (self.n_targets,)
+        return (len(self.blocks) if self.blocks is not None else self.horizon, self.n_targets)
+
+    def where(self, row_mask: np.ndarray) -> "WindowedSeries":
+        """Windows whose lookback rows and target rows are all in row_mask."""
+        row_mask = np.asarray(row_mask, dtype=bool)
+        span = self.lookback + self.horizon
+        counts = np.concatenate([[0], np.cumsum(row_mask)])
+        inside = counts[self.starts + span] - counts[self.starts] == span
+        return WindowedSeries(self.X, self.y, self.lookback, starts=self.starts[inside],
+                              tank_ids=self.tank_ids, horizon=self.horizon, blocks=self.blocks)
+
+    def where_target(self, row_mask: np.ndarray) -> "WindowedSeries":
+        """
+        Windows whose target rows are all in row_mask; the lookback rows may
+        come before it (validation on a split shorter than lookback + horizon).
+        """
+        row_mask = np.asarray(row_mask, dtype=bool)
+        counts = np.concatenate([[0], np.cumsum(row_mask)])
+        first = self.starts + self.lookback
+        inside = counts[first + self.horizon] - counts[first] == self.horizon
+        return WindowedSeries(self.X, self.y, self.lookback, starts=self.starts[inside],
+                              tank_ids=self.tank_ids, horizon=self.horizon, blocks=self.blocks)
+
+    def _inputs(self, Xw, s):
+        return Xw if self.tank_ids is None else (Xw, self.tank_ids[s])
+
+    def _targets(self, s):
+        if self.horizon == 1:
+            return self.y[s + self.lookback]
+        yw = self._y_view[s + self.lookback]
+        if self.blocks is not None:
+            yw = np.add.reduceat(yw, np.concatenate([[0], np.cumsum(self.blocks)[:-1]]), axis=1)
+        return yw
+
+    def batch(self, positions):
+        """Copies of the windows at the given positions (only this batch is materialized)."""
+        s = self.starts[positions]
+        return self._inputs(self._view[s], s), self._targets(s)
+
+    def arrays(self) -> tuple:
+        """
+        All windows as (Xw, yw). A contiguous run of starts (one tank, one
+        split) comes back as a view; anything else is gathered into a copy.
+        """
+        s = self.starts
+        if len(s) and s[-1] - s[0] + 1 == len(s) and self.horizon == 1:
+            run = slice(s[0], s[-1] + 1)
+            return self._inputs(self._view[run], run), self.y[s[0] + self.lookback:s[-1] + self.lookback + 1]
+        return self.batch(slice(None))
+
+    def to_dataset(self, batch_size: int, shuffle: bool = False, seed: int | None = None,
+                   cache: bool = False, prefetch: bool = True):
+        """
+        tf.data pipeline of (Xw, yw) batches.
+
+        By default only start indices are shuffled and each batch is gathered
+        from the base rows when it is consumed (memory ~ one copy of the rows).
+        cache=True gathers every window once and keeps them in memory, so
+        later epochs skip the gather; use it when N x lookback x features
+        fits. Shuffling is always within this series' windows.
+        """
+        import tensorflow as tf
+
+        X_t = tf.constant(self.X)
+        y_t = tf.constant(self.y)
+        offsets = tf.range(self.lookback, dtype=tf.int64)
+        lookback = tf.constant(self.lookback, dtype=tf.int64)
+        st_t = None if self.tank_ids is None else tf.constant(self.tank_ids)
+        horizon_offsets = tf.range(self.horizon, dtype=tf.int64)
+        block_matrix = None
+        if self.blocks is not None:
+            # (n_blocks, horizon): row k sums the days of block k
+            ends = np.cumsum(self.blocks)
+            days = np.arange(self.horizon)
+            block_matrix = tf.constant(((days >= (ends - self.blocks)[:, None]) & (days < ends[:, None])).astype(np.float32))
+
+        def gather(starts):
+            Xw = tf.gather(X_t, starts[:, None] + offsets)
+            if st_t is not None:
+                Xw = (Xw, tf.gather(st_t, starts))
+            if self.horizon == 1:
+                return Xw, tf.gather(y_t, starts + lookback)
+            yw = tf.gather(y_t, (starts + lookback)[:, None] + horizon_offsets)
+            if block_matrix is not None:
+                yw = tf.einsum("nhf,kh->nkf", yw, block_matrix)
+            return Xw, yw
+
+        ds = tf.data.Dataset.from_tensor_slices(self.starts)
+        if cache:
+            ds = ds.batch(4096).map(gather, num_parallel_calls=tf.data.AUTOTUNE).unbatch().cache()
+            if shuffle:
+                ds = ds.shuffle(len(self.starts), seed=seed, reshuffle_each_iteration=True)
+            ds = ds.batch(batch_size)
+        else:
+            if shuffle:
+                ds = ds.shuffle(len(self.starts), seed=seed, reshuffle_each_iteration=True)
+            ds = ds.batch(batch_size).map(gather, num_parallel_calls=tf.data.AUTOTUNE)
+        return ds.prefetch(tf.data.AUTOTUNE) if prefetch else ds
+
 
 def make_supervised_windows(X: np.ndarray, y: np.ndarray, lookback: int):
     """
     X: (T, n_features)
     y: (T, n_targets)
     returns:
-      Xw: (N, lookback, n_features)
+      Xw: (N, lookback, n_features)  # read-only view of X
       yw: (N, n_targets)  # next-step target
     """
-    Xw, yw = [], []
-    for i in range(lookback, len(X)):
-        Xw.append(X[i - lookback:i])
-        yw.append(y[i])  # predict current day from past lookback
-    return np.array(Xw, dtype=np.float32), np.array(yw, dtype=np.float32)
+    X = np.asarray(X, dtype=np.float32)
+    y = np.asarray(y, dtype=np.float32)
+    return window_view(X, lookback), y[lookback:]
@@ -4,60 +4,111 @@ Flask API for Employee Demand Prediction Service.
 Provides endpoints for single and batch predictions with weather API integration.
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, Response
 from flask_cors import CORS
 import pandas as pd
-import joblib
 import json
+import logging
 import os
 import sys
+import time
 from datetime import datetime, timedelta
 import numpy as np
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from shared.logs import REQUEST_ID, REQUEST_ID_HEADER, new_request_id, setup_logging
 from utils.holidays import is_sri_lankan_holiday, is_vacation_period, is_day_before_holiday
+from utils.artifacts import process_memory
+from utils.forest import open_employee_model
+from utils.registry import read_manifest, resolve
+from utils.metrics import (
+    CONTENT_TYPE, render, stage,
+    BATCH_DAYS, MODEL_LOADED, REQUEST_SECONDS
+)
 from utils.weather_utils import (
     fetch_weather_forecast,
     simulate_weather_for_date,
     get_weather_for_date
 )
 
+setup_logging()
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
 CORS(app)
 
+
+@app.before_request
+def _start_request():
+    g.request_id_token = REQUEST_ID.set(new_request_id(request.headers.get(REQUEST_ID_HEADER)))
+    g.request_t0 = time.perf_counter()
+
+
+@app.after_request
+def _record_request_latency(response):
+    t0 = g.pop('request_t0', None)
+    if t0 is not None:
+        # route template, not the raw path, so unknown URLs share one label
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'other'
+        REQUEST_SECONDS.observe(time.perf_counter() - t0, endpoint=endpoint, status=response.status_code)
+    response.headers[REQUEST_ID_HEADER] = REQUEST_ID.get()
+    return response
+
+
+@app.teardown_request
+def _end_request(exc):
+    token = g.pop('request_id_token', None)
+    if token is not None:
+        REQUEST_ID.reset(token)
+
 # ============================================
 # Load Model and Metadata
 # ============================================
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-MODEL_PATH = os.path.join(BASE_DIR, 'models', 'employee_model.joblib')
-META_PATH = os.path.join(BASE_DIR, 'models', 'model_meta.json')
+MODELS_DIR = os.path.join(BASE_DIR, 'models')
+# Registered version to serve (utils/registry.py); default: the one in models/CURRENT
+MODEL_VERSION = os.environ.get('FUELWATCH_EMPLOYEE_MODEL_VERSION') or None
 
 model = None
+model_kind = None
 model_meta = None
+model_version = None
+model_manifest = None
 
 
 def load_employee_model():
-    """Load the trained model and metadata."""
-    global model, model_meta
+    """Load the trained model (compact bundle when exported, else the joblib pipeline) and metadata."""
+    global model, model_kind, model_meta, model_version, model_manifest
     
-    if os.path.exists(MODEL_PATH):
-        try:
-            model = joblib.load(MODEL_PATH)
-            print(f"✅ Model loaded from {MODEL_PATH}")
-        except Exception as e:
-            print(f"❌ Error loading model: {e}")
-    else:
-        print(f"⚠️ Warning: Model not found at {MODEL_PATH}")
+    # model and metadata both come from the one directory resolved here
+    try:
+        model_dir, model_version = resolve(MODELS_DIR, MODEL_VERSION)
+        model_manifest = read_manifest(MODELS_DIR, model_version) if model_version else None
+    except (FileNotFoundError, ValueError):
+        logger.exception('Model version %s not available in %s', MODEL_VERSION, MODELS_DIR)
+        MODEL_LOADED.set(0)
+        return
+    meta_path = os.path.join(model_dir, 'model_meta.json')
+
+    try:
+        model, model_kind = open_employee_model(model_dir)
+        logger.info('Model loaded from %s (%s, version %s)', model_dir, model_kind, model_version)
+    except FileNotFoundError:
+        logger.warning('Model not found in %s', model_dir)
+    except Exception:
+        logger.exception('Error loading model from %s', model_dir)
     
-    if os.path.exists(META_PATH):
+    if os.path.exists(meta_path):
         try:
-            with open(META_PATH, 'r') as f:
+            with open(meta_path, 'r') as f:
                 model_meta = json.load(f)
-            print(f"✅ Metadata loaded from {META_PATH}")
-        except Exception as e:
-            print(f"❌ Error loading metadata: {e}")
+            logger.info('Metadata loaded from %s', meta_path)
+        except Exception:
+            logger.exception('Error loading metadata from %s', meta_path)
+
+    MODEL_LOADED.set(int(model is not None))
 
 
 load_employee_model()
@@ -78,13 +129,20 @@ def prepare_features(date_str: str, fuel_demand: float, weather: str = None, tem
     
     # Get weather data if not provided
     if weather is None or temperature is None:
-        weather_data = get_weather_for_date(date_str)
+        with stage('weather_fetch'):
+            weather_data = get_weather_for_date(date_str)
         if weather is None:
             weather = weather_data['weather']
         if temperature is None:
             temperature = weather_data['temperature']
     
     # Calculate features
+    with stage('feature_prep'):
+        return _build_feature_frame(date_obj, fuel_demand, weather, temperature), weather, temperature
+
+
+def _build_feature_frame(date_obj, fuel_demand, weather, temperature):
+    """Single-row model input for prepare_features."""
     features = {
         'month': date_obj.month,
         'day_of_week': date_obj.weekday(),
@@ -101,7 +159,7 @@ def prepare_features(date_str: str, fuel_demand: float, weather: str = None, tem
         'predicted_fuel_demand': float(fuel_demand)
     }
     
-    return pd.DataFrame([features]), weather, temperature
+    return pd.DataFrame([features])
 
 
 # ============================================
@@ -115,10 +173,19 @@ def health_check():
         'status': 'healthy',
         'service': 'member3-employee-demand-ml',
         'model_loaded': model is not None,
-        'meta_loaded': model_meta is not None
+        'model_format': model_kind,
+        'model_version': model_version,
+        'meta_loaded': model_meta is not None,
+        'memory': process_memory()
     }), 200
 
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus text exposition of this worker's latency metrics."""
+    return Response(render(), content_type=CONTENT_TYPE)
+
+
 @app.route('/model/info', methods=['GET'])
 def model_info():
     """Get model information and metrics."""
@@ -129,7 +196,9 @@ def model_info():
         'features': model_meta.get('feature_columns', []),
         'metrics': model_meta.get('metrics', {}),
         'training_info': model_meta.get('training_info', {}),
-        'top_features': model_meta.get('feature_importance', [])[:5]
+        'top_features': model_meta.get('feature_importance', [])[:5],
+        'version': model_version,
+        'latency_ms': (model_manifest or {}).get('metrics', {}).get('latency_ms')
     })
 
 
@@ -168,7 +237,8 @@ def predict_employee_demand():
         df, used_weather, used_temp = prepare_features(date_str, fuel_demand, weather, temperature)
         
         # Predict
-        prediction = model.predict(df)[0]
+        with stage('inference'):
+            prediction = model.predict(df)[0]
         employees_needed = int(np.ceil(max(2, min(prediction, 20))))
         
         return jsonify({
@@ -225,13 +295,14 @@ def predict_batch():
         # Support both formats
         forecasts = data.get('forecasts') or data.get('daily', [])
         
-        # DEEP DEBUG: See exactly what the frontend is sending
-        print(f"\n--- [DEBUG] Received Batch Request with {len(forecasts)} days ---")
+        # what the frontend is sending (FUELWATCH_LOG_LEVEL=DEBUG)
+        logger.debug('Batch request with %d days', len(forecasts))
         if forecasts:
-            print(f"--- [DEBUG] Day 1 Data: {forecasts[0]} ---\n")
+            logger.debug('Batch day 1 data: %s', forecasts[0])
             
         if not forecasts:
             return jsonify({'error': 'No forecast data provided'}), 400
+        BATCH_DAYS.observe(len(forecasts))
         
         predictions = []
         total_employees = 0
@@ -263,11 +334,10 @@ def predict_batch():
                             continue
             
             if not date_str or fuel_demand is None:
-                print(f"Skipping prediction for day due to missing data: date={date_str}, demand={fuel_demand}")
+                logger.warning('Skipping day with missing data: date=%s, demand=%s', date_str, fuel_demand)
                 continue
             
-            # DEBUG LOGGING - Check this in your terminal
-            print(f"--- [AI PREDICTION] Date: {date_str} | Total Demand: {fuel_demand} Liters ---")
+            logger.debug('Predicting %s: total demand %s L', date_str, fuel_demand)
             
             # Force truncation of date string explicitly for Member 1 prediction
             if date_str and "T" in str(date_str):
@@ -281,7 +351,8 @@ def predict_batch():
                 total_stripped_staff = 0
                 for fc, amount in fuel_breakdown.items():
                     df_fuel, _, _ = prepare_features(date_str, float(amount))
-                    pred_fuel = model.predict(df_fuel)[0]
+                    with stage('inference'):
+                        pred_fuel = model.predict(df_fuel)[0]
                     # Subtract base staff (2) to get purely volume/factor driven staff
                     staff_for_fuel = max(0, int(np.ceil(pred_fuel)) - 2)
                     employee_breakdown[fc] = staff_for_fuel
@@ -294,7 +365,8 @@ def predict_batch():
                 df, used_weather, used_temp = prepare_features(date_str, float(fuel_demand))
             else:
                 df, used_weather, used_temp = prepare_features(date_str, float(fuel_demand))
-                prediction = model.predict(df)[0]
+                with stage('inference'):
+                    prediction = model.predict(df)[0]
                 employees_needed = int(np.ceil(max(2, min(prediction, 20))))
                 
             total_employees += employees_needed
@@ -318,13 +390,15 @@ def predict_batch():
         if not predictions:
             return jsonify({'error': 'No valid forecasts could be processed'}), 400
         
-        return jsonify({
+        payload = {
             'ok': True,
             'total_days': len(predictions),
             'total_employee_days': total_employees,
             'average_daily_employees': round(total_employees / len(predictions), 1),
             'predictions': predictions
-        })
+        }
+        with stage('serialization'):
+            return jsonify(payload)
     
     except Exception as e:
         return jsonify({'error': f"Batch prediction failed: {str(e)}"}), 500
@@ -349,7 +423,8 @@ def predict_weekly():
         base_demand = float(request.args.get('base_demand', 5000))
         
         # Fetch 7-day weather forecast
-        weather_forecast = fetch_weather_forecast(days=7)
+        with stage('weather_fetch'):
+            weather_forecast = fetch_weather_forecast(days=7)
         
         predictions = []
         today = datetime.now()
@@ -380,7 +455,8 @@ def predict_weekly():
             
             # Prepare and predict
             df, _, _ = prepare_features(date_str, fuel_demand, weather, temperature)
-            prediction = model.predict(df)[0]
+            with stage('inference'):
+                prediction = model.predict(df)[0]
             employees_needed = int(np.ceil(max(2, min(prediction, 20))))
             
             predictions.append({
@@ -398,12 +474,14 @@ def predict_weekly():
                 'day_of_week': target_date.weekday()
             })
         
-        return jsonify({
+        payload = {
             'ok': True,
             'generated_at': datetime.now().isoformat(),
             'base_demand_used': base_demand,
             'predictions': predictions
-        })
+        }
+        with stage('serialization'):
+            return jsonify(payload)
     
     except Exception as e:
         return jsonify({'error': f"Weekly prediction failed: {str(e)}"}), 500
@@ -419,6 +497,7 @@ if __name__ == '__main__':
     print("  POST /predict        - Single day prediction")
     print("  POST /predict/batch  - Batch prediction (7-day)")
     print("  GET  /predict/weekly - Weekly forecast from today")
+    print("  GET  /metrics        - Prometheus metrics")
     print("="*60 + "\n")
     
     app.run(host='0.0.0.0', port=5003, debug=True)
@@ -0,0 +1,143 @@
+# scripts/export_model.py
+"""
+Export models/employee_model.joblib to the compact bundle used by the API
+(utils/forest.py), then check that it predicts the same as the pipeline.
+
+    python scripts/export_model.py
+    python scripts/export_model.py --check-only --repeat 500
+
+scripts/train_model.py exports automatically after training; run this after
+copying in a pipeline trained elsewhere (flat models/ layout, before
+scripts/model_registry.py adopt); the new bundle is built next to
+models/employee_compact/ and swapped in by rename, so running API workers
+keep reading the one they mapped. Registered versions are immutable, so for
+them only --check-only is allowed (--version picks one, default the active
+one). The check compares predictions on the training dataset plus random
+rows (including an unknown weather value) and reports load time and
+per-call latency of both forms. It exits non-zero when the predictions
+differ by more than --tolerance.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.forest import COMPACT_DIRNAME, CompactEmployeeModel, export_employee_model
+from utils.registry import resolve
+
+
+def _median_s(fn, repeat):
+    fn()  # warm-up
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return float(np.median(samples))
+
+
+def _random_rows(df, feature_cols, n, seed=0):
+    """Rows resampled column by column from the dataset, plus unseen weather values."""
+    rng = np.random.default_rng(seed)
+    rows = pd.DataFrame({c: df[c].to_numpy()[rng.integers(0, len(df), n)] for c in feature_cols})
+    rows['temperature'] = rows['temperature'] + rng.normal(0, 3, n)
+    rows['predicted_fuel_demand'] = rows['predicted_fuel_demand'] * rng.uniform(0.5, 1.5, n)
+    rows.loc[rows.index[::17], 'weather'] = 'Foggy'
+    return rows
+
+
+def check_parity(pipeline, compact, df, feature_cols, repeat=200):
+    """
+    Compare predictions and latency of the pipeline and the compact model.
+
+    Args:
+        pipeline: Fitted sklearn Pipeline
+        compact: CompactEmployeeModel exported from it
+        df: Dataset with feature_cols
+        feature_cols: Model input columns
+        repeat: Timed calls per latency measurement
+
+    Returns:
+        dict with max_abs_diff and latency per form
+    """
+    X = pd.concat([df[feature_cols], _random_rows(df, feature_cols, 2000)], ignore_index=True)
+    diff = np.abs(pipeline.predict(X) - compact.predict(X))
+
+    one = df[feature_cols].iloc[[0]]
+    year = pd.concat([df[feature_cols]] * 2, ignore_index=True).iloc[:366]
+    return {
+        'rows_checked': len(X),
+        'max_abs_diff': float(diff.max()),
+        'predict_1_row_s': {
+            'pipeline': _median_s(lambda: pipeline.predict(one), repeat),
+            'compact': _median_s(lambda: compact.predict(one), repeat),
+        },
+        'predict_366_rows_s': {
+            'pipeline': _median_s(lambda: pipeline.predict(year), max(1, repeat // 10)),
+            'compact': _median_s(lambda: compact.predict(year), max(1, repeat // 10)),
+        },
+    }
+
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    base_dir = os.path.dirname(script_dir)
+
+    parser = argparse.ArgumentParser(description="Export the employee model to a compact bundle")
+    parser.add_argument('--models-dir', default=os.path.join(base_dir, 'models'))
+    parser.add_argument('--data', default=os.path.join(base_dir, 'data', 'employee_demand_dataset.csv'))
+    parser.add_argument('--version', default=None, help="Registered version to check (default: the active one)")
+    parser.add_argument('--check-only', action='store_true', help="Compare an existing export, do not rewrite it")
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--tolerance', type=float, default=1e-9)
+    args = parser.parse_args()
+
+    model_dir, version = resolve(args.models_dir, args.version)
+    if version and not args.check_only:
+        print(f"{model_dir} is registered version {version} and cannot be rewritten; use --check-only")
+        sys.exit(2)
+    model_path = os.path.join(model_dir, 'employee_model.joblib')
+    out_dir = os.path.join(model_dir, COMPACT_DIRNAME)
+
+    t0 = time.perf_counter()
+    pipeline = joblib.load(model_path)
+    joblib_cold_s = time.perf_counter() - t0  # includes importing sklearn
+    t0 = time.perf_counter()
+    pipeline = joblib.load(model_path)
+    joblib_load_s = time.perf_counter() - t0
+
+    if not args.check_only:
+        export_employee_model(pipeline, out_dir, source_path=model_path)
+
+    t0 = time.perf_counter()
+    compact = CompactEmployeeModel(out_dir)
+    compact_load_s = time.perf_counter() - t0
+    print(f"Compact model: {compact.n_trees} trees / {compact.meta['n_nodes']} nodes "
+          f"(max depth {compact.max_depth}) -> {out_dir}")
+
+    df = pd.read_csv(args.data)
+    feature_cols = joblib.load(os.path.join(model_dir, 'model_columns.joblib'))
+    report = check_parity(pipeline, compact, df, feature_cols, repeat=args.repeat)
+
+    print(f"\nLoad:             joblib {joblib_load_s * 1e3:8.2f} ms ({joblib_cold_s * 1e3:.0f} ms with imports)   "
+          f"compact {compact_load_s * 1e3:8.2f} ms")
+    for key, label in (('predict_1_row_s', 'Predict 1 row:'), ('predict_366_rows_s', 'Predict 366 rows:')):
+        t = report[key]
+        print(f"{label:<17} pipeline {t['pipeline'] * 1e3:6.3f} ms   compact {t['compact'] * 1e3:6.3f} ms "
+              f"({t['pipeline'] / t['compact']:.1f}x)")
+    print(f"Parity:           max |diff| {report['max_abs_diff']:.3g} over {report['rows_checked']} rows")
+
+    if report['max_abs_diff'] > args.tolerance:
+        print("PARITY FAILED")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
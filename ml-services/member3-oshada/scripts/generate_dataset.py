@@ -4,6 +4,7 @@ Generate synthetic dataset for employee demand prediction.
 Uses Sri Lankan holidays, weather patterns, and fuel demand correlation.
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 import random
@@ -14,8 +15,11 @@ from datetime import datetime, timedelta
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.holidays import is_sri_lankan_holiday, is_vacation_period, is_day_before_holiday
-from utils.weather_utils import simulate_weather_for_date
+from utils.holidays import (
+    is_sri_lankan_holiday, is_vacation_period, is_day_before_holiday,
+    holiday_mask, vacation_mask, day_before_holiday_mask
+)
+from utils.weather_utils import simulate_weather_for_date, simulate_weather_arrays
 
 
 def generate_synthetic_data(start_date='2023-01-01', days=1095):
@@ -188,6 +192,169 @@ def generate_synthetic_data(start_date='2023-01-01', days=1095):
     return pd.DataFrame(data)
 
 
+# ============================================
+# Vectorized generator (large / multi-station datasets)
+# ============================================
+
+# Same effect sizes as generate_synthetic_data, as lookup tables
+WEATHER_DEMAND_RANGE = {
+    'Sunny': (300, 800),
+    'Cloudy': (0, 300),
+    'Rainy': (-1500, -500),
+    'Stormy': (-3000, -1500)
+}
+WEATHER_POINTS = {'Sunny': 1.0, 'Cloudy': 0.5, 'Rainy': -0.5, 'Stormy': -1.5}
+DAY_POINTS = np.array([1.5, 0.5, 0.5, 1.0, 2.0, 2.5, 1.5])  # Monday..Sunday
+
+
+def _draw_effect(rng, mask, low, high):
+    """randint(low, high) where mask is set, 0 elsewhere (inclusive bounds)."""
+    return np.where(mask, rng.integers(low, high + 1, size=len(mask)), 0)
+
+
+def generate_synthetic_chunk(dates, station_ids, station_scale, rng):
+    """
+    Generate rows for every (date, station) pair with array operations.
+    
+    Args:
+        dates: pd.DatetimeIndex of days in this chunk
+        station_ids: Array of station identifiers
+        station_scale: Per-station fuel demand multiplier (same length as station_ids)
+        rng: Seeded numpy Generator (consumed in place)
+    
+    Returns:
+        DataFrame with the generate_synthetic_data columns
+        (+ station_id when more than one station)
+    """
+    n_days, n_stations = len(dates), len(station_ids)
+    n = n_days * n_stations
+    
+    # ---- Calendar features: computed once per day, repeated per station ----
+    month_d = np.asarray(dates.month)
+    dow_d = np.asarray(dates.dayofweek)
+    dom_d = np.asarray(dates.day)
+    
+    month = np.repeat(month_d, n_stations)
+    day_of_week = np.repeat(dow_d, n_stations)
+    day_of_month = np.repeat(dom_d, n_stations)
+    week_of_year = np.repeat(np.asarray(dates.isocalendar().week, dtype=np.int64), n_stations)
+    is_weekend = (day_of_week >= 5).astype(np.int8)
+    is_month_end = (day_of_month >= 25).astype(np.int8)
+    is_holiday = np.repeat(holiday_mask(dates), n_stations).astype(np.int8)
+    is_vacation = np.repeat(vacation_mask(dates), n_stations).astype(np.int8)
+    pre_holiday = np.repeat(day_before_holiday_mask(dates), n_stations).astype(np.int8)
+    is_friday = (day_of_week == 4).astype(np.int8)
+    peak_month = np.isin(month, [4, 12])
+    
+    # ---- Weather: independent draw per station-day ----
+    weather, temperature = simulate_weather_arrays(month, rng)
+    
+    # ---- Fuel demand ----
+    demand = np.full(n, 5000.0)
+    demand += _draw_effect(rng, is_weekend == 1, 1500, 2500)
+    demand += _draw_effect(rng, is_holiday == 1, 2500, 4000)
+    demand += _draw_effect(rng, is_vacation == 1, 1000, 2000)
+    demand += _draw_effect(rng, is_month_end == 1, 500, 1500)
+    for category, (low, high) in WEATHER_DEMAND_RANGE.items():
+        demand += _draw_effect(rng, weather == category, low, high)
+    demand += _draw_effect(rng, peak_month, 1000, 2000)
+    demand *= np.tile(station_scale, n_days)
+    demand += rng.normal(0, 500, size=n)
+    fuel_demand = np.maximum(2000, demand.astype(np.int64))
+    
+    # ---- Employee count (weighted point system) ----
+    points = 3.0 + np.minimum(fuel_demand / 3000, 3.5) * 1.2
+    points += DAY_POINTS[day_of_week]
+    points += 2.0 * is_holiday + 2.5 * pre_holiday
+    for category, weather_pts in WEATHER_POINTS.items():
+        points += np.where(weather == category, weather_pts, 0.0)
+    points += 1.5 * is_vacation + 1.0 * peak_month
+    points += np.where(temperature > 33, 1.0, np.where(temperature > 31, 0.5, 0.0))
+    points += 1.0 * is_month_end
+    points += rng.normal(0, 0.4, size=n)
+    employee_count = np.ceil(np.clip(points, 2, 15)).astype(np.int64)
+    
+    df = pd.DataFrame({
+        'date': np.repeat(np.asarray(dates.strftime('%Y-%m-%d')), n_stations),
+        'month': month,
+        'day_of_week': day_of_week,
+        'day_of_month': day_of_month,
+        'week_of_year': week_of_year,
+        'is_weekend': is_weekend,
+        'is_month_end': is_month_end,
+        'is_holiday': is_holiday,
+        'is_vacation': is_vacation,
+        'is_day_before_holiday': pre_holiday,
+        'is_friday': is_friday,
+        'weather': weather,
+        'temperature': temperature,
+        'predicted_fuel_demand': fuel_demand,
+        'employee_count': employee_count
+    })
+    
+    if n_stations > 1:
+        df.insert(1, 'station_id', np.tile(station_ids, n_days))
+    
+    return df
+
+
+def iter_synthetic_chunks(start_date='2023-01-01', days=1095, n_stations=1,
+                          seed=42, chunk_days=365):
+    """
+    Yield the vectorized synthetic dataset in chunks of chunk_days days.
+    
+    All random components are drawn from one numpy Generator seeded with
+    seed, so output is reproducible for a given (seed, chunk_days).
+    
+    Yields:
+        DataFrame chunks of chunk_days * n_stations rows
+    """
+    rng = np.random.default_rng(seed)
+    all_dates = pd.date_range(start_date, periods=days, freq='D')
+    
+    station_ids = np.array([f"STATION_{i + 1:03d}" for i in range(n_stations)])
+    # Stations differ in size; a single station keeps the baseline demand
+    station_scale = rng.uniform(0.6, 1.6, size=n_stations) if n_stations > 1 else np.ones(1)
+    
+    for start in range(0, days, chunk_days):
+        dates = all_dates[start:start + chunk_days]
+        yield generate_synthetic_chunk(dates, station_ids, station_scale, rng)
+
+
+def generate_synthetic_data_vectorized(start_date='2023-01-01', days=1095,
+                                       n_stations=1, seed=42):
+    """
+    In-memory vectorized counterpart of generate_synthetic_data.
+    Use stream_synthetic_data for datasets that should not be held in memory.
+    """
+    return pd.concat(
+        iter_synthetic_chunks(start_date, days, n_stations, seed, chunk_days=max(days, 1)),
+        ignore_index=True
+    )
+
+
+def stream_synthetic_data(file_path, start_date='2023-01-01', days=1095,
+                          n_stations=1, seed=42, chunk_days=365):
+    """
+    Write the vectorized synthetic dataset to CSV one chunk at a time.
+    Peak memory is bounded by chunk_days * n_stations rows.
+    
+    Returns:
+        Total number of rows written
+    """
+    output_dir = os.path.dirname(os.path.abspath(file_path))
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    
+    total_rows = 0
+    for i, chunk in enumerate(iter_synthetic_chunks(start_date, days, n_stations, seed, chunk_days)):
+        chunk.to_csv(file_path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+        total_rows += len(chunk)
+        print(f"  chunk {i + 1}: {total_rows:,} rows written")
+    
+    return total_rows
+
+
 def save_data(df, filename='employee_demand_dataset.csv'):
     """Save dataset to the data directory."""
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -215,9 +382,41 @@ def save_data(df, filename='employee_demand_dataset.csv'):
     print(df.head(10).to_string())
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate synthetic employee demand data")
+    parser.add_argument('--vectorized', action='store_true',
+                        help="Use the NumPy generator (required for --stations/--output)")
+    parser.add_argument('--start-date', default='2023-01-01')
+    parser.add_argument('--days', type=int, default=1095)
+    parser.add_argument('--stations', type=int, default=1,
+                        help="Number of simulated stations (vectorized only)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-days', type=int, default=365,
+                        help="Days generated per chunk when streaming")
+    parser.add_argument('--output', default=None,
+                        help="Stream to this CSV path in chunks (vectorized only)")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    print("Generating synthetic data for Employee Demand Prediction...")
-    print("Using Sri Lankan holidays and weather patterns...")
+    args = parse_args()
     
-    df = generate_synthetic_data()
-    save_data(df)
+    if args.output:
+        print(f"Streaming {args.days} days x {args.stations} stations to {args.output}...")
+        rows = stream_synthetic_data(
+            args.output, args.start_date, args.days, args.stations,
+            args.seed, args.chunk_days
+        )
+        print(f"\nDone: {rows:,} rows -> {args.output}")
+    elif args.vectorized or args.stations > 1:
+        print("Generating synthetic data (vectorized) for Employee Demand Prediction...")
+        df = generate_synthetic_data_vectorized(
+            args.start_date, args.days, args.stations, args.seed
+        )
+        save_data(df)
+    else:
+        print("Generating synthetic data for Employee Demand Prediction...")
+        print("Using Sri Lankan holidays and weather patterns...")
+        
+        df = generate_synthetic_data(args.start_date, args.days)
+        save_data(df)
@@ -8,6 +8,7 @@ features + employee count targets.
 
 import pandas as pd
 import numpy as np
+import logging
 import random
 import re
 import os
@@ -17,13 +18,44 @@ from datetime import datetime, timedelta
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from shared.logs import setup_logging
 from utils.holidays import is_sri_lankan_holiday, is_vacation_period, is_day_before_holiday
-from utils.weather_utils import simulate_weather_for_date
+from utils.weather_utils import simulate_weather_for_date, simulate_weather_arrays
+from utils.report_extraction import (
+    KIND_SUMMARY, KIND_DHANUSHKA, KIND_EXCEL, empty_table, extract_reports
+)
 
+logger = logging.getLogger(__name__)
 
-def load_real_data():
+# Relative demand shifts applied to augmented copies of each real day
+AUGMENT_NOISE_PCTS = [-0.12, -0.06, 0.06, 0.12]
+
+# Point tables of the staffing model, shared by compute_employee_count and
+# compute_employee_counts.
+# Day of week - stations are busier on weekends and Fridays
+DAY_WEIGHTS = {
+    0: 0.5,   # Mon
+    1: 0.0,   # Tue
+    2: 0.0,   # Wed
+    3: 1.0,   # Thu
+    4: 3.0,   # Fri (Weekend prep)
+    5: 4.0,   # Sat (Peak travel)
+    6: 1.5,   # Sun
+}
+
+# Weather impact (Directly affects outdoor pumping activity)
+WEATHER_POINTS = {
+    'Sunny': 1.0,
+    'Cloudy': 0.5,
+    'Rainy': -2.0,   # People avoid stopping in rain
+    'Stormy': -4.5   # Safety concerns significantly reduce staff need
+}
+
+
+def load_real_data(workers=None, use_cache=True):
     """
-    Loads and aggregates real fuel demand data from all files in data/real/.
+    Loads real fuel demand data from all files in data/real/ as a typed
+    per-date/per-fuel table.
     
     Handles three data formats:
     1. Excel (.xlsx) — Dhanushka Engineering sales reports with columns:
@@ -41,15 +73,25 @@ def load_real_data():
     - Duplicate downloads (1).pdf, (2).pdf etc. are detected and only one is used.
     - When a Ceylon Petroleum summary exists for a month, it's preferred over
       individual Dhanushka tank-level files to avoid double-counting.
+    
+    Files are parsed in a process pool (see utils/report_extraction.py) and
+    per-file results are cached in data/cache/extracted/, keyed by file hash
+    and parser version.
+    
+    Args:
+        workers: Process pool size (default: CPU count)
+        use_cache: Reuse cached extractions for unchanged files
+    
+    Returns:
+        DataFrame with columns date, fuel_type, qty, records, source_file, source_kind
     """
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     data_dir = os.path.join(base_dir, 'data', 'real')
+    cache_dir = os.path.join(base_dir, 'data', 'cache', 'extracted') if use_cache else None
     
     if not os.path.exists(data_dir):
-        print(f"⚠️ Real data directory not found: {data_dir}")
-        return {}
-    
-    daily_demand = {}
+        logger.warning('Real data directory not found: %s', data_dir)
+        return empty_table()
     
     # ================================================================
     # Step 1: Identify files and deduplicate
@@ -70,13 +112,12 @@ def load_real_data():
         else:
             pass  # Skip duplicate download
     
-    print(f"📁 Found {len(files)} total files, {len(unique_files)} unique after dedup")
+    logger.info('Found %d total files, %d unique after dedup', len(files), len(unique_files))
     
     # ================================================================
     # Step 2: Identify Ceylon Petroleum summary PDFs (preferred source)
     # These have pre-aggregated daily data across ALL fuel types
     # ================================================================
-    summary_months = set()  # Track months covered by summary reports
     summary_files = []
     dhanushka_files = []
     
@@ -96,145 +137,70 @@ def load_real_data():
         else:
             dhanushka_files.append(f)
     
-    # ================================================================
-    # Step 3: Extract from Ceylon Petroleum summary PDFs first
-    # ================================================================
     try:
-        import pdfplumber
+        import pdfplumber  # noqa: F401
         has_pdfplumber = True
     except ImportError:
         has_pdfplumber = False
-        print("⚠️ pdfplumber not installed. PDF extraction will be skipped.")
-    
-    for f in summary_files:
-        if not has_pdfplumber:
-            break
-        path = os.path.join(data_dir, f)
-        count = 0
-        try:
-            with pdfplumber.open(path) as pdf:
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    if not text:
-                        continue
-                    for line in text.split('\n'):
-                        # Pattern: YYYY-MM-DD FuelTypeName qty unit_price amount
-                        match = re.match(
-                            r'^(\d{4}-\d{2}-\d{2})\s+'     # Date
-                            r'(Lanka[^0-9]+?)\s+'           # Fuel type name
-                            r'([\d,]+\.?\d*)\s+'            # Qty (L)
-                            r'[\d,]+\.?\d*\s+'              # Unit price
-                            r'[\d,]+\.?\d*$',               # Amount
-                            line.strip()
-                        )
-                        if match:
-                            date_str = match.group(1)
-                            qty = float(match.group(3).replace(',', ''))
-                            daily_demand[date_str] = daily_demand.get(date_str, 0) + qty
-                            count += 1
-                            # Track which months are covered
-                            summary_months.add(date_str[:7])
-            
-            print(f"  ✅ {f}: {count} records (Ceylon Petroleum summary)")
-        except Exception as e:
-            print(f"  ❌ {f}: Error - {e}")
+        logger.warning('pdfplumber not installed. PDF extraction will be skipped.')
+    
+    # ================================================================
+    # Step 3: Extract from Ceylon Petroleum summary PDFs first
+    # ================================================================
+    jobs = []
+    if has_pdfplumber:
+        jobs = [(os.path.join(data_dir, f), KIND_SUMMARY) for f in summary_files]
+    summary_table, summary_report = extract_reports(jobs, cache_dir, workers)
+    _log_extraction_report(summary_report)
+    
+    # Track which months are covered
+    summary_months = set(summary_table['date'].dt.strftime('%Y-%m'))
     
     # ================================================================
     # Step 4: Extract from Dhanushka files (Excel + PDF)
     # Skip months already covered by summary reports
     # ================================================================
+    jobs = []
     for f in dhanushka_files:
-        path = os.path.join(data_dir, f)
-        count = 0
-        
         # Determine the month this file covers from filename
         date_match = re.search(r'(\d{4}-\d{2}-\d{2})', f) or re.search(r'(\d{4}-\d{2})', f)
         file_month = date_match.group(1)[:7] if date_match else None
         
         if file_month and file_month in summary_months:
-            print(f"  ⏭️ {f}: Skipped (month {file_month} covered by summary)")
+            logger.debug('%s: skipped (month %s covered by summary)', f, file_month)
             continue
         
         if f.endswith('.xlsx'):
-            try:
-                import openpyxl  # Ensure available
-                df = pd.read_excel(path, skiprows=4)
-                if df.shape[1] >= 7:
-                    date_col = pd.to_datetime(df.iloc[:, 2], errors='coerce')
-                    qty_col = pd.to_numeric(df.iloc[:, 6], errors='coerce')
-                    for i in range(len(df)):
-                        if pd.notna(date_col.iloc[i]) and pd.notna(qty_col.iloc[i]):
-                            d = date_col.iloc[i].strftime('%Y-%m-%d')
-                            daily_demand[d] = daily_demand.get(d, 0) + qty_col.iloc[i]
-                            count += 1
-                print(f"  ✅ {f}: {count} records (Excel)")
-            except Exception as e:
-                print(f"  ❌ {f}: Error - {e}")
-        
+            jobs.append((os.path.join(data_dir, f), KIND_EXCEL))
         elif f.endswith('.pdf') and has_pdfplumber:
-            try:
-                with pdfplumber.open(path) as pdf:
-                    for page in pdf.pages:
-                        # Try table extraction first
-                        tables = page.extract_tables()
-                        for table in tables:
-                            # Find Date and Qty column indices from header
-                            date_idx, qty_idx = None, None
-                            for row in table:
-                                cells = [str(c or '').strip() for c in row]
-                                for i, c in enumerate(cells):
-                                    if c.lower() == 'date': date_idx = i
-                                    if c.lower() == 'qty': qty_idx = i
-                                if date_idx is not None and qty_idx is not None:
-                                    break
-                            
-                            if date_idx is None or qty_idx is None:
-                                continue
-                            
-                            for row in table:
-                                if len(row) <= max(date_idx, qty_idx):
-                                    continue
-                                raw_date = str(row[date_idx] or '').strip().split('\n')[0]
-                                raw_qty = str(row[qty_idx] or '').strip().split('\n')[0]
-                                if 'date' in raw_date.lower():
-                                    continue
-                                try:
-                                    parsed_date = pd.to_datetime(raw_date)
-                                    parsed_qty = float(raw_qty.replace(',', ''))
-                                    d = parsed_date.strftime('%Y-%m-%d')
-                                    daily_demand[d] = daily_demand.get(d, 0) + parsed_qty
-                                    count += 1
-                                except (ValueError, TypeError):
-                                    pass
-                        
-                        # Fallback: text-based extraction for PDFs without tables
-                        if count == 0:
-                            text = page.extract_text()
-                            if not text:
-                                continue
-                            for line in text.split('\n'):
-                                # Match date patterns
-                                m = re.search(r'(\d{1,2}/\d{1,2}/\d{4}|\d{4}-\d{2}-\d{2})', line)
-                                if not m:
-                                    continue
-                                date_str = m.group(1)
-                                # Find qty: number before the amount (which is larger)
-                                nums = re.findall(r'([\d,]+\.?\d*)', line[m.end():])
-                                if len(nums) >= 1:
-                                    try:
-                                        qty = float(nums[0].replace(',', ''))
-                                        if 0 < qty < 50000:  # Sanity check
-                                            d = pd.to_datetime(date_str).strftime('%Y-%m-%d')
-                                            daily_demand[d] = daily_demand.get(d, 0) + qty
-                                            count += 1
-                                    except (ValueError, TypeError):
-                                        pass
-                
-                print(f"  ✅ {f}: {count} records (PDF)")
-            except Exception as e:
-                print(f"  ❌ {f}: Error - {e}")
-    
-    return daily_demand
+            jobs.append((os.path.join(data_dir, f), KIND_DHANUSHKA))
+    
+    dhanushka_table, dhanushka_report = extract_reports(jobs, cache_dir, workers)
+    _log_extraction_report(dhanushka_report)
+    
+    return pd.concat([summary_table, dhanushka_table], ignore_index=True)
+
+
+def _log_extraction_report(report):
+    labels = {
+        KIND_SUMMARY: 'Ceylon Petroleum summary',
+        KIND_DHANUSHKA: 'PDF',
+        KIND_EXCEL: 'Excel',
+    }
+    for entry in report:
+        if entry['error'] is not None:
+            logger.error('%s: extraction failed - %s', entry['file'], entry['error'])
+        else:
+            logger.info(
+                '%s: %d records (%s%s)', entry['file'], entry['records'],
+                labels[entry['kind']], ', cached' if entry['cached'] else '',
+            )
+
+
+def daily_demand_from_table(table):
+    """Total demand per day across fuel types: {date_str: demand}."""
+    daily = table.groupby(table['date'].dt.strftime('%Y-%m-%d'))['qty'].sum()
+    return daily.to_dict()
 
 
 def clean_real_data(real_data_dict):
@@ -261,9 +227,11 @@ def clean_real_data(real_data_dict):
         vals = monthly_avgs[mk]
         monthly_avgs[mk] = np.mean(vals)
     
-    print(f"\n🔍 Monthly averages BEFORE cleaning:")
-    for mk in sorted(monthly_avgs.keys()):
-        print(f"  {mk}: avg={monthly_avgs[mk]:.0f}L")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            'Monthly averages before cleaning: %s',
+            ', '.join(f'{mk}={monthly_avgs[mk]:.0f}L' for mk in sorted(monthly_avgs)),
+        )
     
     # November avg (~260L) is ~20x lower than Oct (~3200L) and Dec (~7200L)
     # This indicates only 1 fuel type was captured. Scale it up.
@@ -281,8 +249,10 @@ def clean_real_data(real_data_dict):
             # Only scale if November is suspiciously low (< 20% of reference)
             if nov_avg < ref_avg * 0.2:
                 scale_factor = ref_avg / nov_avg * 0.85  # 0.85 = Nov may genuinely be quieter
-                print(f"\n⚠️ November data appears incomplete (avg {nov_avg:.0f}L vs reference {ref_avg:.0f}L)")
-                print(f"  Scaling November by {scale_factor:.1f}x")
+                logger.warning(
+                    'November data appears incomplete (avg %.0fL vs reference %.0fL); scaling by %.1fx',
+                    nov_avg, ref_avg, scale_factor,
+                )
                 for d in list(real_data_dict.keys()):
                     if d.startswith('2025-11'):
                         real_data_dict[d] = real_data_dict[d] * scale_factor
@@ -302,14 +272,16 @@ def clean_real_data(real_data_dict):
             del real_data_dict[d]
     
     if removed:
-        print(f"\n🗑️ Removed {len(removed)} outliers (IQR bounds: {lower_bound:.0f}-{upper_bound:.0f}L):")
+        logger.info('Removed %d outliers (IQR bounds: %.0f-%.0fL)', len(removed), lower_bound, upper_bound)
         for d, v in removed:
-            print(f"  {d}: {v:.0f}L")
+            logger.debug('Outlier removed: %s %.0fL', d, v)
     
-    # Print cleaned stats
+    # Cleaned stats
     vals = list(real_data_dict.values())
-    print(f"\n✅ After cleaning: {len(real_data_dict)} days")
-    print(f"  Demand range: {min(vals):.0f}L - {max(vals):.0f}L, avg={np.mean(vals):.0f}L")
+    logger.info(
+        'After cleaning: %d days, demand %.0fL - %.0fL, avg=%.0fL',
+        len(real_data_dict), min(vals), max(vals), np.mean(vals),
+    )
     
     return real_data_dict
 
@@ -334,16 +306,7 @@ def compute_employee_count(fuel_demand, day_of_week, is_holiday, pre_holiday,
     
     # --- PHASE 3: Temporal & Contextual Adjustments ---
     # Day of week - stations are busier on weekends and Fridays
-    day_weights = {
-        0: 0.5,   # Mon
-        1: 0.0,   # Tue
-        2: 0.0,   # Wed
-        3: 1.0,   # Thu
-        4: 3.0,   # Fri (Weekend prep)
-        5: 4.0,   # Sat (Peak travel)
-        6: 1.5,   # Sun
-    }
-    points += day_weights.get(day_of_week, 0.0)
+    points += DAY_WEIGHTS.get(day_of_week, 0.0)
     
     # Holiday effects (Huge impact in Sri Lanka)
     if is_holiday:
@@ -352,13 +315,7 @@ def compute_employee_count(fuel_demand, day_of_week, is_holiday, pre_holiday,
         points += 4.5  # People fueling up for trips
     
     # Weather impact (Directly affects outdoor pumping activity)
-    weather_points = {
-        'Sunny': 1.0, 
-        'Cloudy': 0.5, 
-        'Rainy': -2.0,   # People avoid stopping in rain
-        'Stormy': -4.5   # Safety concerns significantly reduce staff need
-    }
-    points += weather_points.get(weather, 0.0)
+    points += WEATHER_POINTS.get(weather, 0.0)
     
     # Seasonal/Other factors
     if is_vacation:
@@ -378,13 +335,90 @@ def compute_employee_count(fuel_demand, day_of_week, is_holiday, pre_holiday,
     return int(np.ceil(max(2, min(points, 20))))
 
 
-def generate_real_only_data(max_augmented=0):
+def compute_employee_counts(fuel_demand, day_of_week, is_holiday, pre_holiday,
+                            weather, is_vacation, temperature, is_month_end, rng):
+    """
+    Vectorized compute_employee_count: same weighted point system,
+    evaluated over arrays (one entry per row).
+    
+    Args:
+        rng: Seeded numpy Generator used for the per-row noise
+    
+    Returns:
+        Integer numpy array of employee counts
+    """
+    fuel_demand = np.asarray(fuel_demand, dtype=float)
+    weather = np.asarray(weather)
+    
+    day_weights = np.array([DAY_WEIGHTS[d] for d in range(7)])  # Mon..Sun
+    
+    points = 3.0 + fuel_demand / 1200.0
+    points += day_weights[np.asarray(day_of_week, dtype=np.int64)]
+    points += 3.0 * np.asarray(is_holiday) + 4.5 * np.asarray(pre_holiday)
+    for category, pts in WEATHER_POINTS.items():
+        points += np.where(weather == category, pts, 0.0)
+    points += 1.5 * np.asarray(is_vacation) + 1.5 * np.asarray(is_month_end)
+    points += np.where(np.asarray(temperature) > 33, 1.0, 0.0)
+    points += rng.normal(0, 0.2, size=len(points))
+    
+    return np.ceil(np.clip(points, 2, 20)).astype(np.int64)
+
+
+def augment_real_rows(base_df, max_augmented, rng, augment_factor=len(AUGMENT_NOISE_PCTS)):
+    """
+    Build augmented noise variants of real rows, sampling only the rows kept.
+    
+    Each real row has augment_factor candidate variants (cycling through
+    AUGMENT_NOISE_PCTS). max_augmented of the len(base_df) * augment_factor
+    candidates are sampled up front, and only those are materialized.
+    
+    Args:
+        base_df: DataFrame of real rows (generate_real_only_data base rows)
+        max_augmented: Number of augmented rows to return (capped by candidates)
+        rng: Seeded numpy Generator
+        augment_factor: Candidate variants per real row
+    
+    Returns:
+        DataFrame of augmented rows with data_source='augmented'
+    """
+    n_candidates = len(base_df) * augment_factor
+    n_keep = min(max_augmented, n_candidates)
+    if n_keep <= 0:
+        return base_df.iloc[0:0].copy()
+    
+    picked = rng.choice(n_candidates, size=n_keep, replace=False)
+    row_idx = picked // augment_factor
+    variant = picked % augment_factor
+    noise_pct = np.asarray(AUGMENT_NOISE_PCTS)[variant % len(AUGMENT_NOISE_PCTS)]
+    
+    aug = base_df.iloc[row_idx].reset_index(drop=True)
+    
+    base_demand = aug['predicted_fuel_demand'].to_numpy(dtype=float)
+    noisy_demand = np.maximum(100, base_demand * (1 + noise_pct + rng.normal(0, 0.02, size=n_keep)))
+    
+    weather, temperature = simulate_weather_arrays(aug['month'].to_numpy(), rng)
+    
+    aug['employee_count'] = compute_employee_counts(
+        noisy_demand, aug['day_of_week'].to_numpy(), aug['is_holiday'].to_numpy(),
+        aug['is_day_before_holiday'].to_numpy(), weather, aug['is_vacation'].to_numpy(),
+        temperature, aug['is_month_end'].to_numpy(), rng
+    )
+    aug['weather'] = weather
+    aug['temperature'] = np.round(temperature + rng.normal(0, 0.8, size=n_keep), 1)
+    aug['predicted_fuel_demand'] = np.round(noisy_demand, 1)
+    aug['data_source'] = 'augmented'
+    
+    return aug
+
+
+def generate_real_only_data(max_augmented=0, augment_factor=len(AUGMENT_NOISE_PCTS)):
     """
     Generates a training dataset using ONLY real fuel demand data.
     No synthetic data is used.
     
     Args:
         max_augmented: Maximum number of augmented rows to add (0 = no augmentation)
+        augment_factor: Candidate noise variants per real row to sample from
     
     Pipeline:
     1. Load real data from data/real/
@@ -399,7 +433,7 @@ def generate_real_only_data(max_augmented=0):
     np.random.seed(42)
     
     # ---- Load and clean ----
-    real_data_dict = load_real_data()
+    real_data_dict = daily_demand_from_table(load_real_data())
     print(f"\n📊 Loaded {len(real_data_dict)} unique days of real data")
     
     if not real_data_dict:
@@ -466,59 +500,19 @@ def generate_real_only_data(max_augmented=0):
     print(f"\n📋 Base dataset: {base_count} real data rows")
     
     # ---- Augmentation (optional) ----
+    df = pd.DataFrame(data)
     if max_augmented > 0:
-        augmented = []
-        
-        for row in data:
-            current_date = datetime.strptime(row['date'], "%Y-%m-%d")
-            base_demand = row['predicted_fuel_demand']
-            
-            # --- Variant 1: Demand noise (+/- 10-15%) ---
-            for noise_pct in [-0.12, -0.06, 0.06, 0.12]:
-                noisy_demand = max(100, base_demand * (1 + noise_pct + np.random.normal(0, 0.02)))
-                
-                weather_data = simulate_weather_for_date(current_date)
-                weather = weather_data['weather']
-                temperature = weather_data['temperature']
-                
-                emp = compute_employee_count(
-                    noisy_demand, row['day_of_week'], row['is_holiday'],
-                    row['is_day_before_holiday'], weather, row['is_vacation'],
-                    row['month'], temperature, row['is_month_end'], real_median
-                )
-                
-                augmented.append({
-                    'date': row['date'],
-                    'month': row['month'],
-                    'day_of_week': row['day_of_week'],
-                    'day_of_month': row['day_of_month'],
-                    'week_of_year': row['week_of_year'],
-                    'is_weekend': row['is_weekend'],
-                    'is_month_end': row['is_month_end'],
-                    'is_holiday': row['is_holiday'],
-                    'is_vacation': row['is_vacation'],
-                    'is_day_before_holiday': row['is_day_before_holiday'],
-                    'is_friday': row['is_friday'],
-                    'weather': weather,
-                    'temperature': round(temperature + np.random.normal(0, 0.8), 1),
-                    'predicted_fuel_demand': round(noisy_demand, 1),
-                    'employee_count': emp,
-                    'data_source': 'augmented'
-                })
-        
-        # Cap augmented rows to max_augmented
-        if len(augmented) > max_augmented:
-            random.shuffle(augmented)
-            augmented = augmented[:max_augmented]
-        
-        data.extend(augmented)
+        augmented = augment_real_rows(
+            df, max_augmented, np.random.default_rng(42), augment_factor=augment_factor
+        )
+        df = pd.concat([df, augmented], ignore_index=True)
         print(f"🔄 Augmented: {len(augmented)} rows added (max={max_augmented})")
     else:
         print("📌 No augmentation — using pure real data only")
     
-    print(f"✅ Total dataset: {len(data)} rows")
+    print(f"✅ Total dataset: {len(df)} rows")
     
-    return pd.DataFrame(data)
+    return df
 
 
 # Keep backward compatibility
@@ -569,6 +563,7 @@ def save_data(df, filename='employee_demand_dataset.csv'):
 
 
 if __name__ == "__main__":
+    setup_logging(fmt='text')
     print("=" * 60)
     print("GENERATING DATASET FROM REAL FUEL DATA ONLY")
     print("=" * 60)
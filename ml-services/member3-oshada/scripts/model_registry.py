@@ -0,0 +1,150 @@
+# scripts/model_registry.py
+"""
+Inspect and switch registered versions of the employee demand model
+(utils/registry.py).
+
+    python scripts/model_registry.py list
+    python scripts/model_registry.py verify                  # the active version
+    python scripts/model_registry.py promote 20260301-020000
+    python scripts/model_registry.py rollback
+    python scripts/model_registry.py adopt --promote         # register flat models/ artifacts
+
+promote / rollback swap models/CURRENT atomically; API workers load the new
+version on their next start (FUELWATCH_EMPLOYEE_MODEL_VERSION pins one).
+adopt turns a models dir from before the registry into its first version
+(exporting the compact bundle if it is missing).
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import joblib
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.forest import COMPACT_DIRNAME, export_employee_model
+from utils.registry import (
+    commit_version, current_version, discard_staging, list_versions, predict_latency, promote, rollback,
+    stage_version, verify_version
+)
+
+
+def _fmt(value, spec='.4f'):
+    return format(value, spec) if isinstance(value, (int, float)) else '-'
+
+
+def cmd_list(args):
+    active = current_version(args.models_dir)
+    rows = list_versions(args.models_dir)
+    if not rows:
+        print(f"No registered versions in {args.models_dir}")
+        return
+    print(f"{'':2}{'version':<20}{'source':<26}{'MAE':>8}{'R2':>8}{'load ms':>9}{'1 row ms':>10}{'366 ms':>9}")
+    for m in rows:
+        metrics = m.get('metrics', {})
+        latency = metrics.get('latency_ms') or {}
+        mark = '* ' if m['version'] == active else '  '
+        print(f"{mark}{m['version']:<20}{m.get('source') or '-':<26}{_fmt(metrics.get('mae')):>8}"
+              f"{_fmt(metrics.get('r2')):>8}{_fmt(latency.get('load_ms'), '.1f'):>9}"
+              f"{_fmt(latency.get('predict_1_row_ms'), '.2f'):>10}{_fmt(latency.get('predict_366_rows_ms'), '.2f'):>9}")
+    if args.json:
+        print(json.dumps(rows, indent=2))
+
+
+def cmd_verify(args):
+    version = args.version or current_version(args.models_dir)
+    if version is None:
+        print(f"{args.models_dir} has no active version")
+        sys.exit(1)
+    problems = verify_version(args.models_dir, version)
+    if problems:
+        print(f"{version}: FAILED")
+        for problem in problems:
+            print(f"  {problem}")
+        sys.exit(1)
+    print(f"{version}: ok")
+
+
+def cmd_promote(args):
+    try:
+        previous = promote(args.models_dir, args.version)
+    except (FileNotFoundError, ValueError) as e:
+        print(e)
+        sys.exit(1)
+    print(f"Active model: {args.version} (was {previous or 'flat layout'})")
+
+
+def cmd_rollback(args):
+    try:
+        target = rollback(args.models_dir)
+    except (FileNotFoundError, ValueError) as e:
+        print(e)
+        sys.exit(1)
+    if target is None:
+        print(f"No earlier promotion recorded in {args.models_dir}")
+        sys.exit(1)
+    print(f"Rolled back to {target}")
+
+
+def cmd_adopt(args):
+    meta_path = os.path.join(args.models_dir, 'model_meta.json')
+    if not os.path.exists(os.path.join(args.models_dir, 'employee_model.joblib')) or not os.path.exists(meta_path):
+        print(f"No flat model artifacts to adopt in {args.models_dir}")
+        sys.exit(1)
+    with open(meta_path, 'r') as f:
+        metrics = dict(json.load(f).get('metrics', {}))
+
+    staging = stage_version(args.models_dir, base=args.models_dir)
+    try:
+        compact_dir = os.path.join(staging, COMPACT_DIRNAME)
+        if not os.path.exists(os.path.join(compact_dir, 'meta.json')):
+            # versions are immutable, so the API's compact form is added now
+            model_path = os.path.join(staging, 'employee_model.joblib')
+            export_employee_model(joblib.load(model_path), compact_dir, source_path=model_path)
+        if os.path.exists(args.data):
+            feature_cols = joblib.load(os.path.join(staging, 'model_columns.joblib'))
+            metrics['latency_ms'] = predict_latency(staging, pd.read_csv(args.data)[feature_cols])
+        version, version_path = commit_version(args.models_dir, staging, metrics=metrics, source='adopted')
+    except BaseException:
+        discard_staging(staging)
+        raise
+    print(f"Registered {args.models_dir} as version {version}: {version_path}")
+    if args.promote:
+        promote(args.models_dir, version)
+        print(f"Active model: {version}")
+
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    base_dir = os.path.dirname(script_dir)
+
+    parser = argparse.ArgumentParser(description="Manage registered employee demand model versions")
+    parser.add_argument('--models-dir', default=os.path.join(base_dir, 'models'))
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('list', help="Registered versions, * marks the active one")
+    p.add_argument('--json', action='store_true', help="Also print the full manifests")
+    p.set_defaults(fn=cmd_list)
+    p = sub.add_parser('verify', help="Check a version's files against its manifest checksums")
+    p.add_argument('version', nargs='?', default=None)
+    p.set_defaults(fn=cmd_verify)
+    p = sub.add_parser('promote', help="Make a version the active one")
+    p.add_argument('version')
+    p.set_defaults(fn=cmd_promote)
+    p = sub.add_parser('rollback', help="Re-activate the version that was active before the current one")
+    p.set_defaults(fn=cmd_rollback)
+    p = sub.add_parser('adopt', help="Register the flat artifacts in --models-dir as a version")
+    p.add_argument('--data', default=os.path.join(base_dir, 'data', 'employee_demand_dataset.csv'),
+                   help="Rows to measure predict latency on")
+    p.add_argument('--promote', action='store_true')
+    p.set_defaults(fn=cmd_adopt)
+
+    args = parser.parse_args()
+    args.fn(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# scripts/plot_performance.py
+"""
+Render the performance chart (actual vs predicted, residuals) for the
+employee demand model.
+
+Separate from training so production retrains skip matplotlib entirely:
+
+    python scripts/plot_performance.py              # active model -> models/performance_chart.png
+    python scripts/train_model.py --charts          # right after training, into the new version
+"""
+
+import argparse
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.model_selection import train_test_split
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.registry import resolve
+
+
+def plot_performance(y_test, y_pred, chart_path, dpi=300):
+    """
+    Save the actual-vs-predicted scatter and the residual histogram.
+
+    Args:
+        y_test: Actual employee counts of the test split
+        y_pred: Model predictions for the same rows
+        chart_path: Output PNG path
+        dpi: Output resolution
+
+    Returns:
+        chart_path
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    y_test = pd.Series(np.asarray(y_test))
+    y_pred = np.asarray(y_pred)
+    mae = mean_absolute_error(y_test, y_pred)
+    r2 = r2_score(y_test, y_pred)
+
+    plt.figure(figsize=(14, 6))
+
+    # 1. Scatter Plot (Actual vs Predicted)
+    plt.subplot(1, 2, 1)
+    sns.scatterplot(x=y_test, y=y_pred, alpha=0.6, color='blue', edgecolor='w', s=80)
+
+    # Perfect prediction line
+    min_val = min(y_test.min(), y_pred.min())
+    max_val = max(y_test.max(), y_pred.max())
+    plt.plot([min_val, max_val], [min_val, max_val], 'r--', linewidth=2, label='Perfect Prediction')
+
+    plt.xlabel('Actual Employee Demand', fontsize=12)
+    plt.ylabel('Predicted Employee Demand', fontsize=12)
+    plt.title(f'Actual vs Predicted Demand\n(R²={r2:.3f}, MAE={mae:.3f})', fontsize=14)
+    plt.legend()
+    plt.grid(True, linestyle='--', alpha=0.7)
+
+    # 2. Residual Plot
+    plt.subplot(1, 2, 2)
+    residuals = y_test - y_pred
+    sns.histplot(residuals, kde=True, color='purple', bins=20)
+    plt.xlabel('Residuals (Actual - Predicted)', fontsize=12)
+    plt.ylabel('Frequency', fontsize=12)
+    plt.title('Distribution of Prediction Errors (Residuals)', fontsize=14)
+    plt.grid(True, linestyle='--', alpha=0.7)
+
+    # Add zero error line
+    plt.axvline(x=0, color='r', linestyle='--', linewidth=2)
+
+    plt.tight_layout()
+    plt.savefig(chart_path, dpi=dpi, bbox_inches='tight')
+    plt.close()
+    return chart_path
+
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    base_dir = os.path.dirname(script_dir)
+
+    parser = argparse.ArgumentParser(description="Render the employee demand model performance chart")
+    parser.add_argument('--data', default=os.path.join(base_dir, 'data', 'employee_demand_dataset.csv'))
+    parser.add_argument('--models-dir', default=os.path.join(base_dir, 'models'))
+    parser.add_argument('--version', default=None, help="Registered version (default: the active one)")
+    parser.add_argument('--dpi', type=int, default=300)
+    args = parser.parse_args()
+
+    # registered versions are checksummed, so the chart goes next to them, not inside
+    model_dir, _ = resolve(args.models_dir, args.version)
+    model = joblib.load(os.path.join(model_dir, 'employee_model.joblib'))
+    feature_cols = joblib.load(os.path.join(model_dir, 'model_columns.joblib'))
+    df = pd.read_csv(args.data)
+
+    # Same split as training
+    _, X_test, _, y_test = train_test_split(
+        df[feature_cols], df['employee_count'], test_size=0.2, random_state=42
+    )
+    chart_path = plot_performance(y_test, model.predict(X_test), os.path.join(args.models_dir, 'performance_chart.png'),
+                                  dpi=args.dpi)
+    print(f"Performance chart saved: {chart_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,156 @@
 # scripts/train_model.py
 """
 Train Random Forest model for employee demand prediction.
+
+    python scripts/train_model.py                    # all cores, no charts
+    python scripts/train_model.py --cores 4 --charts
+
+The cross-validation folds and the final fit run as one batch of jobs under a
+core budget (--cores): up to folds + 1 fits run side by side, and each forest
+gets the cores left per job. Fold models are kept long enough to report the
+spread of the feature importances. The performance chart is an optional stage
+(--charts, or scripts/plot_performance.py later) so production retrains never
+import matplotlib.
+
+Each run is registered as a new version under models/versions/ with file
+checksums, test metrics and predict latency in its manifest
+(utils/registry.py), and becomes the active model unless --no-promote is
+given. scripts/model_registry.py lists, verifies and switches versions.
 """
 
+import argparse
+import sys
+import time
+
 import pandas as pd
 import numpy as np
 import joblib
 import json
 import os
-from sklearn.model_selection import train_test_split, cross_val_score
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split, KFold
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 from sklearn.preprocessing import OneHotEncoder
-import matplotlib.pyplot as plt
-import seaborn as sns
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.forest import COMPACT_DIRNAME, export_employee_model
+from utils.registry import commit_version, discard_staging, predict_latency, promote as promote_version, stage_version
+
+
+def _fit_job(model, X, y, train_idx, val_idx):
+    """
+    Fit one clone of the pipeline on the given rows.
+
+    Args:
+        model: Unfitted pipeline (cloned here)
+        X, y: Training features / target
+        train_idx: Rows to fit on
+        val_idx: Rows to score (None for the final fit)
+
+    Returns:
+        (fitted pipeline, validation MAE or None, fit seconds)
+    """
+    t0 = time.perf_counter()
+    fitted = clone(model).fit(X.iloc[train_idx], y.iloc[train_idx])
+    val_mae = None
+    if val_idx is not None:
+        val_mae = mean_absolute_error(y.iloc[val_idx], fitted.predict(X.iloc[val_idx]))
+    return fitted, val_mae, time.perf_counter() - t0
+
+
+def fit_with_cv(model, X_train, y_train, folds=5, cores=None):
+    """
+    Cross-validate and fit the final model in one parallel batch.
+
+    Args:
+        model: Unfitted pipeline whose 'regressor' step takes n_jobs
+        X_train, y_train: Training split
+        folds: KFold splits (same folds as cross_val_score(cv=folds))
+        cores: Core budget (default: all cores)
+
+    Returns:
+        (final model, fold models, fold MAEs, info dict)
+    """
+    cores = max(1, cores or os.cpu_count() or 1)
+    jobs = min(folds + 1, cores)
+    rf_jobs = max(1, cores // jobs)
+    serving_jobs = model.get_params()['regressor__n_jobs']
+    model = clone(model).set_params(regressor__n_jobs=rf_jobs)
+
+    all_rows = np.arange(len(X_train))
+    tasks = [(train_idx, val_idx) for train_idx, val_idx in KFold(n_splits=folds).split(X_train)]
+    tasks.append((all_rows, None))  # final model on the whole training split
+
+    t0 = time.perf_counter()
+    results = Parallel(n_jobs=jobs)(
+        delayed(_fit_job)(model, X_train, y_train, train_idx, val_idx) for train_idx, val_idx in tasks
+    )
+    info = {
+        'cores': cores,
+        'parallel_fits': jobs,
+        'rf_n_jobs': rf_jobs,
+        'fit_wall_s': round(time.perf_counter() - t0, 3),
+        'fit_cpu_s': round(sum(r[2] for r in results), 3),
+    }
+    # the saved model keeps the pipeline's own n_jobs for serving
+    final_model = results[-1][0].set_params(regressor__n_jobs=serving_jobs)
+    return final_model, [r[0] for r in results[:-1]], np.array([r[1] for r in results[:-1]]), info
+
+
+def _save_artifacts(out_dir, model, meta, feature_cols, y_test, y_pred, charts):
+    """
+    Write one training run's artifacts into a (staging) version directory.
+
+    Args:
+        out_dir: Directory to write into
+        model: Fitted Pipeline
+        meta: model_meta.json contents
+        feature_cols: Model input columns
+        y_test, y_pred: Test targets and predictions (for the chart)
+        charts: Also render performance_chart.png
+    """
+    if charts:
+        from plot_performance import plot_performance
+
+        print("\nGenerating performance charts...")
+        plot_performance(y_test, y_pred, os.path.join(out_dir, 'performance_chart.png'))
+
+    model_path = os.path.join(out_dir, 'employee_model.joblib')
+    joblib.dump(model, model_path)
+    with open(os.path.join(out_dir, 'model_meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    # Also save feature columns for API reference
+    joblib.dump(feature_cols, os.path.join(out_dir, 'model_columns.joblib'))
+
+    # Compact bundle the API loads instead of unpickling the pipeline
+    export_employee_model(model, os.path.join(out_dir, COMPACT_DIRNAME), source_path=model_path)
 
-def train_model():
-    """Train and save the employee demand prediction model."""
+
+def train_model(data_path=None, models_dir=None, cores=None, folds=5, charts=False, promote=True):
+    """
+    Train and save the employee demand prediction model.
+
+    Args:
+        data_path: Training CSV (default: data/employee_demand_dataset.csv)
+        models_dir: Output directory (default: models/)
+        cores: Core budget for cross-validation and fitting (default: all)
+        folds: Cross-validation folds
+        charts: Also render performance_chart.png into the version
+        promote: Make the new version the active model
+    """
     
     # ============================================
     # 1. Load Data
     # ============================================
     script_dir = os.path.dirname(os.path.abspath(__file__))
     base_dir = os.path.dirname(script_dir)
-    data_path = os.path.join(base_dir, 'data', 'employee_demand_dataset.csv')
+    data_path = data_path or os.path.join(base_dir, 'data', 'employee_demand_dataset.csv')
+    models_dir = models_dir or os.path.join(base_dir, 'models')
     
     if not os.path.exists(data_path):
         print(f"Error: Dataset not found at {data_path}")
@@ -101,18 +225,14 @@ def train_model():
     print(f"Testing samples: {len(X_test)}")
     
     # ============================================
-    # 5. Cross-Validation
+    # 5. Cross-Validation + Final Model (parallel)
     # ============================================
-    print("\nPerforming 5-fold cross-validation...")
-    cv_scores = cross_val_score(model, X_train, y_train, cv=5, scoring='neg_mean_absolute_error')
-    print(f"CV MAE scores: {[-s for s in cv_scores]}")
-    print(f"CV MAE mean: {-cv_scores.mean():.4f} (+/- {cv_scores.std() * 2:.4f})")
-    
-    # ============================================
-    # 6. Train Final Model
-    # ============================================
-    print("\nTraining Random Forest Regressor...")
-    model.fit(X_train, y_train)
+    print(f"\nPerforming {folds}-fold cross-validation and the final fit in parallel...")
+    model, fold_models, cv_mae, fit_info = fit_with_cv(model, X_train, y_train, folds=folds, cores=cores)
+    print(f"CV MAE scores: {[round(float(s), 4) for s in cv_mae]}")
+    print(f"CV MAE mean: {cv_mae.mean():.4f} (+/- {cv_mae.std() * 2:.4f})")
+    print(f"Fits: {fit_info['parallel_fits']} at a time x {fit_info['rf_n_jobs']} RF jobs, "
+          f"{fit_info['fit_wall_s']:.2f}s wall ({fit_info['fit_cpu_s']:.2f}s summed fit time)")
     
     # ============================================
     # 7. Evaluate on Test Set
@@ -133,50 +253,7 @@ def train_model():
     print(f"R²:   {r2:.4f} (variance explained)")
     
     # ============================================
-    # 8. Plot Performance Charts
-    # ============================================
-    print("\nGenerating performance charts...")
-    models_dir = os.path.join(base_dir, 'models')
-    if not os.path.exists(models_dir):
-        os.makedirs(models_dir)
-        
-    plt.figure(figsize=(14, 6))
-    
-    # 1. Scatter Plot (Actual vs Predicted)
-    plt.subplot(1, 2, 1)
-    sns.scatterplot(x=y_test, y=y_pred, alpha=0.6, color='blue', edgecolor='w', s=80)
-    
-    # Perfect prediction line
-    min_val = min(y_test.min(), y_pred.min())
-    max_val = max(y_test.max(), y_pred.max())
-    plt.plot([min_val, max_val], [min_val, max_val], 'r--', linewidth=2, label='Perfect Prediction')
-    
-    plt.xlabel('Actual Employee Demand', fontsize=12)
-    plt.ylabel('Predicted Employee Demand', fontsize=12)
-    plt.title(f'Actual vs Predicted Demand\n(R²={r2:.3f}, MAE={mae:.3f})', fontsize=14)
-    plt.legend()
-    plt.grid(True, linestyle='--', alpha=0.7)
-    
-    # 2. Residual Plot
-    plt.subplot(1, 2, 2)
-    residuals = y_test - y_pred
-    sns.histplot(residuals, kde=True, color='purple', bins=20)
-    plt.xlabel('Residuals (Actual - Predicted)', fontsize=12)
-    plt.ylabel('Frequency', fontsize=12)
-    plt.title('Distribution of Prediction Errors (Residuals)', fontsize=14)
-    plt.grid(True, linestyle='--', alpha=0.7)
-    
-    # Add zero error line
-    plt.axvline(x=0, color='r', linestyle='--', linewidth=2)
-    
-    plt.tight_layout()
-    chart_path = os.path.join(models_dir, 'performance_chart.png')
-    plt.savefig(chart_path, dpi=300, bbox_inches='tight')
-    plt.close()
-    print(f"Performance chart saved: {chart_path}")
-    
-    # ============================================
-    # 9. Feature Importance
+    # 8. Feature Importance
     # ============================================
     regressor = model.named_steps['regressor']
     
@@ -185,9 +262,12 @@ def train_model():
     categorical_feature_names = list(ohe.get_feature_names_out(categorical_features))
     all_feature_names = numeric_features + categorical_feature_names
     
+    # Spread across the fold models shows how stable each importance is
+    fold_importances = np.array([m.named_steps['regressor'].feature_importances_ for m in fold_models])
     importance_df = pd.DataFrame({
         'feature': all_feature_names,
-        'importance': regressor.feature_importances_
+        'importance': regressor.feature_importances_,
+        'cv_importance_std': fold_importances.std(axis=0)
     }).sort_values('importance', ascending=False)
     
     print(f"\n{'='*40}")
@@ -196,18 +276,8 @@ def train_model():
     print(importance_df.head(10).to_string(index=False))
     
     # ============================================
-    # 9. Save Model and Metadata
+    # 9. Model Metadata
     # ============================================
-    models_dir = os.path.join(base_dir, 'models')
-    if not os.path.exists(models_dir):
-        os.makedirs(models_dir)
-    
-    # Save model
-    model_path = os.path.join(models_dir, 'employee_model.joblib')
-    joblib.dump(model, model_path)
-    print(f"\nModel saved: {model_path}")
-    
-    # Save metadata
     meta = {
         'feature_columns': feature_cols,
         'target_column': target_col,
@@ -218,8 +288,8 @@ def train_model():
             'rmse': rmse,
             'mse': mse,
             'r2': r2,
-            'cv_mae_mean': -cv_scores.mean(),
-            'cv_mae_std': cv_scores.std()
+            'cv_mae_mean': cv_mae.mean(),
+            'cv_mae_std': cv_mae.std()
         },
         'model_params': {
             'n_estimators': 150,
@@ -230,25 +300,61 @@ def train_model():
         'training_info': {
             'train_samples': len(X_train),
             'test_samples': len(X_test),
-            'total_samples': len(df)
+            'total_samples': len(df),
+            'cv_folds': folds,
+            **fit_info
         },
         'feature_importance': importance_df.to_dict(orient='records')
     }
     
-    meta_path = os.path.join(models_dir, 'model_meta.json')
-    with open(meta_path, 'w') as f:
-        json.dump(meta, f, indent=2)
-    print(f"Metadata saved: {meta_path}")
-    
-    # Also save feature columns for API reference
-    columns_path = os.path.join(models_dir, 'model_columns.joblib')
-    joblib.dump(feature_cols, columns_path)
-    print(f"Columns saved: {columns_path}")
+    # ============================================
+    # 10. Save and Register Version
+    # ============================================
+    # Every artifact of this run goes into a staged version, removed again
+    # if anything fails before it is registered
+    staging = stage_version(models_dir)
+    try:
+        _save_artifacts(staging, model, meta, feature_cols, y_test, y_pred, charts)
+        latency = predict_latency(staging, X_test)
+        version, version_path = commit_version(
+            models_dir, staging, source='scripts/train_model.py',
+            metrics={**meta['metrics'], 'latency_ms': latency},
+        )
+    except BaseException:
+        discard_staging(staging)
+        raise
+
+    print(f"\nRegistered version {version}: {version_path}")
+    print(f"Model saved: {os.path.join(version_path, 'employee_model.joblib')}")
+    print(f"Metadata saved: {os.path.join(version_path, 'model_meta.json')}")
+    print(f"Columns saved: {os.path.join(version_path, 'model_columns.joblib')}")
+    print(f"Compact model saved: {os.path.join(version_path, COMPACT_DIRNAME)}")
+    if charts:
+        print(f"Performance chart saved: {os.path.join(version_path, 'performance_chart.png')}")
+    print(f"Latency ({latency['format']}): load {latency['load_ms']:.1f} ms, "
+          f"1 row {latency['predict_1_row_ms']:.2f} ms, 366 rows {latency['predict_366_rows_ms']:.2f} ms")
+    if promote:
+        previous = promote_version(models_dir, version)
+        print(f"Active model: {version} (was {previous or 'flat layout'})")
     
     print(f"\n{'='*60}")
     print("TRAINING COMPLETE")
     print(f"{'='*60}")
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the employee demand Random Forest")
+    parser.add_argument('--data', default=None, help="Training CSV (default: data/employee_demand_dataset.csv)")
+    parser.add_argument('--models-dir', default=None, help="Output directory (default: models/)")
+    parser.add_argument('--cores', type=int, default=None, help="Core budget for CV + final fit (default: all)")
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--charts', action='store_true', help="Also render the performance chart")
+    parser.add_argument('--no-promote', dest='promote', action='store_false',
+                        help="Register the version without making it the active model")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    train_model()
+    args = parse_args()
+    train_model(args.data, args.models_dir, cores=args.cores, folds=args.folds, charts=args.charts,
+                promote=args.promote)
@@ -5,8 +5,8 @@ Quickly view model performance scores (R2, F2, MAE, etc.) for Member 3.
 
 import pandas as pd
 import numpy as np
-import joblib
 import os
+import sys
 from sklearn.metrics import (
     mean_absolute_error, 
     mean_squared_error, 
@@ -17,20 +17,29 @@ from sklearn.metrics import (
 )
 from sklearn.model_selection import train_test_split
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.forest import open_employee_model
+from utils.registry import resolve
+
 def calculate_scores():
     # Define paths
     script_dir = os.path.dirname(os.path.abspath(__file__))
     base_dir = os.path.dirname(script_dir)
     data_path = os.path.join(base_dir, 'data', 'employee_demand_dataset.csv')
-    model_path = os.path.join(base_dir, 'models', 'employee_model.joblib')
+    models_dir = os.path.join(base_dir, 'models')
 
-    if not os.path.exists(data_path) or not os.path.exists(model_path):
+    if not os.path.exists(data_path):
         print("Error: Data or Model not found.")
         return
 
-    # Load data and model
+    # Load data and model (compact bundle when exported)
+    try:
+        model, _ = open_employee_model(resolve(models_dir)[0])
+    except FileNotFoundError:
+        print("Error: Data or Model not found.")
+        return
     df = pd.read_csv(data_path)
-    model = joblib.load(model_path)
 
     # Prepare features
     feature_cols = [
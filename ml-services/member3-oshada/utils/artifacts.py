@@ -0,0 +1,140 @@
+# utils/artifacts.py
+"""
+Read-only model artifacts shared between API worker processes.
+
+Numeric artifacts are stored as bundles: a directory of .npy arrays plus a
+meta.json, opened with mmap_mode='r'. Every worker that opens the same bundle
+maps the same page-cache pages, so adding workers does not add copies of the
+arrays. process_memory() reports what each worker costs on its own versus
+what it shares, for /health.
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+
+# bundle name -> bytes mapped by this process
+_MAPPED = {}
+
+
+def save_bundle(out_dir: str, arrays: dict, meta: dict) -> str:
+    """
+    Write arrays as .npy files plus meta.json into out_dir, replacing any
+    bundle already there.
+
+    The bundle is built in a temp dir next to out_dir and renamed into
+    place; an existing bundle is renamed aside first and then deleted. Its
+    files are never rewritten, so workers that have them mapped keep reading
+    the old arrays instead of crashing (SIGBUS) or mixing new arrays with the
+    old meta.json.
+    """
+    out_dir = os.path.normpath(out_dir)
+    parent, name = os.path.split(out_dir)
+    tmp_dir = os.path.join(parent, f'.{name}.tmp{os.getpid()}')
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    try:
+        os.makedirs(tmp_dir)
+        for array_name, arr in arrays.items():
+            np.save(os.path.join(tmp_dir, f'{array_name}.npy'), np.ascontiguousarray(arr))
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+        if os.path.exists(out_dir):
+            old_dir = os.path.join(parent, f'.{name}.old{os.getpid()}')
+            shutil.rmtree(old_dir, ignore_errors=True)
+            os.replace(out_dir, old_dir)
+            try:
+                os.replace(tmp_dir, out_dir)
+            except OSError:
+                os.replace(old_dir, out_dir)
+                raise
+            shutil.rmtree(old_dir, ignore_errors=True)
+        else:
+            os.replace(tmp_dir, out_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return out_dir
+
+
+def load_bundle(bundle_dir: str, names, mmap: bool = True):
+    """
+    Open a bundle written by save_bundle.
+
+    Args:
+        bundle_dir: Bundle directory
+        names: Array names to load
+        mmap: Memory-map the arrays read-only (default) instead of reading them
+
+    Returns:
+        (arrays dict, meta dict)
+    """
+    meta_path = os.path.join(bundle_dir, 'meta.json')
+    if not os.path.exists(meta_path):
+        raise FileNotFoundError(f'Missing artifact meta: {meta_path}')
+
+    with open(meta_path, 'r') as f:
+        meta = json.load(f)
+
+    mode = 'r' if mmap else None
+    arrays = {name: np.load(os.path.join(bundle_dir, f'{name}.npy'), mmap_mode=mode) for name in names}
+
+    if mmap:
+        _MAPPED[os.path.basename(os.path.normpath(bundle_dir))] = int(sum(a.nbytes for a in arrays.values()))
+    return arrays, meta
+
+
+def _read_kb_fields(path: str, fields) -> dict:
+    out = {}
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                key, _, rest = line.partition(':')
+                if key in fields:
+                    out[key] = int(rest.split()[0])
+    except OSError:
+        pass
+    return out
+
+
+def _mb(kb: int) -> float:
+    return round(kb / 1024.0, 1)
+
+
+def process_memory() -> dict:
+    """
+    Memory of this worker process from /proc (Linux only), in MB.
+
+    private_mb is what this worker alone costs; shared_mb are pages also
+    mapped by other processes (mmapped bundles, shared libraries, pages
+    inherited copy-on-write from a preloading parent); pss_mb splits shared
+    pages evenly between the processes mapping them.
+    """
+    info = {'pid': os.getpid()}
+    status = _read_kb_fields('/proc/self/status', {'VmRSS', 'VmHWM', 'RssAnon', 'RssFile'})
+    if not status:
+        info['available'] = False
+        return info
+
+    info.update({
+        'available': True,
+        'rss_mb': _mb(status.get('VmRSS', 0)),
+        'peak_rss_mb': _mb(status.get('VmHWM', 0)),
+        'anon_mb': _mb(status.get('RssAnon', 0)),
+        'file_backed_mb': _mb(status.get('RssFile', 0)),
+    })
+
+    rollup = _read_kb_fields(
+        '/proc/self/smaps_rollup',
+        {'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty'},
+    )
+    if rollup:
+        info.update({
+            'pss_mb': _mb(rollup.get('Pss', 0)),
+            'private_mb': _mb(rollup.get('Private_Clean', 0) + rollup.get('Private_Dirty', 0)),
+            'shared_mb': _mb(rollup.get('Shared_Clean', 0) + rollup.get('Shared_Dirty', 0)),
+        })
+
+    info['mapped_artifacts_mb'] = {name: round(n / (1024 * 1024), 3) for name, n in _MAPPED.items()}
+    return info
@@ -0,0 +1,245 @@
+# utils/forest.py
+"""
+Compact, memory-mappable form of the employee demand model.
+
+The trained model is a Pipeline(ColumnTransformer(numeric passthrough +
+OneHotEncoder(weather)), RandomForestRegressor). export_employee_model()
+flattens it into a utils.artifacts bundle of plain .npy arrays:
+
+    feature.npy    int32   (n_nodes,)      split column of the encoded row (0 at leaves)
+    threshold.npy  float64 (n_nodes,)      split threshold (+inf at leaves)
+    children.npy   int32   (n_nodes, 2)    global index of left / right child
+    value.npy      float64 (n_nodes,)      node prediction (mean target)
+    roots.npy      int32   (n_trees,)      global index of each tree's root
+    depth.npy      int32   (n_trees,)      depth of each tree
+    meta.json                              input columns, one-hot categories, sizes
+
+CompactEmployeeModel.predict() encodes the rows itself (numeric columns in
+order, then one 0/1 column per category; unknown categories encode as all
+zeros like handle_unknown='ignore') and walks all trees one level at a time
+over the batch. Trees are stored deepest first, so at level d only the trees
+deeper than d are advanced. Loading maps the arrays read-only instead of
+unpickling ~150 tree objects, and gunicorn workers share the pages.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from utils.artifacts import load_bundle, save_bundle
+
+FOREST_FORMAT_VERSION = 1
+
+COMPACT_DIRNAME = 'employee_compact'
+
+_ARRAYS = ('feature', 'threshold', 'children', 'value', 'roots', 'depth')
+
+
+def _input_layout(preprocessor):
+    """
+    (numeric columns, {categorical column: categories}) in the order the
+    fitted ColumnTransformer lays out its output.
+    """
+    from sklearn.preprocessing import FunctionTransformer, OneHotEncoder
+
+    if preprocessor.remainder != 'drop':
+        raise ValueError('Only ColumnTransformers with remainder="drop" can be exported')
+
+    numeric, categorical = [], {}
+    for name, transformer, columns in preprocessor.transformers_:
+        if name == 'remainder':
+            continue
+        passthrough = transformer == 'passthrough' or (
+            isinstance(transformer, FunctionTransformer) and transformer.func is None
+        )
+        if passthrough:
+            if categorical:
+                raise ValueError('Numeric columns must come before one-hot columns')
+            numeric.extend(columns)
+        elif isinstance(transformer, OneHotEncoder):
+            if transformer.drop is not None or transformer.handle_unknown != 'ignore':
+                raise ValueError('Only OneHotEncoder(handle_unknown="ignore") without drop can be exported')
+            for col, cats in zip(columns, transformer.categories_):
+                categorical[col] = [c.item() if hasattr(c, 'item') else c for c in cats]
+        else:
+            raise ValueError(f'Unsupported transformer for export: {name} ({type(transformer).__name__})')
+    return numeric, categorical
+
+
+def export_employee_model(model, out_dir, source_path=None):
+    """
+    Write a fitted employee demand Pipeline as a compact bundle.
+
+    Args:
+        model: Pipeline with 'preprocessor' and 'regressor' (RandomForestRegressor) steps
+        out_dir: Bundle directory
+        source_path: The .joblib the model came from (recorded in meta.json)
+
+    Returns:
+        out_dir
+    """
+    rf = model.named_steps['regressor']
+    if getattr(rf, 'n_outputs_', 1) != 1:
+        raise ValueError('Only single-output forests can be exported')
+    numeric, categorical = _input_layout(model.named_steps['preprocessor'])
+    n_encoded = len(numeric) + sum(len(c) for c in categorical.values())
+    if n_encoded != rf.n_features_in_:
+        raise ValueError(f'Encoded row has {n_encoded} columns, the forest expects {rf.n_features_in_}')
+
+    features, thresholds, children, values, roots, depths = [], [], [], [], [], []
+    offset = 0
+
+    # deepest trees first (the mean over trees is order-independent)
+    for est in sorted(rf.estimators_, key=lambda e: e.tree_.max_depth, reverse=True):
+        t = est.tree_
+        idx = np.arange(t.node_count, dtype=np.int64) + offset
+        is_leaf = t.children_left == -1
+
+        features.append(np.where(is_leaf, 0, t.feature).astype(np.int32))
+        thresholds.append(np.where(is_leaf, np.inf, t.threshold).astype(np.float64))
+        children.append(np.column_stack([
+            np.where(is_leaf, idx, t.children_left + offset),
+            np.where(is_leaf, idx, t.children_right + offset),
+        ]).astype(np.int32))
+        values.append(t.value[:, 0, 0].astype(np.float64))
+
+        roots.append(offset)
+        depths.append(int(t.max_depth))
+        offset += t.node_count
+
+    if offset >= np.iinfo(np.int32).max:
+        raise ValueError('Forest too large for int32 node indices')
+
+    arrays = {
+        'feature': np.concatenate(features),
+        'threshold': np.concatenate(thresholds),
+        'children': np.concatenate(children),
+        'value': np.concatenate(values),
+        'roots': np.asarray(roots, dtype=np.int32),
+        'depth': np.asarray(depths, dtype=np.int32),
+    }
+    meta = {
+        'format_version': FOREST_FORMAT_VERSION,
+        'n_trees': len(roots),
+        'n_nodes': int(offset),
+        'max_depth': max(depths, default=0),
+        'numeric_features': list(numeric),
+        'categories': categorical,
+        'source': os.path.basename(source_path) if source_path else None,
+    }
+    return save_bundle(out_dir, arrays, meta)
+
+
+class CompactEmployeeModel:
+    """predict() of the exported pipeline, without sklearn."""
+
+    def __init__(self, bundle_dir, mmap=True):
+        meta_path = os.path.join(bundle_dir, 'meta.json')
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f'Missing compact model meta: {meta_path}')
+        with open(meta_path, 'r') as f:
+            version = json.load(f).get('format_version')
+        if version != FOREST_FORMAT_VERSION:
+            raise ValueError(f'Unsupported compact model format: {version}')
+
+        arrays, self.meta = load_bundle(bundle_dir, _ARRAYS, mmap=mmap)
+        for name in _ARRAYS:
+            setattr(self, name, arrays[name])
+
+        self.bundle_dir = bundle_dir
+        self.numeric_features = self.meta['numeric_features']
+        self.categories = {col: np.asarray(cats, dtype=object) for col, cats in self.meta['categories'].items()}
+        self.feature_columns = self.numeric_features + list(self.categories)
+        self.n_trees = int(self.meta['n_trees'])
+        self.max_depth = int(self.meta['max_depth'])
+
+        # _active[d] = number of trees with depth > d (trees are deepest first)
+        depth = np.asarray(self.depth)
+        self._active = [int(np.count_nonzero(depth > d)) for d in range(self.max_depth)]
+        self._child = self.children.reshape(-1)  # [2*i] left, [2*i + 1] right
+
+    def encode(self, X):
+        """
+        Encoded float32 rows, as the pipeline's preprocessor would produce.
+
+        Args:
+            X: DataFrame (or dict of columns) holding feature_columns
+
+        Returns:
+            (n_rows, n_encoded) float32 array
+        """
+        numeric = np.column_stack([np.asarray(X[c], dtype=np.float64) for c in self.numeric_features])
+        if np.isnan(numeric).any():
+            raise ValueError('Numeric features must not be NaN')
+        parts = [numeric]
+        for col, cats in self.categories.items():
+            values = np.asarray(X[col], dtype=object)
+            parts.append(values[:, None] == cats[None, :])
+        return np.hstack(parts).astype(np.float32)
+
+    def _leaves(self, X32):
+        """Leaf index reached in every tree: (n_trees, n_samples)."""
+        n = len(X32)
+        Xt = np.ascontiguousarray(X32.T)  # one encoded column contiguous
+        roots = np.asarray(self.roots, dtype=np.intp)
+        if self.max_depth == 0:
+            return np.repeat(roots[:, None], n, axis=1)
+
+        # float32 input vs float64 threshold, the comparison sklearn makes
+        go_right = ~(Xt[self.feature[roots]] <= self.threshold[roots][:, None])
+        node = self._child[(2 * roots)[:, None] + go_right]
+
+        flat = Xt.reshape(-1)
+        cols = np.arange(n, dtype=np.intp)
+        for level in range(1, self.max_depth):
+            k = self._active[level]  # trees deeper than this level
+            cur = node[:k]
+            go_right = ~(flat[self.feature[cur] * n + cols] <= self.threshold[cur])
+            node[:k] = self._child[2 * cur + go_right]
+        return node
+
+    def predict(self, X, batch_size=1024):
+        """
+        Mean of the per-tree leaf values, like Pipeline.predict.
+
+        Args:
+            X: DataFrame (or dict of columns) holding feature_columns
+            batch_size: Rows walked through the trees at once
+
+        Returns:
+            (n_rows,) float64 predictions
+        """
+        X32 = self.encode(X)
+        out = np.empty(len(X32), dtype=np.float64)
+        for start in range(0, len(X32), batch_size):
+            leaves = self._leaves(X32[start:start + batch_size])
+            out[start:start + batch_size] = self.value.take(leaves).sum(axis=0) / self.n_trees
+        return out
+
+
+def open_employee_model(models_dir, prefer_compact=True):
+    """
+    The employee model from models_dir: the compact bundle when it is at
+    least as new as employee_model.joblib, otherwise the pickled pipeline.
+
+    Args:
+        models_dir: Directory with employee_model.joblib and/or employee_compact/
+        prefer_compact: Set False to always unpickle the pipeline
+
+    Returns:
+        (model with predict(DataFrame), 'compact' or 'joblib')
+    """
+    joblib_path = os.path.join(models_dir, 'employee_model.joblib')
+    compact_meta = os.path.join(models_dir, COMPACT_DIRNAME, 'meta.json')
+
+    if prefer_compact and os.path.exists(compact_meta):
+        # a retrained pipeline that was not re-exported wins over a stale bundle
+        if not os.path.exists(joblib_path) or os.path.getmtime(compact_meta) >= os.path.getmtime(joblib_path):
+            return CompactEmployeeModel(os.path.join(models_dir, COMPACT_DIRNAME)), 'compact'
+
+    if not os.path.exists(joblib_path):
+        raise FileNotFoundError(f'Model not found at {joblib_path}')
+    import joblib
+
+    return joblib.load(joblib_path), 'joblib'
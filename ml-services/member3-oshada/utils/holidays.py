@@ -7,6 +7,9 @@ Includes Poya days, national holidays, and vacation period detection.
 from datetime import date, datetime
 from typing import Union
 
+import numpy as np
+import pandas as pd
+
 # Sri Lankan Public Holidays (Fixed dates)
 # Note: Poya days vary each year based on lunar calendar - using 2024-2026 approximations
 FIXED_HOLIDAYS = {
@@ -169,6 +172,66 @@ def get_holiday_name(check_date: Union[date, datetime, str]) -> str:
     return ""
 
 
+# ============================================
+# Vectorized variants (for bulk dataset generation)
+# ============================================
+
+def _poya_holiday_dates() -> pd.DatetimeIndex:
+    """
+    All Poya holidays as a DatetimeIndex, including the day after
+    Vesak/Poson (same-month rule as is_sri_lankan_holiday).
+    """
+    days = []
+    for year, poya_list in POYA_DAYS.items():
+        for poya_month, poya_day in poya_list:
+            days.append(date(year, poya_month, poya_day))
+            if poya_month in SPECIAL_POYA_MONTHS:
+                try:
+                    days.append(date(year, poya_month, poya_day + 1))
+                except ValueError:
+                    pass  # Poya on the last day of the month
+    return pd.DatetimeIndex(days)
+
+
+def holiday_mask(dates) -> np.ndarray:
+    """
+    Vectorized is_sri_lankan_holiday for an array of dates.
+
+    Args:
+        dates: Anything pd.DatetimeIndex accepts (array, Series, list of dates)
+
+    Returns:
+        Boolean numpy array, one entry per date
+    """
+    dates = pd.DatetimeIndex(dates).normalize()
+    month_day = np.asarray(dates.month * 100 + dates.day)
+    fixed = np.array([m * 100 + d for (m, d) in FIXED_HOLIDAYS])
+
+    mask = np.isin(month_day, fixed)
+    mask |= np.asarray(dates.isin(_poya_holiday_dates()))
+    return mask
+
+
+def day_before_holiday_mask(dates) -> np.ndarray:
+    """Vectorized is_day_before_holiday for an array of dates."""
+    dates = pd.DatetimeIndex(dates).normalize()
+    return holiday_mask(dates + pd.Timedelta(days=1))
+
+
+def vacation_mask(dates) -> np.ndarray:
+    """Vectorized is_vacation_period for an array of dates."""
+    dates = pd.DatetimeIndex(dates)
+    month = np.asarray(dates.month)
+    day = np.asarray(dates.day)
+
+    return (
+        ((month == 4) & (day >= 10) & (day <= 20)) |
+        ((month == 8) & (day >= 10) & (day <= 25)) |
+        ((month == 12) & (day >= 20)) |
+        ((month == 1) & (day <= 5))
+    )
+
+
 if __name__ == "__main__":
     # Test the module
     test_dates = [
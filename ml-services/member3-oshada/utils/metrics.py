@@ -0,0 +1,38 @@
+# utils/metrics.py
+"""
+Prometheus-style metrics of the employee demand API. The metric types,
+render() and the FUELWATCH_METRICS switch are shared/metrics.py.
+
+    with stage('inference'):
+        prediction = model.predict(df)[0]
+
+GET /metrics returns render(); values are per gunicorn worker.
+"""
+
+from shared.metrics import CONTENT_TYPE, METRICS_ENABLED, Counter, Gauge, Histogram, render, stage_timer  # noqa: F401
+
+# seconds; single predictions are sub-millisecond, weather API calls can take seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# ============================================
+# Service metrics
+# ============================================
+STAGE_SECONDS = Histogram(
+    'fuelwatch_employee_stage_seconds',
+    'Time spent per stage (weather_fetch, feature_prep, inference, serialization).',
+    ('stage',), buckets=LATENCY_BUCKETS,
+)
+REQUEST_SECONDS = Histogram(
+    'fuelwatch_employee_request_seconds', 'End-to-end request latency.', ('endpoint', 'status'),
+    buckets=LATENCY_BUCKETS,
+)
+BATCH_DAYS = Histogram(
+    'fuelwatch_employee_batch_days', 'Days per /predict/batch request.', (),
+    buckets=(1, 7, 14, 31, 62, 92, 183, 366),
+)
+MODEL_LOADED = Gauge(
+    'fuelwatch_employee_model_loaded', '1 if the employee model is loaded in this worker.', (),
+)
+
+# Stage labels: weather_fetch, feature_prep, inference, serialization
+stage = stage_timer(STAGE_SECONDS)
@@ -0,0 +1,79 @@
+# utils/registry.py
+"""
+Local registry of trained employee demand models.
+
+    models/
+        CURRENT                     id of the active version (one line)
+        versions/<version>/         one training run, never modified
+            employee_model.joblib, model_columns.joblib, model_meta.json,
+            employee_compact/, performance_chart.png (with --charts)
+            manifest.json           sha256 + size of every file, metrics, latency
+        versions/promotions.jsonl   one line per promotion / rollback
+
+Staging, manifests, the atomic CURRENT swap and rollback are shared/registry.py
+(installed with requirements.txt, see shared/README.md). This module adds what
+a version of the employee model is made of and its predict latency.
+
+train_model.py writes a run into a hidden staging dir and renames it to
+versions/<version>/ once the manifest is written, so a version is complete
+or absent. The API resolves CURRENT once and loads everything from that one
+directory, so it never pairs a new model with old metadata.
+
+A models dir without CURRENT (artifacts directly in it) resolves to itself.
+"""
+
+import time
+
+from shared import registry as _registry
+from shared.registry import (  # noqa: F401  (re-exported)
+    CURRENT_FILENAME, MANIFEST_FILENAME, PROMOTIONS_FILENAME, REGISTRY_FORMAT_VERSION, VERSIONS_DIRNAME,
+    commit_version, current_version, discard_staging, file_digests, list_versions, new_version_id,
+    previous_version, promote, read_manifest, resolve, rollback, verify_version, version_dir,
+)
+
+# what a flat models dir contributes to a version (adopt)
+FLAT_ARTIFACTS = ('employee_model.joblib', 'model_columns.joblib', 'model_meta.json',
+                  'employee_compact', 'performance_chart.png')
+
+
+def stage_version(models_dir, base=None):
+    """
+    Private staging directory to write a new version into.
+
+    Args:
+        models_dir: Registry root
+        base: Directory whose FLAT_ARTIFACTS are copied in first (optional)
+
+    Returns:
+        Staging directory path
+    """
+    return _registry.stage_version(models_dir, base, FLAT_ARTIFACTS)
+
+
+def predict_latency(model_dir, X, repeat=50):
+    """
+    Load time and median predict() latency of the model in model_dir.
+
+    Args:
+        model_dir: Version (or flat models) directory
+        X: Feature rows; timed as 1 row and as up to 366 rows
+        repeat: Timed calls per measurement
+
+    Returns:
+        dict of milliseconds plus the model format that was loaded
+    """
+    from utils.forest import open_employee_model
+
+    open_employee_model(model_dir)  # imports and page cache, not part of the comparison
+    t0 = time.perf_counter()
+    model, kind = open_employee_model(model_dir)
+    out = {'format': kind, 'load_ms': round((time.perf_counter() - t0) * 1e3, 2)}
+    for label, rows in (('predict_1_row_ms', X.iloc[:1]), ('predict_366_rows_ms', X.iloc[:366])):
+        model.predict(rows)  # warm-up
+        samples = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            model.predict(rows)
+            samples.append(time.perf_counter() - t0)
+        out[label] = round(sorted(samples)[len(samples) // 2] * 1e3, 3)
+    return out
@@ -0,0 +1,293 @@
+# utils/report_extraction.py
+"""
+Extraction of real fuel sales reports (PDF / Excel) into a typed table.
+
+Each file is parsed independently, so files are fanned out over a process
+pool. Per-file results are cached on disk, keyed by the file's SHA-256 and
+PARSER_VERSION, so reruns only parse new or modified reports.
+"""
+
+import hashlib
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+# Bump whenever extraction logic changes so stale cache entries are ignored
+PARSER_VERSION = 1
+
+# Source kinds
+KIND_SUMMARY = 'summary'      # Ceylon Petroleum pre-aggregated daily PDF
+KIND_DHANUSHKA = 'dhanushka'  # Dhanushka Engineering tank-level PDF
+KIND_EXCEL = 'excel'          # Dhanushka Engineering tank-level Excel export
+
+# Typed output table: one row per (date, fuel_type, source_file)
+TABLE_COLUMNS = ['date', 'fuel_type', 'qty', 'records', 'source_file', 'source_kind']
+TABLE_DTYPES = {
+    'fuel_type': 'string',
+    'qty': 'float64',
+    'records': 'int64',
+    'source_file': 'string',
+    'source_kind': 'string',
+}
+
+SUMMARY_LINE_RE = re.compile(
+    r'^(\d{4}-\d{2}-\d{2})\s+'     # Date
+    r'(Lanka[^0-9]+?)\s+'           # Fuel type name
+    r'([\d,]+\.?\d*)\s+'            # Qty (L)
+    r'[\d,]+\.?\d*\s+'              # Unit price
+    r'[\d,]+\.?\d*$'                # Amount
+)
+TEXT_DATE_RE = re.compile(r'(\d{1,2}/\d{1,2}/\d{4}|\d{4}-\d{2}-\d{2})')
+TEXT_NUMBER_RE = re.compile(r'([\d,]+\.?\d*)')
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of a file's contents, read in 1 MiB blocks."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def empty_table() -> pd.DataFrame:
+    """An empty table with the TABLE_COLUMNS schema."""
+    return _typed(pd.DataFrame({c: [] for c in TABLE_COLUMNS}))
+
+
+def _typed(df: pd.DataFrame) -> pd.DataFrame:
+    df = df[TABLE_COLUMNS].astype(TABLE_DTYPES)
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+
+def _to_daily_table(frame: pd.DataFrame, source_file: str, kind: str) -> pd.DataFrame:
+    """
+    Aggregate transaction-level rows (date, fuel_type, qty) to one row per
+    date and fuel. Every source goes through this same groupby.
+    """
+    if frame.empty:
+        return empty_table()
+
+    frame = frame.assign(date=pd.to_datetime(frame['date']).dt.normalize())
+    table = (
+        frame.groupby(['date', 'fuel_type'], as_index=False)
+        .agg(qty=('qty', 'sum'), records=('qty', 'size'))
+    )
+    table['source_file'] = source_file
+    table['source_kind'] = kind
+    return _typed(table)
+
+
+def _records_frame(records) -> pd.DataFrame:
+    return pd.DataFrame(records, columns=['date', 'fuel_type', 'qty'])
+
+
+# ================================================================
+# Per-format extractors (run inside worker processes)
+# ================================================================
+
+def _extract_summary_pdf(path: str):
+    """Ceylon Petroleum summary: 'YYYY-MM-DD FuelType qty unit_price amount' lines."""
+    import pdfplumber
+
+    records = []
+    with pdfplumber.open(path) as pdf:
+        for page in pdf.pages:
+            text = page.extract_text()
+            if not text:
+                continue
+            for line in text.split('\n'):
+                match = SUMMARY_LINE_RE.match(line.strip())
+                if match:
+                    qty = float(match.group(3).replace(',', ''))
+                    records.append((match.group(1), match.group(2).strip(), qty))
+    return _records_frame(records)
+
+
+def _extract_dhanushka_pdf(path: str):
+    """Dhanushka tank-level PDF: Date/Qty(/Item) tables, with a text fallback."""
+    import pdfplumber
+
+    records = []
+    with pdfplumber.open(path) as pdf:
+        for page in pdf.pages:
+            # Try table extraction first
+            tables = page.extract_tables()
+            for table in tables:
+                # Find Date, Qty and Item column indices from header
+                date_idx, qty_idx, item_idx = None, None, None
+                for row in table:
+                    cells = [str(c or '').strip() for c in row]
+                    for i, c in enumerate(cells):
+                        if c.lower() == 'date': date_idx = i
+                        if c.lower() == 'qty': qty_idx = i
+                        if c.lower() == 'item': item_idx = i
+                    if date_idx is not None and qty_idx is not None:
+                        break
+
+                if date_idx is None or qty_idx is None:
+                    continue
+
+                for row in table:
+                    if len(row) <= max(date_idx, qty_idx):
+                        continue
+                    raw_date = str(row[date_idx] or '').strip().split('\n')[0]
+                    raw_qty = str(row[qty_idx] or '').strip().split('\n')[0]
+                    if 'date' in raw_date.lower():
+                        continue
+                    fuel = ''
+                    if item_idx is not None and item_idx < len(row):
+                        fuel = str(row[item_idx] or '').strip().split('\n')[0]
+                    try:
+                        parsed_date = pd.to_datetime(raw_date)
+                        parsed_qty = float(raw_qty.replace(',', ''))
+                        records.append((parsed_date.strftime('%Y-%m-%d'), fuel, parsed_qty))
+                    except (ValueError, TypeError):
+                        pass
+
+            # Fallback: text-based extraction for PDFs without tables
+            if not records:
+                text = page.extract_text()
+                if not text:
+                    continue
+                for line in text.split('\n'):
+                    m = TEXT_DATE_RE.search(line)
+                    if not m:
+                        continue
+                    # Find qty: number before the amount (which is larger)
+                    nums = TEXT_NUMBER_RE.findall(line[m.end():])
+                    if len(nums) >= 1:
+                        try:
+                            qty = float(nums[0].replace(',', ''))
+                            if 0 < qty < 50000:  # Sanity check
+                                d = pd.to_datetime(m.group(1)).strftime('%Y-%m-%d')
+                                records.append((d, '', qty))
+                        except (ValueError, TypeError):
+                            pass
+    return _records_frame(records)
+
+
+def _extract_excel(path: str):
+    """
+    Dhanushka Excel export: Date in column 2, Item in column 5, Qty in column 6.
+    Only those three columns are read; rows are filtered with vector ops.
+    """
+    import openpyxl  # noqa: F401  (ensure the engine is available)
+
+    try:
+        df = pd.read_excel(path, skiprows=4, usecols=[2, 5, 6])
+    except ValueError:
+        # Fewer than 7 columns - not a sale-by-site export
+        return _records_frame([])
+
+    frame = pd.DataFrame({
+        'date': pd.to_datetime(df.iloc[:, 0], errors='coerce'),
+        'fuel_type': df.iloc[:, 1].astype('string').str.strip().fillna(''),
+        'qty': pd.to_numeric(df.iloc[:, 2], errors='coerce'),
+    })
+    return frame.dropna(subset=['date', 'qty'])
+
+
+EXTRACTORS = {
+    KIND_SUMMARY: _extract_summary_pdf,
+    KIND_DHANUSHKA: _extract_dhanushka_pdf,
+    KIND_EXCEL: _extract_excel,
+}
+
+
+def extract_file(path: str, kind: str) -> pd.DataFrame:
+    """Parse one report into the typed table (no caching)."""
+    frame = EXTRACTORS[kind](path)
+    return _to_daily_table(frame, os.path.basename(path), kind)
+
+
+def _extract_job(job):
+    """Worker entry point: returns (path, table, error)."""
+    path, kind = job
+    try:
+        return path, extract_file(path, kind), None
+    except Exception as e:
+        return path, None, str(e)
+
+
+# ================================================================
+# Cache
+# ================================================================
+
+def _cache_path(cache_dir: str, digest: str) -> str:
+    return os.path.join(cache_dir, f"{digest}_v{PARSER_VERSION}.csv")
+
+
+def _read_cache(path: str, source_file: str) -> pd.DataFrame:
+    df = pd.read_csv(path, dtype={'fuel_type': 'string'}, keep_default_na=False)
+    # Cache entries are content-addressed; the file name may have changed
+    df['source_file'] = source_file
+    return _typed(df)
+
+
+def _write_cache(path: str, table: pd.DataFrame):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    table.to_csv(tmp_path, index=False, date_format='%Y-%m-%d')
+    os.replace(tmp_path, path)
+
+
+# ================================================================
+# Public entry point
+# ================================================================
+
+def extract_reports(jobs, cache_dir: str = None, workers: int = None):
+    """
+    Extract many reports, reusing cached results for unchanged files.
+
+    Args:
+        jobs: List of (path, kind) tuples, kind one of EXTRACTORS
+        cache_dir: Directory for per-file cached tables (None disables caching)
+        workers: Process pool size (default: CPU count; 1 = parse in-process)
+
+    Returns:
+        (table, report) - the concatenated typed table, and a per-file list of
+        dicts with keys file, kind, records, cached, error
+    """
+    tables = {}
+    report = {}
+    misses = []
+
+    for path, kind in jobs:
+        name = os.path.basename(path)
+        if cache_dir:
+            cache_file = _cache_path(cache_dir, file_sha256(path))
+            if os.path.exists(cache_file):
+                tables[path] = _read_cache(cache_file, name)
+                report[path] = {'file': name, 'kind': kind, 'cached': True, 'error': None}
+                continue
+        else:
+            cache_file = None
+        misses.append((path, kind, cache_file))
+
+    if misses:
+        miss_jobs = [(path, kind) for path, kind, _ in misses]
+        n_workers = min(workers or os.cpu_count() or 1, len(miss_jobs))
+        if n_workers > 1:
+            with ProcessPoolExecutor(max_workers=n_workers) as pool:
+                results = list(pool.map(_extract_job, miss_jobs))
+        else:
+            results = [_extract_job(job) for job in miss_jobs]
+
+        for (path, kind, cache_file), (_, table, error) in zip(misses, results):
+            report[path] = {'file': os.path.basename(path), 'kind': kind, 'cached': False, 'error': error}
+            if error is not None:
+                continue
+            tables[path] = table
+            if cache_file:
+                _write_cache(cache_file, table)
+
+    ordered = [tables[path] for path, _ in jobs if path in tables]
+    for path, _ in jobs:
+        report[path]['records'] = int(tables[path]['records'].sum()) if path in tables else 0
+
+    table = pd.concat(ordered, ignore_index=True) if ordered else empty_table()
+    return _typed(table), [report[path] for path, _ in jobs]
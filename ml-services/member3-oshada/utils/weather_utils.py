@@ -3,10 +3,15 @@
 Weather utility module for fetching weather data from Open-Meteo API.
 """
 
+import logging
+
+import numpy as np
 import requests
 from datetime import date, datetime
 from typing import Union, Optional, Dict, Any
 
+logger = logging.getLogger(__name__)
+
 # Open-Meteo API endpoint (free, no API key required)
 OPEN_METEO_BASE_URL = "https://api.open-meteo.com/v1/forecast"
 
@@ -114,7 +119,7 @@ def fetch_weather_forecast(
         return result
         
     except requests.RequestException as e:
-        print(f"Error fetching weather data: {e}")
+        logger.warning('Error fetching weather data: %s', e)
         return None
 
 
@@ -167,6 +172,25 @@ def get_weather_for_date(
     }
 
 
+# Simulated weather by season: (months, category weights, temperature range)
+# Category order follows WEATHER_CATEGORIES.
+WEATHER_CATEGORIES = ['Sunny', 'Cloudy', 'Rainy', 'Stormy']
+SEASONAL_WEATHER = [
+    ([5, 6, 7, 8, 9], [0.25, 0.30, 0.35, 0.10], (26, 31)),  # Southwest monsoon
+    ([12, 1, 2], [0.35, 0.30, 0.30, 0.05], (24, 29)),       # Northeast monsoon
+    ([3, 4], [0.50, 0.25, 0.20, 0.05], (28, 34)),           # Inter-monsoon (hot)
+    ([10, 11], [0.40, 0.30, 0.25, 0.05], (26, 30)),         # Inter-monsoon (Oct, Nov)
+]
+
+
+def _season_for_month(month: int):
+    """Return (weights, temp_range) of the season containing month."""
+    for months, weights, temp_range in SEASONAL_WEATHER:
+        if month in months:
+            return weights, temp_range
+    return SEASONAL_WEATHER[-1][1], SEASONAL_WEATHER[-1][2]
+
+
 def simulate_weather_for_date(target_date: Union[date, datetime, str]) -> Dict[str, Any]:
     """
     Simulate realistic weather for a date based on Sri Lankan monsoon patterns.
@@ -192,23 +216,8 @@ def simulate_weather_for_date(target_date: Union[date, datetime, str]) -> Dict[s
     
     month = target_date.month
     
-    # Define weather probabilities by season
-    if month in [5, 6, 7, 8, 9]:  # Southwest monsoon
-        weather_types = ['Sunny', 'Cloudy', 'Rainy', 'Stormy']
-        weights = [0.25, 0.30, 0.35, 0.10]
-        temp_range = (26, 31)
-    elif month in [12, 1, 2]:  # Northeast monsoon
-        weather_types = ['Sunny', 'Cloudy', 'Rainy', 'Stormy']
-        weights = [0.35, 0.30, 0.30, 0.05]
-        temp_range = (24, 29)
-    elif month in [3, 4]:  # Inter-monsoon (hot)
-        weather_types = ['Sunny', 'Cloudy', 'Rainy', 'Stormy']
-        weights = [0.50, 0.25, 0.20, 0.05]
-        temp_range = (28, 34)
-    else:  # Inter-monsoon (Oct, Nov)
-        weather_types = ['Sunny', 'Cloudy', 'Rainy', 'Stormy']
-        weights = [0.40, 0.30, 0.25, 0.05]
-        temp_range = (26, 30)
+    weather_types = WEATHER_CATEGORIES
+    weights, temp_range = _season_for_month(month)
     
     weather = random.choices(weather_types, weights=weights)[0]
     temperature = round(random.uniform(*temp_range), 1)
@@ -220,6 +229,39 @@ def simulate_weather_for_date(target_date: Union[date, datetime, str]) -> Dict[s
     }
 
 
+def simulate_weather_arrays(months, rng: np.random.Generator):
+    """
+    Vectorized simulate_weather_for_date.
+    Draws one weather category and temperature per entry of months.
+    
+    Args:
+        months: Integer array of months (1-12)
+        rng: Seeded numpy Generator
+    
+    Returns:
+        (weather, temperature) arrays - category strings and temperatures
+        rounded to 1 decimal
+    """
+    months = np.asarray(months, dtype=np.int64)
+    
+    # Per-month lookup tables built from SEASONAL_WEATHER
+    cum_weights = np.zeros((13, len(WEATHER_CATEGORIES)))
+    temp_low = np.zeros(13)
+    temp_high = np.zeros(13)
+    for m in range(1, 13):
+        weights, (low, high) = _season_for_month(m)
+        cum_weights[m] = np.cumsum(weights)
+        temp_low[m], temp_high[m] = low, high
+    
+    u = rng.random(len(months)) * cum_weights[months, -1]
+    codes = (u[:, None] >= cum_weights[months]).sum(axis=1)
+    weather = np.asarray(WEATHER_CATEGORIES, dtype=object)[codes]
+    
+    temperature = np.round(rng.uniform(temp_low[months], temp_high[months]), 1)
+    
+    return weather, temperature
+
+
 if __name__ == "__main__":
     # Test the module
     print("Testing Weather Utils Module:")
@@ -0,0 +1,8 @@
+"""
+Code shared by the ML services: the model registry (registry.py), its
+promotion history (promotions.py), /metrics (metrics.py) and logging
+(logs.py). Standard library only.
+
+Installed into each service's environment rather than found through
+sys.path, see README.md.
+"""
@@ -0,0 +1,134 @@
+# shared/logs.py
+"""
+Structured logging for the ML services and their scripts.
+
+setup_logging() installs one QueueHandler on the root logger; a
+QueueListener thread does the JSON formatting and the stderr write, so a
+request thread only pays for putting a record on a queue. Records below the
+configured level are dropped by the logger before any formatting, so hot
+paths should log with lazy %-style arguments:
+
+    logger.debug('scored %d rows for %s', n, station)   # free when DEBUG is off
+
+Every record carries the current request id (REQUEST_ID, set per request by
+the API middleware / Flask hooks from the X-Request-ID header, and handed to
+subprocesses via FUELWATCH_REQUEST_ID, see subprocess_env()).
+
+Environment:
+    FUELWATCH_LOG_LEVEL    DEBUG / INFO (default) / WARNING / ...
+    FUELWATCH_LOG_FORMAT   json (default) or text
+    FUELWATCH_LOG_SAMPLE   fraction of DEBUG records kept (default 1.0);
+                           INFO and above are never sampled
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+REQUEST_ID_ENV = 'FUELWATCH_REQUEST_ID'
+
+REQUEST_ID = ContextVar('request_id', default=os.environ.get(REQUEST_ID_ENV, '-'))
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+_listener = None
+
+
+def new_request_id(incoming=None):
+    """Reuse a caller-supplied id (trimmed to something log-safe) or make a new one."""
+    if incoming:
+        rid = ''.join(ch for ch in incoming[:64] if ch.isalnum() or ch in '-_.')
+        if rid:
+            return rid
+    return uuid.uuid4().hex[:16]
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the request id of the context that emitted them."""
+
+    def filter(self, record):
+        record.request_id = REQUEST_ID.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a random fraction of DEBUG records; everything else passes."""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or self.rate >= 1.0 or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; fields passed with extra={...} become top-level keys."""
+
+    def format(self, record):
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'request_id': getattr(record, 'request_id', '-'),
+            'msg': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s'
+
+
+def setup_logging(level=None, fmt=None):
+    """
+    Route all logging through a queue to one stderr writer thread.
+
+    Idempotent: later calls only change the level. Returns the QueueListener.
+    """
+    global _listener
+    level = (level or os.environ.get('FUELWATCH_LOG_LEVEL', 'INFO')).upper()
+    root = logging.getLogger()
+    root.setLevel(level)
+    if _listener is not None:
+        return _listener
+
+    fmt = (fmt or os.environ.get('FUELWATCH_LOG_FORMAT', 'json')).lower()
+    sample = float(os.environ.get('FUELWATCH_LOG_SAMPLE', '1.0'))
+
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+
+    q = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(q)
+    # filters run in the emitting thread, where the request context is
+    handler.addFilter(SamplingFilter(sample))
+    handler.addFilter(RequestIdFilter())
+
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.addHandler(handler)
+
+    _listener = logging.handlers.QueueListener(q, stream, respect_handler_level=False)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
+
+
+def subprocess_env():
+    """os.environ plus the current request id, for scripts run by the API."""
+    return {**os.environ, REQUEST_ID_ENV: REQUEST_ID.get()}
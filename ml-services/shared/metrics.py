@@ -0,0 +1,167 @@
+# shared/metrics.py
+"""
+Minimal Prometheus-style metrics (text exposition format 0.0.4), no extra
+dependency. The services define their metrics in utils/metrics.py:
+
+    STAGE_SECONDS = Histogram('..._stage_seconds', '...', ('stage',))
+    stage = stage_timer(STAGE_SECONDS)
+
+    with stage('inference'):
+        ...
+    UPLOAD_BYTES.observe(size, endpoint='/forecast')
+
+GET /metrics returns render(). Values are per process: with several
+uvicorn / gunicorn workers, Prometheus scrapes each worker separately.
+
+Set FUELWATCH_METRICS=0 to disable. Disabled, a stage timer returns one
+shared no-op context manager and observe/inc/set return immediately, so
+call sites stay in place at near-zero cost.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+
+METRICS_ENABLED = os.environ.get('FUELWATCH_METRICS', '1').strip().lower() not in {'0', 'false', 'no', 'off'}
+
+# seconds; the default for Histogram
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_REGISTRY = []
+
+
+def _label_key(labelnames, labels):
+    return tuple(str(labels.get(name, '')) for name in labelnames)
+
+
+def _format_labels(labelnames, key, extra=''):
+    parts = ['%s="%s"' % (n, v) for n, v in zip(labelnames, key)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        _REGISTRY.append(self)
+
+    def _header(self):
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1.0, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return self._header() + [
+            f'{self.name}{_format_labels(self.labelnames, k)} {v:g}' for k, v in items
+        ]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = _label_key(self.labelnames, labels)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # per-bucket counts (+Inf last), sum
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][i] += 1
+            state[1] += value
+
+    def render(self):
+        with self._lock:
+            items = sorted((k, (list(s[0]), s[1])) for k, s in self._values.items())
+        les = ['le="%g"' % b for b in self.buckets] + ['le="+Inf"']
+        lines = self._header()
+        for key, (counts, total) in items:
+            cumulative = 0
+            for le, c in zip(les, counts):
+                cumulative += c
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {total:.6f}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class _Stage:
+    __slots__ = ('histogram', 'stage', 't0')
+
+    def __init__(self, histogram, stage):
+        self.histogram = histogram
+        self.stage = stage
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.t0, stage=self.stage)
+        return False
+
+
+class _NoopStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_STAGE = _NoopStage()
+
+
+def stage_timer(histogram):
+    """
+    stage(name) for a histogram labelled by 'stage': a context manager that
+    times one pipeline stage into it (a shared no-op when metrics are disabled).
+    """
+    def stage(name):
+        return _Stage(histogram, name) if METRICS_ENABLED else _NOOP_STAGE
+    return stage
+
+
+def render():
+    return '\n'.join(line for m in _REGISTRY for line in m.render()) + '\n'
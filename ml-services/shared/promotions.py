@@ -0,0 +1,65 @@
+# shared/promotions.py
+"""
+Promotion history of a model registry (registry.py).
+
+versions/promotions.jsonl has one JSON line per change of CURRENT:
+
+    {"version": ..., "previous": ..., "at": ...}                    promote
+    {"version": ..., "previous": ..., "at": ..., "rollback": true}  rollback
+
+Replaying the log gives the stack of versions promoted on top of each
+other. A rollback pops the versions above the one it re-activated, so a
+second rollback goes one step further back instead of re-activating the
+version that was just rolled back from.
+
+Standard library only.
+"""
+
+import json
+import os
+from datetime import datetime
+
+
+def append_promotion(log_path, version, previous, rollback=False):
+    """Record that CURRENT changed from previous to version."""
+    entry = {'version': version, 'previous': previous, 'at': datetime.now().isoformat(timespec='seconds')}
+    if rollback:
+        entry['rollback'] = True
+    with open(log_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry) + '\n')
+
+
+def promotion_stack(log_path):
+    """Versions promoted on top of each other, oldest first, with rollbacks undone."""
+    if not os.path.exists(log_path):
+        return []
+    stack = []
+    with open(log_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            version = entry['version']
+            if entry.get('rollback'):
+                while stack and stack[-1] != version:
+                    stack.pop()
+                if not stack:
+                    stack.append(version)
+            else:
+                if not stack and entry.get('previous'):
+                    stack.append(entry['previous'])  # log started after an earlier promotion
+                if not stack or stack[-1] != version:
+                    stack.append(version)
+    return stack
+
+
+def rollback_target(log_path, current):
+    """
+    The version to roll back to from current: the one below it on the
+    promotion stack. None when current is the first promotion (or unknown).
+    """
+    stack = promotion_stack(log_path)
+    if current not in stack:
+        return None
+    i = len(stack) - 1 - stack[::-1].index(current)
+    return stack[i - 1] if i > 0 else None
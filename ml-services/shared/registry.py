@@ -0,0 +1,238 @@
+# shared/registry.py
+"""
+Local registry of trained model versions, shared by the services'
+utils/registry.py (member1-kumara, member3-oshada).
+
+    <models dir>/
+        CURRENT                     id of the active version (one line)
+        versions/<version>/         one training run, never modified
+            ...artifacts...
+            manifest.json           sha256 + size of every file, metrics, parent
+        versions/promotions.jsonl   one line per promotion / rollback (promotions.py)
+
+A version is written into a hidden staging dir and renamed into place once
+its manifest exists, so versions/<version>/ is either complete or absent.
+Promotion writes a temp file and os.replace()s it over CURRENT: a reader sees
+the old id or the new one, never a mix. Readers resolve CURRENT once and load
+every artifact from that version dir.
+
+A models dir without CURRENT is the flat layout (artifacts directly in it)
+and resolves to itself.
+
+What a version holds is up to the service: its utils/registry.py passes the
+artifact names to stage_version() and the files a version cannot do without
+to commit_version(), and adds its own latency measurement.
+
+Standard library only.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+
+from .promotions import append_promotion, rollback_target
+
+VERSIONS_DIRNAME = 'versions'
+CURRENT_FILENAME = 'CURRENT'
+MANIFEST_FILENAME = 'manifest.json'
+PROMOTIONS_FILENAME = 'promotions.jsonl'
+REGISTRY_FORMAT_VERSION = 1
+
+
+def _write_atomic(path, text):
+    path = Path(path)
+    tmp_path = path.with_name(f'.{path.name}.tmp{os.getpid()}')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _promotions_log(root):
+    return Path(root) / VERSIONS_DIRNAME / PROMOTIONS_FILENAME
+
+
+def version_dir(root, version):
+    if not version or '/' in version or '\\' in version or version.startswith('.'):
+        raise ValueError(f'Invalid model version: {version!r}')
+    return Path(root) / VERSIONS_DIRNAME / version
+
+
+def current_version(root):
+    """The active version of a registry, or None for a flat models dir."""
+    try:
+        return (Path(root) / CURRENT_FILENAME).read_text(encoding='utf-8').strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def resolve(root, version=None):
+    """
+    (directory to load artifacts from, version id). version=None follows
+    CURRENT; without CURRENT the flat layout in root is used (version None).
+    """
+    version = version or current_version(root)
+    if version is None:
+        return Path(root), None
+    vdir = version_dir(root, version)
+    if not (vdir / MANIFEST_FILENAME).exists():
+        raise FileNotFoundError(f'Model version {version} not found in {Path(root) / VERSIONS_DIRNAME}')
+    return vdir, version
+
+
+def new_version_id(root):
+    base = datetime.now().strftime('%Y%m%d-%H%M%S')
+    version, n = base, 1
+    while version_dir(root, version).exists():
+        n += 1
+        version = f'{base}-{n}'
+    return version
+
+
+def stage_version(root, base=None, names=()):
+    """
+    A private staging dir to write a new version into. With base (a version
+    dir or a flat models dir) the artifacts in names that it has are copied
+    in first. The dir is removed again if that copy fails.
+    """
+    staging = Path(root) / VERSIONS_DIRNAME / f'.staging-{os.getpid()}-{time.time_ns()}'
+    staging.mkdir(parents=True)
+    if base is not None:
+        base = Path(base)
+        try:
+            for name in names:
+                src = base / name
+                if src.is_dir():
+                    shutil.copytree(src, staging / name)
+                elif src.exists():
+                    shutil.copy2(src, staging / name)
+        except BaseException:
+            discard_staging(staging)
+            raise
+    return staging
+
+
+def discard_staging(staging):
+    shutil.rmtree(staging, ignore_errors=True)
+
+
+def file_digests(directory):
+    """{relative path: {'sha256', 'bytes'}} of every file under directory but the manifest."""
+    directory = Path(directory)
+    files = {}
+    for path in sorted(p for p in directory.rglob('*') if p.is_file()):
+        rel = path.relative_to(directory).as_posix()
+        if rel != MANIFEST_FILENAME:
+            files[rel] = {'sha256': _file_sha256(path), 'bytes': path.stat().st_size}
+    return files
+
+
+def commit_version(root, staging, metrics=None, parent=None, source=None, version=None, required=()):
+    """
+    Checksum a staged version, write its manifest and rename it into
+    versions/<version>/. Returns (version, version dir); CURRENT is untouched.
+    Files in required must exist in the staging dir.
+    """
+    staging = Path(staging)
+    for name in required:
+        if not (staging / name).exists():
+            raise FileNotFoundError(f'Staged version has no {name}: {staging}')
+    version = version or new_version_id(root)
+    target = version_dir(root, version)
+
+    manifest = {
+        'format_version': REGISTRY_FORMAT_VERSION,
+        'version': version,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'parent': parent,
+        'source': source,
+        'metrics': metrics or {},
+        'files': file_digests(staging),
+    }
+    _write_atomic(staging / MANIFEST_FILENAME, json.dumps(manifest, indent=2))
+    os.replace(staging, target)  # fails if the version exists (non-empty dir)
+    return version, target
+
+
+def read_manifest(root, version):
+    path = version_dir(root, version) / MANIFEST_FILENAME
+    if not path.exists():
+        raise FileNotFoundError(f'Model version {version} not found in {Path(root) / VERSIONS_DIRNAME}')
+    return json.loads(path.read_text(encoding='utf-8'))
+
+
+def verify_version(root, version):
+    """Files that are missing, changed or unexpected compared to the manifest (empty if intact)."""
+    expected = read_manifest(root, version)['files']
+    actual = file_digests(version_dir(root, version))
+    problems = []
+    for rel, info in expected.items():
+        if rel not in actual:
+            problems.append(f'missing: {rel}')
+        elif actual[rel]['sha256'] != info['sha256']:
+            problems.append(f'checksum mismatch: {rel}')
+    problems.extend(f'not in manifest: {rel}' for rel in actual if rel not in expected)
+    return problems
+
+
+def list_versions(root):
+    """Manifests of every committed version, oldest first."""
+    vroot = Path(root) / VERSIONS_DIRNAME
+    if not vroot.is_dir():
+        return []
+    manifests = []
+    for vdir in sorted(vroot.iterdir()):
+        path = vdir / MANIFEST_FILENAME
+        if vdir.is_dir() and not vdir.name.startswith('.') and path.exists():
+            manifests.append(json.loads(path.read_text(encoding='utf-8')))
+    return manifests
+
+
+def promote(root, version, verify=True, rollback=False):
+    """
+    Make version the active one (atomic CURRENT swap). Returns the previous
+    version. verify=True refuses a version whose files fail their checksums;
+    rollback=True logs the swap as undoing the current version (see rollback()).
+    """
+    read_manifest(root, version)  # exists
+    if verify:
+        problems = verify_version(root, version)
+        if problems:
+            raise ValueError(f"Model version {version} failed verification: {'; '.join(problems)}")
+
+    previous = current_version(root)
+    _write_atomic(Path(root) / CURRENT_FILENAME, version + '\n')
+    append_promotion(_promotions_log(root), version, previous, rollback=rollback)
+    return previous
+
+
+def previous_version(root):
+    """
+    The version rollback() would re-activate: the one promoted before the
+    current one, skipping versions that were themselves rolled back.
+    """
+    current = current_version(root)
+    if current is None:
+        return None
+    return rollback_target(_promotions_log(root), current)
+
+
+def rollback(root):
+    """Re-activate previous_version(); returns it (None: nothing to roll back to)."""
+    target = previous_version(root)
+    if target is not None:
+        promote(root, target, rollback=True)
+    return target